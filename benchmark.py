@@ -0,0 +1,87 @@
+import argparse, os, sys
+from internal.utils.constants import *
+from internal.utils.logger import Logger
+from internal.utils.benchmark import run_benchmark, save, load, compare, summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the CDCL SAT Solver on families of instances under '/input'.\n"
+                                                 "Examples:\n"
+                                                 "Record a baseline: python3 benchmark.py -f uf50-218 uuf50-218 -n 100 -o base.json\n"
+                                                 "Compare with it: python3 benchmark.py -f uf50-218 uuf50-218 -n 100 -bl base.json\n")
+    parser.add_argument("-f", "--families", dest="families", type=str, nargs="+", required=True,
+                        help="Directories under directory 'input' to solve the .cnf files of, e.g. uf50-218.")
+    parser.add_argument("-n", "--limit", dest="limit", type=int, default=0,
+                        help="Number of instances solved per family, in file name order. Default: 0 (all)")
+    parser.add_argument("-k", "--repeat", dest="repeat", type=int, default=1,
+                        help="Runs per instance, the median time is recorded. Default: 1")
+    parser.add_argument("-o", "--output", dest="output", type=str, default=None,
+                        help="Write the results to this JSON file. Default: none")
+    parser.add_argument("-bl", "--baseline", dest="baseline", type=str, default=None,
+                        help="Compare the results with this JSON file of earlier results. Default: none")
+    parser.add_argument("-th", "--threshold", dest="threshold", type=float, default=0.1,
+                        help="Relative change of the geometric mean of a metric over a family that counts as a "
+                             "regression or improvement. Default: 0.1")
+    parser.add_argument("-cf", "--confidence", dest="confidence", type=float, default=0.95,
+                        help="Confidence level the change must be significant at. Default: 0.95")
+    parser.add_argument("-sd", "--seed", dest="seed", type=int, default=0,
+                        help="Random seed of the randomized heuristics, set before each instance. Default: 0")
+    parser.add_argument("-b", "--branch-heuristic", dest="heuristic", type=str, default="DEFAULT",
+                        help="Branching variable heuristic. Default: DEFAULT")
+    parser.add_argument("-r", "--restart", dest="restart", type=str, default="NONE",
+                        help="Restart policy. NONE/LUBY/GEOMETRIC/GLUCOSE. Default: NONE")
+    parser.add_argument("-m", "--minimize", dest="minimize", type=str, default="NONE",
+                        help="Learnt clause minimization. NONE/LOCAL/RECURSIVE. Default: NONE")
+    parser.add_argument("-ph", "--phase", dest="phase", type=str, default="NONE",
+                        help="Phase selection. NONE/SAVE/TARGET/BEST. Default: NONE")
+    parser.add_argument("-pp", "--preprocess", dest="preprocess", action='store_true',
+                        help="Preprocess the formula before solving. Off by default.")
+    parser.add_argument("-pr", "--probe", dest="probe", action='store_true',
+                        help="Preprocess with probing too. Off by default.")
+    parser.add_argument("-sp", "--simplify", dest="simplify", action='store_true',
+                        help="Root level simplification. Off by default.")
+    parser.add_argument("-rb", "--reduce-base", dest="reduce_base", type=int, default=2000,
+                        help="Conflicts before the first learnt clause database reduction, 0 to never reduce. Default: 2000")
+    parser.add_argument("-ri", "--reduce-inc", dest="reduce_inc", type=int, default=300,
+                        help="Increase of the interval between learnt clause database reductions. Default: 300")
+
+    args = parser.parse_args()
+
+    # the flags of main.py that do not apply to a single sequential solver are off
+    config = {
+        F_LOG_LEVEL: "NONE",
+        F_STATS: True,
+        F_PROGRESS: False,
+        F_HEURISTIC: args.heuristic,
+        F_RESTART: args.restart,
+        F_REDUCE_BASE: args.reduce_base,
+        F_REDUCE_INC: args.reduce_inc,
+        F_MINIMIZE: args.minimize,
+        F_PHASE: args.phase,
+        F_SEED: args.seed,
+        F_PREPROCESS: args.preprocess,
+        F_PROBE: args.probe,
+        F_SIMPLIFY: args.simplify
+    }
+    Logger.set_level(config[F_LOG_LEVEL])
+
+    input_dir_path = os.path.join(os.path.dirname(__file__), "input")
+    results = run_benchmark([os.path.join(input_dir_path, family) for family in args.families], config,
+                            args.limit, args.repeat)
+    if args.output is not None:
+        save(results, args.output)
+        print(f"RESULTS: written to {args.output}")
+
+    if args.baseline is not None:
+        baseline = load(args.baseline)
+        if baseline["config"] != results["config"]:
+            print(f"BASELINE: solved with a different configuration {baseline['config']}")
+        rows = compare(results, baseline, args.threshold, args.confidence)
+        print(summary(rows))
+        failed = [row for row in rows if row[-1] in ("REGRESSION", "WRONG")]
+        if failed:
+            print(f"BASELINE: {len(failed)} regressions")
+            sys.exit(1)
+        print("BASELINE: no regression")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import time
+from typing import List, Tuple
+from internal.sat.constants import VAL_TRUE, VAL_FALSE, VAL_UNASSIGNED
+from internal.sat.formula import Formula
+from internal.utils.exceptions import FileFormatError
+from internal.utils.parser import OPENERS
+
+# bytes of a text DRAT proof, any other byte at the start of the proof means it is binary
+TEXT_BYTES = frozenset(b"0123456789- \t\r\nd")
+# value of a literal -> its rank when choosing the watched literals of a clause
+WATCH_ORDER = {VAL_TRUE: 0, VAL_UNASSIGNED: 1, VAL_UNASSIGNED ^ 1: 1, VAL_FALSE: 2}
+
+class DratChecker:
+    """
+    Backward DRAT proof checker (Wetzler, Heule and Hunt, 2014, as in drat-trim).
+    Forward pass: the clauses of the formula and the lemmas of the proof are added (and deleted) in order with
+    unit propagation at the top level, until it finds a conflict. Deleting a clause that is the reason of a top
+    level assignment is ignored, like unit clause deletions in drat-trim.
+    Backward pass: the clauses involved in the conflict are marked as core. Lemmas are then removed in reverse
+    order and only the core ones are checked, against the clauses active before them: a lemma is RUP if
+    assigning its negation propagates to a conflict, otherwise it must be RAT on its first literal. The clauses
+    involved in each successful check are marked as core too.
+    Propagation uses two watched literals, and reaches the fixpoint over the core clauses before using any
+    other clause, so that checks involve as few new clauses as possible.
+    """
+    def __init__(self, formula: Formula):
+        self.variables = formula.get_variables()
+        # clause id -> literals, the formula first then the lemmas of the proof
+        self.clauses = [list(dict.fromkeys(c.lits)) for c in formula.clist]
+        self.num_original = len(self.clauses)
+        # (deletion, clause id) for every line of the proof
+        self.ops = []
+        # lemma id -> its first literal as written in the proof, the literals of clauses are reordered for watches
+        self.pivots = {}
+        self.core = None
+        self.verified = False
+        self.elapsed = 0.0
+        self.checks = 0
+
+    def read_proof(self, filepath: str, binary: bool=None):
+        """
+        Reads a text or binary DRAT proof, possibly compressed, binary is detected if not given.
+        """
+        opener = next((o for ext, o in OPENERS.items() if filepath.endswith(ext)), open)
+        with opener(filepath, "rb") as f:
+            data = f.read()
+        if binary is None:
+            binary = any(byte not in TEXT_BYTES for byte in data[:100])
+        lines = self.parse_binary(data) if binary else self.parse_text(data)
+        ids = {}
+        for delete, dimacs in lines:
+            lits = list(dict.fromkeys(self.to_literal(x) for x in dimacs))
+            key = frozenset(lits)
+            if delete:
+                active = ids.get(key)
+                if not active:
+                    # deleting a clause that is not there changes nothing
+                    continue
+                self.ops.append((True, active.pop()))
+            else:
+                self.clauses.append(lits)
+                if lits:
+                    self.pivots[len(self.clauses) - 1] = lits[0]
+                ids.setdefault(key, []).append(len(self.clauses) - 1)
+                self.ops.append((False, len(self.clauses) - 1))
+
+    # Returns the literal of a DIMACS literal, variables only in the proof are added to the formula's.
+    def to_literal(self, dimacs: int) -> int:
+        return self.variables.add(str(abs(dimacs))) << 1 | (dimacs < 0)
+
+    @classmethod
+    def parse_text(cls, data: bytes) -> List[Tuple[bool, List[int]]]:
+        lines, lits, delete = [], [], False
+        for token in data.split():
+            if token == b"d":
+                delete = True
+            elif token == b"0":
+                lines.append((delete, lits))
+                lits, delete = [], False
+            else:
+                lits.append(int(token))
+        if lits:
+            raise FileFormatError("Proof lemma must end with 0")
+        return lines
+
+    @classmethod
+    def parse_binary(cls, data: bytes) -> List[Tuple[bool, List[int]]]:
+        lines = []
+        i, n = 0, len(data)
+        while i < n:
+            mode = data[i]
+            if mode not in b"ad":
+                raise FileFormatError(f"Unexpected byte {mode} in binary proof")
+            i += 1
+            lits = []
+            while True:
+                value, shift = 0, 0
+                while True:
+                    byte = data[i]
+                    i += 1
+                    value |= (byte & 0x7f) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                if value == 0:
+                    break
+                lits.append(-(value >> 1) if value & 1 else value >> 1)
+            lines.append((mode == ord("d"), lits))
+        return lines
+
+    def check(self) -> bool:
+        """
+        Returns True if the proof shows the formula is unsatisfiable.
+        """
+        start = time.perf_counter()
+        num_vars = len(self.variables)
+        clauses = self.clauses
+        self.values = bytearray([VAL_UNASSIGNED]) * num_vars
+        self.reason = [-1] * num_vars
+        self.seen = bytearray(num_vars)
+        self.trail = []
+        # the next trail literal whose core watchers, and other watchers, have to be visited
+        self.head_core = self.head_all = 0
+        self.watches = [[] for _ in range(2 * num_vars)]
+        self.active = bytearray(len(clauses))
+        self.core = bytearray(len(clauses))
+
+        # forward pass, until the first conflict
+        conflict = -1
+        for cid in range(self.num_original):
+            conflict = self.attach(cid)
+            if conflict >= 0:
+                break
+        if conflict < 0:
+            conflict = self.propagate()
+        ignored = set()
+        end = 0
+        while conflict < 0 and end < len(self.ops):
+            delete, cid = self.ops[end]
+            end += 1
+            if not delete:
+                conflict = self.attach(cid)
+                if conflict < 0:
+                    conflict = self.propagate()
+            elif self.is_reason(cid):
+                ignored.add(end - 1)
+            else:
+                self.detach(cid)
+        if conflict < 0:
+            self.elapsed = time.perf_counter() - start
+            return False
+
+        # backward pass, clauses newly in the core are visited again for the literals only their core watchers saw
+        self.analyze(conflict)
+        self.head_core = self.head_all
+        self.verified = True
+        for j in range(end - 1, -1, -1):
+            delete, cid = self.ops[j]
+            if delete:
+                if j not in ignored:
+                    self.attach(cid)
+                    self.propagate()
+                continue
+            if self.is_reason(cid):
+                self.truncate(cid)
+            else:
+                self.detach(cid)
+                # the conflict found by the forward pass may have stopped propagation early
+                self.propagate()
+            if self.core[cid] and not self.verify(cid):
+                self.verified = False
+                break
+        self.elapsed = time.perf_counter() - start
+        return self.verified
+
+    def attach(self, cid: int) -> int:
+        """
+        Activates a clause at the top level, watching its TRUE, then unassigned literals first.
+        Returns the clause if it is FALSE, -1 otherwise. A unit clause assigns its literal.
+        """
+        self.active[cid] = 1
+        lits = self.clauses[cid]
+        values = self.values
+        if not lits:
+            return cid
+        # TRUE literals first, then unassigned, then FALSE
+        lits.sort(key=lambda lit: WATCH_ORDER[values[lit >> 1] ^ (lit & 1)])
+        first = values[lits[0] >> 1] ^ (lits[0] & 1)
+        if len(lits) >= 2:
+            self.watches[lits[0]].append(cid)
+            self.watches[lits[1]].append(cid)
+        if first == VAL_FALSE:
+            return cid
+        if first != VAL_TRUE and (len(lits) == 1 or values[lits[1] >> 1] ^ (lits[1] & 1) == VAL_FALSE):
+            self.assign(lits[0], cid)
+        return -1
+
+    def detach(self, cid: int):
+        self.active[cid] = 0
+        lits = self.clauses[cid]
+        if len(lits) >= 2:
+            self.watches[lits[0]].remove(cid)
+            self.watches[lits[1]].remove(cid)
+
+    def is_reason(self, cid: int) -> bool:
+        return any(self.reason[lit >> 1] == cid for lit in self.clauses[cid])
+
+    def truncate(self, cid: int):
+        """
+        Removes a clause that is the reason of a top level assignment: the trail is undone from that assignment
+        on, and the watches are rebuilt over the remaining active clauses before propagating again.
+        """
+        position = next(i for i, lit in enumerate(self.trail) if self.reason[lit >> 1] == cid)
+        self.backtrack(position)
+        self.active[cid] = 0
+        self.watches = [[] for _ in range(len(self.watches))]
+        for c in range(len(self.clauses)):
+            if self.active[c]:
+                self.attach(c)
+        self.propagate()
+
+    def assign(self, lit: int, cid: int):
+        self.values[lit >> 1] = VAL_TRUE ^ (lit & 1)
+        self.reason[lit >> 1] = cid
+        self.trail.append(lit)
+
+    def backtrack(self, size: int):
+        for lit in self.trail[size:]:
+            self.values[lit >> 1] = VAL_UNASSIGNED
+            self.reason[lit >> 1] = -1
+        del self.trail[size:]
+        self.head_core = min(self.head_core, size)
+        self.head_all = min(self.head_all, size)
+
+    def propagate(self) -> int:
+        """
+        Core-first unit propagation: the core watchers of every assigned literal are visited before the other
+        watchers of any literal, and a unit found in a non core clause is propagated over the core first.
+        Returns the conflicting clause, or -1.
+        """
+        trail = self.trail
+        while True:
+            while self.head_core < len(trail):
+                conflict = self.visit(trail[self.head_core] ^ 1, True)
+                self.head_core += 1
+                if conflict >= 0:
+                    return conflict
+            if self.head_all == len(trail):
+                return -1
+            conflict = self.visit(trail[self.head_all] ^ 1, False)
+            self.head_all += 1
+            if conflict >= 0:
+                return conflict
+
+    def visit(self, false_lit: int, core: bool) -> int:
+        """
+        Visits the core (or other) clauses watching false_lit, like Solver.unit_propagate.
+        """
+        values, clauses, watches, is_core = self.values, self.clauses, self.watches, self.core
+        watchers = watches[false_lit]
+        kept = []
+        for i, cid in enumerate(watchers):
+            if is_core[cid] != core:
+                kept.append(cid)
+                continue
+            lits = clauses[cid]
+            if lits[0] == false_lit:
+                lits[0], lits[1] = lits[1], false_lit
+            other = lits[0]
+            if values[other >> 1] ^ (other & 1) == VAL_TRUE:
+                kept.append(cid)
+                continue
+            for k in range(2, len(lits)):
+                if values[lits[k] >> 1] ^ (lits[k] & 1) != VAL_FALSE:
+                    lits[1], lits[k] = lits[k], false_lit
+                    watches[lits[1]].append(cid)
+                    break
+            else:
+                kept.append(cid)
+                if values[other >> 1] ^ (other & 1) == VAL_FALSE:
+                    kept.extend(watchers[i + 1:])
+                    watches[false_lit] = kept
+                    return cid
+                self.assign(other, cid)
+        watches[false_lit] = kept
+        return -1
+
+    def analyze(self, conflict: int, lit: int=-1):
+        """
+        Marks as core the conflicting clause (or the reasons of lit, a TRUE literal) and, through the trail,
+        the reasons of all the assignments it depends on.
+        """
+        seen, reason, clauses, core = self.seen, self.reason, self.clauses, self.core
+        if conflict >= 0:
+            core[conflict] = 1
+            for x in clauses[conflict]:
+                seen[x >> 1] = 1
+        else:
+            seen[lit >> 1] = 1
+        for x in reversed(self.trail):
+            var = x >> 1
+            if not seen[var]:
+                continue
+            seen[var] = 0
+            cid = reason[var]
+            if cid >= 0:
+                core[cid] = 1
+                for y in clauses[cid]:
+                    seen[y >> 1] = 1
+        for x in clauses[conflict] if conflict >= 0 else [lit]:
+            seen[x >> 1] = 0
+
+    def verify(self, cid: int) -> bool:
+        """
+        Checks that the lemma is RUP, or RAT on its first literal in the proof, over the active clauses.
+        """
+        lits = self.clauses[cid]
+        if self.is_rup(lits):
+            return True
+        if not lits:
+            return False
+        pivot = self.pivots[cid]
+        for c in range(len(self.clauses)):
+            if not self.active[c] or pivot ^ 1 not in self.clauses[c]:
+                continue
+            resolvent = lits + [lit for lit in self.clauses[c] if lit != pivot ^ 1]
+            if any(lit ^ 1 in resolvent for lit in resolvent):
+                continue
+            if not self.is_rup(resolvent):
+                return False
+            self.core[c] = 1
+        return True
+
+    def is_rup(self, lits: List[int]) -> bool:
+        """
+        Assigns the negation of the literals and propagates. On a conflict, marks the clauses involved as core.
+        """
+        self.checks += 1
+        size = len(self.trail)
+        values = self.values
+        conflict, true_lit = -1, -1
+        for lit in lits:
+            val = values[lit >> 1] ^ (lit & 1)
+            if val == VAL_TRUE:
+                true_lit = lit
+                break
+            elif val != VAL_FALSE:
+                self.assign(lit ^ 1, -1)
+        if true_lit < 0:
+            conflict = self.propagate()
+        if true_lit >= 0 or conflict >= 0:
+            self.analyze(conflict, true_lit)
+        self.backtrack(size)
+        return true_lit >= 0 or conflict >= 0
+
+    # Returns the number of lemmas in the core, once checked.
+    def core_lemmas(self) -> int:
+        return sum(self.core[self.num_original:])
+
+    def string(self) -> str:
+        num_lemmas = len(self.clauses) - self.num_original
+        return (f"DRAT: {'VERIFIED' if self.verified else 'NOT VERIFIED'}, {self.core_lemmas()} of {num_lemmas} "
+                f"lemmas and {sum(self.core[:self.num_original])} of {self.num_original} clauses in the core, "
+                f"{self.checks} checks in {self.elapsed:0.4f} seconds")
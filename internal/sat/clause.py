@@ -1,29 +1,40 @@
 from typing import List
-from internal.sat.symbol import Symbol
 
 class Clause:
     """
     Implements the Watched Literal Data Structure as used in Chaff.
+    A clause is a list of integer literals (see internal.sat.literal).
+    The first two literals of a clause (with at least two literals) are its watched literals.
+    Formula keeps a watch list per literal, and unit propagation swaps literals in place
+    to keep the watched literals at the front of the clause.
+    Learnt clauses also carry their LBD and activity, used to decide which ones to delete (see LearntClauseDB).
     """
-    def __init__(self, symbol_list: List[Symbol]):
-        self.symbol_list = symbol_list
+    def __init__(self, lits: List[int], learnt: bool=False):
+        self.lits = lits
+        self.learnt = learnt
+        self.lbd = 0
+        self.activity = 0.0
+
+    # Returns the (at most two) literals currently watched by this clause.
+    def get_watched(self) -> List[int]:
+        return self.lits[:2]
 
     # Allows len(clause)
     def __len__(self):
-        return self.symbol_list.__len__()
+        return self.lits.__len__()
 
     # Override this change string representation
     def __repr__(self):
-        return str(self.symbol_list)
+        return str(self.lits)
 
-    # Allow "for symbol in clause"
+    # Allow "for lit in clause"
     def __iter__(self):
-        return self.symbol_list.__iter__()
+        return self.lits.__iter__()
 
-    # Allow dict usage
+    # Allow dict usage, consistent with __eq__ even after watched literals are swapped
     def __hash__(self):
-        return hash(tuple(self.symbol_list))
+        return hash(frozenset(self.lits))
 
     def __eq__(self, other):
         # order shouldnt matter, and duplicates can be removed in a clause
-        return set(self.symbol_list) == set(other.symbol_list)
+        return set(self.lits) == set(other.lits)
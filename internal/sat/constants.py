@@ -1,3 +1,10 @@
 TRUE = True
 FALSE = False
-UNASSIGNED = None
\ No newline at end of file
+UNASSIGNED = None
+
+# Encoding of the values stored in the assignment arrays of Model.
+# The value of a literal is the value of its variable XOR its sign bit, so an unassigned
+# variable gives VAL_UNASSIGNED or VAL_UNASSIGNED ^ 1, both greater than VAL_TRUE.
+VAL_FALSE = 0
+VAL_TRUE = 1
+VAL_UNASSIGNED = 2
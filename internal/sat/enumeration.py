@@ -0,0 +1,62 @@
+from typing import Iterator, List
+from internal.sat.solver import Solver
+
+# enumeration modes, NONE solves for a single model
+ENUMERATION_MODES = ("NONE", "BLOCKING", "BACKTRACK")
+
+class ModelEnumerator:
+    """
+    Enumerates the models of a formula with the incremental interface of a Solver, projected onto a subset of
+    its variables: two models that agree on the projection are the same model. Learnt clauses are kept from one
+    model to the next. Models are yielded lazily as the TRUE literals of the projection variables.
+        - blocking: after each model, the clause of the negated projected model is added to the formula
+        - backtrack: no clause is added, the rest of the search space is split into disjoint cubes instead:
+          once a model M is found under cube C, the cubes C + M[x1..xi-1] + -M[xi] for every projection variable
+          xi after C are left to search, as assumptions
+    """
+    def __init__(self, solver: Solver, projection: List[int]=None):
+        self.solver = solver
+        self.projection = list(range(solver.formula.num_vars)) if projection is None else projection
+        self.solve_calls = 0
+
+    def blocking(self, max_models: int=0) -> Iterator[List[int]]:
+        """
+        Yields the projected models until there are none left, or max_models of them if max_models > 0.
+        """
+        count = 0
+        while max_models <= 0 or count < max_models:
+            self.solve_calls += 1
+            if not self.solver.solve():
+                return
+            model = self.projected_model()
+            count += 1
+            yield model
+            if not model or not self.solver.add_clause([lit ^ 1 for lit in model]):
+                # an empty projection has one model, or the last model was blocked at level 0
+                return
+
+    def backtrack(self, max_models: int=0) -> Iterator[List[int]]:
+        """
+        Yields the projected models until there are none left, or max_models of them if max_models > 0.
+        """
+        count = 0
+        cubes = [[]]
+        while cubes and (max_models <= 0 or count < max_models):
+            cube = cubes.pop()
+            self.solve_calls += 1
+            if not self.solver.solve(cube):
+                continue
+            model = self.projected_model()
+            count += 1
+            yield model
+            # the cube holds the first len(cube) literals of the model, the last cube pushed is searched first
+            for i in range(len(cube), len(model)):
+                cubes.append(model[:i] + [model[i] ^ 1])
+
+    # Returns the TRUE literals of the last model on the projection variables, in projection order.
+    def projected_model(self) -> List[int]:
+        variables = self.solver.formula.get_variables()
+        values = {}
+        for symbol in self.solver.sat_model:
+            values[variables.to_literal(symbol) >> 1] = symbol.is_pos
+        return [var << 1 if values[var] else var << 1 | 1 for var in self.projection]
@@ -1,29 +1,106 @@
 from typing import List
 from internal.sat.clause import Clause
+from internal.sat.constants import VAL_TRUE, VAL_FALSE
+from internal.sat.literal import VariableMap
 from internal.sat.symbols import Symbols
 
 class Formula:
     """
-    Represents a formula in CNF form.
+    Represents a formula in CNF form, over integer literals.
+    The VariableMap translates the literals back to the symbols of the input.
+    Also holds the watch lists of the two-watched-literal scheme: literal -> clauses watching that literal.
     """
-    def __init__(self, clause_list: List[Clause]):
+    def __init__(self, clause_list: List[Clause], variables: VariableMap=None):
         self.clist = clause_list
         self.learnt_clist = []
-        self.symbols = Symbols()
+        if variables is None:
+            # no names given, name variables after their 1-based ids like DIMACS
+            num_vars = max((lit >> 1 for clause in clause_list for lit in clause), default=-1) + 1
+            variables = VariableMap.from_names([str(v + 1) for v in range(num_vars)])
+        self.variables = variables
+        self.num_vars = len(variables)
+        self.symbols = Symbols(range(self.num_vars))
+        self.watches = [[] for _ in range(2 * self.num_vars)]
         for clause in clause_list:
-            for symbol in clause:
-                self.symbols.add(symbol)
+            self.watch_clause(clause)
 
-    # Returns a list of all symbols in the formula.
+    # Returns all variables in the formula.
     def get_symbols(self) -> Symbols:
         return self.symbols
 
+    # Returns the mapping between the literals and the symbols of the input.
+    def get_variables(self) -> VariableMap:
+        return self.variables
+
     # Returns all clauses, original and learnt included.
     def get_clauses_with_learnt(self) -> List[Clause]:
         return self.learnt_clist + self.clist
 
+    # Returns the clauses currently watching literal lit.
+    def get_watches(self, lit: int) -> List[Clause]:
+        return self.watches[lit]
+
+    def watch_clause(self, c: Clause):
+        """
+        Registers the first two literals of the clause as its watched literals.
+        Unit and empty clauses are not watched, they are handled at decision level 0.
+        """
+        if len(c) >= 2:
+            self.watches[c.lits[0]].append(c)
+            self.watches[c.lits[1]].append(c)
+
+    # Adds a clause to the formula, e.g. the unit clauses of a cube. Its first two literals are watched.
+    def add_clause(self, c: Clause):
+        self.clist.append(c)
+        self.watch_clause(c)
+
     def add_learnt_clause(self, c: Clause):
+        """
+        The learnt clause must have its asserting literal first, and the literal of highest decision level
+        among the remaining literals second, so that the watches are valid after backtracking.
+        """
         self.learnt_clist.append(c)
+        self.watch_clause(c)
+
+    def remove_learnt_clauses(self, clauses: List[Clause]):
+        """
+        Removes the given learnt clauses and their watches.
+        Clauses compare equal on their literals, removed clauses are identified by object identity instead.
+        """
+        removed = set(id(c) for c in clauses)
+        self.learnt_clist = [c for c in self.learnt_clist if id(c) not in removed]
+        for lit in set(lit for c in clauses for lit in c.get_watched()):
+            self.watches[lit] = [c for c in self.watches[lit] if id(c) not in removed]
+
+    def simplify(self, values: bytearray, proof=None) -> List[Clause]:
+        """
+        Removes the clauses satisfied at decision level 0 and strips the FALSE literals of the others, original
+        and learnt clauses alike, then rebuilds the watches. Only valid at decision level 0 after propagation,
+        where every other clause has at least two unassigned literals. Returns the removed clauses.
+        With a DratWriter, removed clauses are logged as deleted, stripped clauses as added then deleted.
+        """
+        removed = []
+        for clauses in (self.clist, self.learnt_clist):
+            kept = []
+            for c in clauses:
+                lits = c.lits
+                if any(values[lit >> 1] ^ (lit & 1) == VAL_TRUE for lit in lits):
+                    removed.append(c)
+                    if proof is not None:
+                        proof.delete(lits)
+                    continue
+                if any(values[lit >> 1] ^ (lit & 1) == VAL_FALSE for lit in lits):
+                    stripped = [lit for lit in lits if values[lit >> 1] ^ (lit & 1) != VAL_FALSE]
+                    if proof is not None:
+                        proof.add(stripped)
+                        proof.delete(lits)
+                    lits[:] = stripped
+                kept.append(c)
+            clauses[:] = kept
+        self.watches = [[] for _ in range(2 * self.num_vars)]
+        for c in self.get_clauses_with_learnt():
+            self.watch_clause(c)
+        return removed
 
     def __repr__(self):
-        return f"Clauses: {self.clist}\nLearnt Clauses: {self.learnt_clist}"
\ No newline at end of file
+        return f"Clauses: {self.clist}\nLearnt Clauses: {self.learnt_clist}"
@@ -0,0 +1,79 @@
+from typing import List
+from internal.sat.clause import Clause
+from internal.sat.formula import Formula
+from internal.sat.model import Model
+
+# clause activities are multiplied by 1/CLAUSE_DECAY on every conflict, like variable activities in VSIDS
+CLAUSE_DECAY = 0.999
+# rescale all clause activities once one of them exceeds this value
+CLAUSE_RESCALE_LIMIT = 1e20
+# learnt clauses with an LBD at most this value ("glue" clauses) are never deleted
+GLUE_LBD = 2
+
+class LearntClauseDB:
+    """
+    Bookkeeping of the learnt clauses of a formula, to keep their number (and the cost of propagation) bounded.
+    Every learnt clause records its LBD when learnt, and an activity bumped each time it takes part in
+    conflict analysis. The database is reduced after first_reduce conflicts, and then every time the
+    interval, growing by reduce_inc after each reduction, has elapsed: the worse half of the learnt clauses
+    (highest LBD first, then lowest activity) is deleted.
+    Clauses that are the reason of a current assignment, binary clauses and glue clauses are never deleted.
+    """
+    def __init__(self, formula: Formula, first_reduce: int=2000, reduce_inc: int=300, decay: float=CLAUSE_DECAY):
+        self.formula = formula
+        self.cla_inc = 1.0
+        self.decay_factor = decay
+        # no reduction at all if first_reduce is 0
+        self.interval = first_reduce
+        self.reduce_inc = reduce_inc
+        self.conflicts = 0
+
+    def add(self, c: Clause, lbd: int):
+        c.learnt = True
+        c.lbd = lbd
+        c.activity = self.cla_inc
+
+    def bump(self, c: Clause):
+        c.activity += self.cla_inc
+        if c.activity > CLAUSE_RESCALE_LIMIT:
+            self.rescale()
+
+    # Called once per conflict.
+    def decay(self):
+        self.cla_inc /= self.decay_factor
+        self.conflicts += 1
+
+    def rescale(self):
+        for c in self.formula.learnt_clist:
+            c.activity /= CLAUSE_RESCALE_LIMIT
+        self.cla_inc /= CLAUSE_RESCALE_LIMIT
+
+    def should_reduce(self) -> bool:
+        return 0 < self.interval <= self.conflicts
+
+    @classmethod
+    def is_locked(cls, c: Clause, m: Model) -> bool:
+        """
+        A clause is locked if it is the reason of a current assignment: the implied literal is always first.
+        """
+        return len(c) > 0 and m.reason[c.lits[0] >> 1] is c
+
+    def reduce(self, m: Model) -> List[Clause]:
+        """
+        Deletes the worse half of the learnt clauses from the formula, returns the deleted clauses.
+        """
+        learnt = sorted(self.formula.learnt_clist, key=lambda c: (-c.lbd, c.activity))
+        limit = len(learnt) // 2
+        removed = []
+        for c in learnt:
+            if len(removed) >= limit:
+                break
+            if c.lbd > GLUE_LBD and len(c) > 2 and not LearntClauseDB.is_locked(c, m):
+                removed.append(c)
+        self.formula.remove_learnt_clauses(removed)
+        self.conflicts = 0
+        self.interval += self.reduce_inc
+        return removed
+
+    def __len__(self):
+        return self.formula.learnt_clist.__len__()
@@ -0,0 +1,70 @@
+"""
+Dense integer encoding of literals used by the core of the solver.
+Variables are numbered 0..n-1, the literal of variable v is 2*v + sign, where sign is 0 for
+the positive literal and 1 for the negative one.
+    v = 3   ---> 6 (positive), 7 (negative)
+Negation is an XOR with 1, and the variable of a literal is a right shift by 1.
+Hot loops inline these operations, the functions below exist for readability elsewhere.
+"""
+from typing import List, Dict
+from internal.sat.symbol import Symbol
+
+
+def to_literal(var: int, is_pos: bool) -> int:
+    return (var << 1) | (not is_pos)
+
+def negate(lit: int) -> int:
+    return lit ^ 1
+
+def var_of(lit: int) -> int:
+    return lit >> 1
+
+def is_positive(lit: int) -> bool:
+    return not lit & 1
+
+# Returns the positive literal of the same variable. to_positive(7) --> 6
+def to_positive(lit: int) -> int:
+    return lit & ~1
+
+class VariableMap:
+    """
+    Maps the names of the symbols of a formula (e.g. DIMACS variables) to dense variable ids, in order of appearance.
+    Symbols are only used at the boundary of the solver (parsing, output), the core works on integer literals.
+    """
+    @classmethod
+    def from_names(cls, names: List[str]) -> 'VariableMap':
+        vm = VariableMap()
+        for name in names:
+            vm.add(name)
+        return vm
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    # Returns the id of the variable, adding it if it was not seen before.
+    def add(self, name: str) -> int:
+        var = self.ids.get(name)
+        if var is None:
+            var = len(self.names)
+            self.ids[name] = var
+            self.names.append(name)
+        return var
+
+    def to_literal(self, s: Symbol) -> int:
+        return to_literal(self.add(s.literal), s.is_pos)
+
+    def to_symbol(self, lit: int) -> Symbol:
+        return Symbol(self.names[lit >> 1], not lit & 1)
+
+    def to_symbols(self, lits: List[int]) -> List[Symbol]:
+        return [self.to_symbol(lit) for lit in lits]
+
+    def get_ids(self) -> Dict[str, int]:
+        return self.ids
+
+    def __len__(self):
+        return self.names.__len__()
+
+    def __repr__(self):
+        return self.ids.__repr__()
@@ -0,0 +1,114 @@
+from typing import List
+from internal.sat.clause import Clause
+from internal.sat.constants import VAL_TRUE
+from internal.sat.model import Model
+
+class LiteralScores:
+    """
+    Incrementally maintained literal scores over the unresolved (not yet satisfied) clauses of a formula,
+    used by the DLIS, RDLIS, JWOS, JWTS, MOMS and 3CH branching heuristics.
+    For every literal l:
+        count[l]    number of unresolved clauses containing l
+        jw[l]       Jeroslow-Wang weight, sum of 2^-|w| over the unresolved clauses w containing l
+        moms[l]     number of unresolved clauses of minimum size containing l
+    Each tracked clause keeps the number of its TRUE literals. When a literal is made TRUE (or unassigned),
+    only the clauses in its occurrence list are visited, and a clause adds or removes its contribution
+    to the scores when it becomes unsatisfied or satisfied.
+    """
+    def __init__(self, clauses: List[Clause], num_vars: int, model: Model):
+        self.model = model
+        self.count = [0] * (2 * num_vars)
+        self.jw = [0.0] * (2 * num_vars)
+        self.moms = [0] * (2 * num_vars)
+        # tracked clauses, and literal -> indices of the tracked clauses containing it
+        self.clauses = []
+        self.true_count = []
+        self.occurrences = [[] for _ in range(2 * num_vars)]
+        self.min_len = min((len(c) for c in clauses), default=0)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, c: Clause):
+        """
+        Tracks a new clause (e.g. a learnt clause), adding its contribution if it is currently unsatisfied.
+        """
+        if len(c) < self.min_len:
+            # the minimum clause size changed, MOMS scores have to be recomputed from scratch
+            self.min_len = len(c)
+            self.moms = [0] * len(self.moms)
+            for cj, clause in enumerate(self.clauses):
+                if self.true_count[cj] == 0 and len(clause) == self.min_len:
+                    for lit in clause:
+                        self.moms[lit] += 1
+        ci = len(self.clauses)
+        self.clauses.append(c)
+        values = self.model.values
+        self.true_count.append(sum(1 for lit in c if values[lit >> 1] ^ (lit & 1) == VAL_TRUE))
+        for lit in c:
+            self.occurrences[lit].append(ci)
+        if self.true_count[ci] == 0:
+            self.update_scores(c, 1)
+
+    def remove_clauses(self, clauses: List[Clause]):
+        """
+        Stops tracking the given clauses (e.g. deleted learnt clauses), identified by object identity.
+        The occurrence lists hold clause indices, they are rebuilt over the remaining clauses.
+        """
+        removed = set(id(c) for c in clauses)
+        kept, kept_true_count = [], []
+        for ci, clause in enumerate(self.clauses):
+            if id(clause) not in removed:
+                kept.append(clause)
+                kept_true_count.append(self.true_count[ci])
+            elif self.true_count[ci] == 0:
+                self.update_scores(clause, -1)
+        self.clauses, self.true_count = kept, kept_true_count
+        self.occurrences = [[] for _ in range(len(self.occurrences))]
+        for ci, clause in enumerate(kept):
+            for lit in clause:
+                self.occurrences[lit].append(ci)
+
+    def update_scores(self, c: Clause, sign: int):
+        """
+        Adds (sign = 1) or removes (sign = -1) the contribution of clause c to the scores.
+        """
+        count, jw, moms = self.count, self.jw, self.moms
+        weight = sign * pow(2, -len(c))
+        is_min = len(c) == self.min_len
+        for lit in c:
+            count[lit] += sign
+            jw[lit] += weight
+            if is_min:
+                moms[lit] += sign
+
+    def on_assign(self, lit: int):
+        """
+        lit was made TRUE: the clauses containing it are satisfied.
+        """
+        true_count = self.true_count
+        for ci in self.occurrences[lit]:
+            true_count[ci] += 1
+            if true_count[ci] == 1:
+                self.update_scores(self.clauses[ci], -1)
+
+    def on_unassign(self, lit: int):
+        """
+        lit, previously TRUE, was unassigned: the clauses containing it may be unresolved again.
+        """
+        true_count = self.true_count
+        for ci in self.occurrences[lit]:
+            true_count[ci] -= 1
+            if true_count[ci] == 0:
+                self.update_scores(self.clauses[ci], 1)
+
+    # Returns the Jeroslow-Wang weight of a variable, both polarities included.
+    def jw_var(self, var: int) -> float:
+        return self.jw[var << 1] + self.jw[var << 1 | 1]
+
+    # Returns the number of unresolved clauses a variable occurs in, both polarities included.
+    def count_var(self, var: int) -> int:
+        return self.count[var << 1] + self.count[var << 1 | 1]
+
+    # Returns the number of unresolved clauses of minimum size a variable occurs in.
+    def moms_var(self, var: int) -> int:
+        return self.moms[var << 1] + self.moms[var << 1 | 1]
@@ -0,0 +1,84 @@
+from heapq import nlargest
+from typing import List
+from internal.sat.constants import TRUE
+from internal.sat.formula import Formula
+from internal.sat.literal_scores import LiteralScores
+from internal.sat.model import Model
+from internal.sat.solver import Solver
+from internal.sat.state_manager import StateManager
+from internal.sat.symbols import Symbols
+
+# number of variables of highest Jeroslow-Wang weight evaluated by lookahead at each split
+LOOKAHEAD_CANDIDATES = 8
+
+class Lookahead:
+    """
+    Splits a formula into cubes for cube-and-conquer: conjunctions of literals which together cover every
+    assignment of the formula, minus the ones refuted by unit propagation.
+    At each split, the LOOKAHEAD_CANDIDATES unassigned variables of highest two-sided Jeroslow-Wang weight
+    (see JWTS) are propagated in both polarities, and the variable whose branches assign the most variables
+    (product of both counts) is picked. A polarity whose propagation conflicts is a failed literal: the
+    variable is picked at once, the failed branch counts as refuted and is not split further.
+    """
+    def __init__(self, formula: Formula):
+        self.formula = formula
+        model = Model(formula.num_vars)
+        self.state = StateManager(Symbols(range(formula.num_vars)), model)
+        self.state.set_scores(LiteralScores(formula.get_clauses_with_learnt(), formula.num_vars, model))
+        # number of cubes found unsatisfiable during the split
+        self.refuted = 0
+
+    def cubes(self, depth: int) -> List[List[int]]:
+        """
+        Returns the cubes, of at most depth literals. No cubes means the formula is unsatisfiable.
+        """
+        f, state = self.formula, self.state
+        if not Solver.assign_unit_clauses(f, state) or Solver.unit_propagate(f, state, 0) is not None:
+            self.refuted += 1
+            return []
+        cubes = []
+        self.split([], depth, cubes)
+        return cubes
+
+    def split(self, cube: List[int], depth: int, cubes: List[List[int]]):
+        dl = len(cube)
+        if dl == depth or Solver.all_variables_assigned(self.formula, self.state.get_model()):
+            cubes.append(cube)
+            return
+        var = self.pick_variable(dl)
+        for lit in (var << 1, var << 1 | 1):
+            if self.propagate(lit, dl + 1) < 0:
+                self.refuted += 1
+            else:
+                self.split(cube + [lit], depth, cubes)
+            Solver.backtrack(self.state, dl, dl + 1)
+
+    def pick_variable(self, dl: int) -> int:
+        scores = self.state.get_scores()
+        candidates = nlargest(LOOKAHEAD_CANDIDATES, self.state.unassigned_symbols, key=scores.jw_var)
+        best, best_score = candidates[0], -1
+        for var in candidates:
+            positive = self.probe(var << 1, dl)
+            negative = self.probe(var << 1 | 1, dl)
+            if positive < 0 or negative < 0:
+                return var
+            if (positive + 1) * (negative + 1) > best_score:
+                best, best_score = var, (positive + 1) * (negative + 1)
+        return best
+
+    def propagate(self, lit: int, dl: int) -> int:
+        """
+        Assigns lit at decision level dl and propagates it.
+        Returns the number of literals assigned, or -1 if propagation found a conflict.
+        """
+        before = len(self.state.trail)
+        self.state.assign(lit, TRUE, None, dl)
+        if Solver.unit_propagate(self.formula, self.state, dl) is not None:
+            return -1
+        return len(self.state.trail) - before
+
+    # Returns the number of literals assigned by propagating lit, or -1 on conflict, and undoes it.
+    def probe(self, lit: int, dl: int) -> int:
+        assigned = self.propagate(lit, dl + 1)
+        Solver.backtrack(self.state, dl, dl + 1)
+        return assigned
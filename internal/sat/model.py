@@ -1,80 +1,102 @@
-from typing import List, Dict, Set
-from internal.sat.constants import UNASSIGNED, TRUE, FALSE
+from array import array
+from typing import List, Dict, Iterable
+from internal.sat.constants import UNASSIGNED, TRUE, FALSE, VAL_TRUE, VAL_FALSE, VAL_UNASSIGNED
 from internal.sat.formula import Formula
-from internal.sat.symbol import Symbol
 from internal.sat.clause import Clause
+from internal.sat.symbols import Symbols
 from internal.utils.logger import Logger
 
 logger = Logger.get_logger()
 
 class Model:
     """
-    A Model represents a mapping of symbols in a formula to its truth assignment {True, False}.
-    Models should always have a key for every symbol in a formula, postive and negative.
+    A Model represents the truth assignment {True, False} of the variables in a formula.
+    Assignments are stored per variable in compact arrays indexed by variable id:
+    values (VAL_TRUE/VAL_FALSE/VAL_UNASSIGNED), the decision level and the reason (antecedent clause).
+    Literals are evaluated as values[lit >> 1] ^ (lit & 1), see internal.sat.constants.
     """
 
     @classmethod
-    def from_mapping(cls, mapping: Dict[Symbol, bool]):
-        return Model(mapping)
+    def from_mapping(cls, mapping: Dict[int, bool]):
+        """
+        Builds a model from a mapping of literals to their truth assignment, UNASSIGNED literals are skipped.
+        """
+        m = Model(max((lit >> 1 for lit in mapping), default=-1) + 1)
+        for lit, val in mapping.items():
+            if val is not UNASSIGNED:
+                m.extend(lit, val)
+        return m
 
     @classmethod
-    def from_symbols(cls, symbols: List[Symbol]) -> 'Model':
-        mapping = {}
-        for s in symbols:
-            mapping[s] = UNASSIGNED
-            mapping[s.negate()] = UNASSIGNED
-        return Model(mapping)
-
-    def __init__(self, mapping: Dict[Symbol, bool]):
-        self.mapping = mapping
-
-    def extend(self, s: Symbol, val: bool):
-        assert s in self.mapping
-        assert s.negate() in self.mapping
-        self.mapping[s] = val
-        self.mapping[s.negate()] = not val
+    def from_symbols(cls, symbols: Symbols) -> 'Model':
+        return Model(max(symbols, default=-1) + 1)
+
+    def __init__(self, num_vars: int):
+        self.values = bytearray([VAL_UNASSIGNED]) * num_vars
+        self.level = array('i', [-1]) * num_vars
+        self.reason = [None] * num_vars
+        self.num_assigned = 0
+
+    def extend(self, lit: int, val: bool, dl: int=0, reason: Clause=None):
+        var = lit >> 1
+        if self.values[var] == VAL_UNASSIGNED:
+            self.num_assigned += 1
+        # value of the variable: value of the literal, flipped for a negative literal
+        self.values[var] = (VAL_TRUE if val else VAL_FALSE) ^ (lit & 1)
+        self.level[var] = dl
+        self.reason[var] = reason
+
+    def unassign(self, var: int):
+        if self.values[var] != VAL_UNASSIGNED:
+            self.num_assigned -= 1
+        self.values[var] = VAL_UNASSIGNED
+        self.level[var] = -1
+        self.reason[var] = None
 
     def get_clause_status(self, c: Clause) -> bool:
         """
-        Returns TRUE if at least one symbol maps to TRUE
-                FALSE if all symbols map to FALSE
-                UNASSIGNED if no symbols are TRUE and at least one symbol is UNASSIGNED
+        Returns TRUE if at least one literal maps to TRUE
+                FALSE if all literals map to FALSE
+                UNASSIGNED if no literals are TRUE and at least one literal is UNASSIGNED
         """
-        s = set(map(lambda symbol: self.mapping[symbol], c))
-        if TRUE in s:
-            return TRUE
-        elif UNASSIGNED not in s:
-            return FALSE
-        else:
-            return UNASSIGNED
-
-    def is_unit_clause(self, c: Clause) -> (bool, Symbol):
+        values = self.values
+        status = FALSE
+        for lit in c:
+            val = values[lit >> 1] ^ (lit & 1)
+            if val == VAL_TRUE:
+                return TRUE
+            elif val != VAL_FALSE:
+                status = UNASSIGNED
+        return status
+
+    def is_unit_clause(self, c: Clause) -> (bool, int):
         """
         Returns True if all literals but one is assigned to FALSE, with one literal UNASSIGNED.
-        Also returns the unassigned symbol, if any.
+        Also returns the unassigned literal, if any.
         """
-        l = list(map(lambda symbol: self.mapping[symbol], c))
+        l = list(map(lambda lit: self[lit], c))
         if l.count(FALSE) == len(c)-1 and l.count(UNASSIGNED) == 1:
             s = None
-            for sbl in c:
-                if self.mapping[sbl] == UNASSIGNED:
-                    s = sbl
+            for lit in c:
+                if self[lit] == UNASSIGNED:
+                    s = lit
             return True, s
         return False, None
 
-    def revert_model(self, to_keep: Set[Symbol]):
-        logger.trace(f"Before model revert {self.shorten()}")
-        logger.trace(f"Keeping {to_keep}")
-        for key in self.mapping.keys():
-            if key.to_positive() in to_keep:
-                continue
-            self.mapping[key] = UNASSIGNED
-            self.mapping[key.negate()] = UNASSIGNED
-        logger.trace(f"After model revert {self.shorten()}")
-
-    # Returns a shortened version of the model (only true symbols)
+    def revert_model(self, variables: Iterable[int]):
+        """
+        Unassigns the given variables, the rest of the model is untouched.
+        """
+        for var in variables:
+            self.unassign(var)
+
+    # Returns the literals assigned TRUE.
+    def get_true_literals(self) -> List[int]:
+        return [var << 1 | (val ^ VAL_TRUE) for var, val in enumerate(self.values) if val != VAL_UNASSIGNED]
+
+    # Returns a shortened version of the model (only true literals)
     def shorten(self) -> str:
-        return str([s for s in self.mapping.keys() if self.mapping[s] is True])
+        return str(self.get_true_literals())
 
     def get_formula_status(self, f: Formula) -> bool:
         for clause in f.get_clauses_with_learnt():
@@ -85,15 +107,23 @@ class Model:
         return TRUE
 
 
-    # Implement evaluation of self[key].
+    # Implement evaluation of self[lit].
     def __getitem__(self, item):
-        # A model should start with every possible symbol
-        assert item in self.mapping
+        # A model should start with every possible variable
+        assert item >> 1 < len(self.values)
+
+        val = self.values[item >> 1] ^ (item & 1)
+        if val == VAL_TRUE:
+            return TRUE
+        elif val == VAL_FALSE:
+            return FALSE
+        return UNASSIGNED
 
-        return self.mapping[item]
+    def __len__(self):
+        return self.values.__len__()
 
     def __eq__(self, other):
-        return self.mapping == other.mapping
+        return self.values == other.values
 
     def __repr__(self):
-        return self.mapping.__repr__()
\ No newline at end of file
+        return self.shorten()
@@ -0,0 +1,60 @@
+from internal.sat.constants import VAL_TRUE, VAL_UNASSIGNED
+from internal.utils.exceptions import ArgumentFormatError
+
+# phase selection modes
+PHASE_MODES = ("NONE", "SAVE", "TARGET", "BEST")
+
+class Phases:
+    """
+    Polarity memory for branching, the heuristic still picks the variable.
+        saved   the last value of each variable, recorded when it is unassigned on backtrack (phase saving)
+        target  the assignment of the largest conflict-free trail since the last restart
+        best    the assignment of the largest conflict-free trail since the start of the search
+    SAVE branches on the saved phase, TARGET on the target phase (saved phase for variables it does not assign).
+    BEST also branches on the saved phase, but overwrites it with the best phase on every restart (rephasing).
+    Variables without any recorded phase keep the polarity given by the heuristic.
+    """
+    def __init__(self, num_vars: int, mode: str):
+        if mode not in PHASE_MODES:
+            raise ArgumentFormatError(f"{mode} is not a valid phase mode")
+        self.mode = mode
+        self.saved = bytearray([VAL_UNASSIGNED]) * num_vars
+        self.target = bytearray([VAL_UNASSIGNED]) * num_vars
+        self.target_size = 0
+        self.best = bytearray([VAL_UNASSIGNED]) * num_vars
+        self.best_size = 0
+
+    def save(self, var: int, value: int):
+        self.saved[var] = value
+
+    def on_decision(self, values: bytearray, trail_size: int):
+        """
+        Called before each decision: the current trail has been propagated without conflict.
+        """
+        if self.mode == "TARGET" and trail_size > self.target_size:
+            self.target[:] = values
+            self.target_size = trail_size
+        elif self.mode == "BEST" and trail_size > self.best_size:
+            self.best[:] = values
+            self.best_size = trail_size
+
+    def on_restart(self):
+        if self.mode == "TARGET":
+            self.target_size = 0
+        elif self.mode == "BEST":
+            saved, best = self.saved, self.best
+            for var, value in enumerate(best):
+                if value != VAL_UNASSIGNED:
+                    saved[var] = value
+
+    def pick_phase(self, lit: int, val: bool) -> (int, bool):
+        """
+        Returns the literal and value to branch on for the variable of lit, picked by the heuristic with value val.
+        """
+        var = lit >> 1
+        value = self.target[var] if self.mode == "TARGET" else VAL_UNASSIGNED
+        if value == VAL_UNASSIGNED:
+            value = self.saved[var]
+        if value == VAL_UNASSIGNED:
+            return lit, val
+        return var << 1, value == VAL_TRUE
@@ -0,0 +1,411 @@
+import time
+from heapq import heapify, heappop
+from typing import List
+from internal.sat.clause import Clause
+from internal.sat.constants import TRUE, VAL_TRUE, VAL_FALSE, VAL_UNASSIGNED
+from internal.sat.formula import Formula
+from internal.sat.model import Model
+
+# a variable is not eliminated if a resolvent would be longer than this
+RESOLVENT_LIMIT = 20
+# nor if it occurs in more clauses than this, the number of resolutions grows with the product of its occurrences
+ELIM_OCC_LIMIT = 40
+# probing stops after propagating this many literals per literal of the formula
+PROBE_PROPAGATION_FACTOR = 10
+# or after this many seconds
+PROBE_TIME_LIMIT = 1.0
+
+class Preprocessor:
+    """
+    SatELite-style simplification of a formula before solving (Een and Biere, 2005), over occurrence lists:
+        - unit propagation at level 0, satisfied clauses are removed and false literals stripped
+        - backward subsumption: a clause C removes every clause D containing it
+        - self-subsuming resolution: if C = C' v l and D contains C' v -l, -l is removed from D
+        - bounded variable elimination: the clauses of x are replaced by all their non tautological resolvents
+          on x, if there are no more of them than the clauses they replace
+    With probe, before elimination:
+        - equivalent literal substitution: the literals of a strongly connected component of the binary
+          implication graph (a v b gives -a -> b and -b -> a) are equivalent, and replaced by one of them
+        - failed literal probing: a literal whose propagation conflicts is FALSE, a literal implied by
+          both polarities of a variable is TRUE. Probing stops when its budget of propagations or time is spent
+    The clauses removed by elimination, and the equivalences, are kept on a stack to extend the model of the
+    simplified formula to the removed variables, see extend_model. The simplified formula keeps the variables
+    of the input.
+    """
+    def __init__(self, formula: Formula, probe: bool=False):
+        self.formula = formula
+        self.probe = probe
+        num_vars = formula.num_vars
+        # clause id -> literals (None once removed), literal set and signature for the subset tests
+        self.clauses = []
+        self.sets = []
+        self.sigs = []
+        # literal -> ids of the clauses containing it, removed clauses and literals are dropped lazily
+        self.occ = [[] for _ in range(2 * num_vars)]
+        # literal -> number of live clauses containing it
+        self.num_occ = [0] * (2 * num_vars)
+        self.values = bytearray([VAL_UNASSIGNED]) * num_vars
+        self.eliminated = bytearray(num_vars)
+        # (pivot literal, literals of a clause removed by eliminating the variable of the pivot), in removal order
+        self.stack = []
+        # clauses to check for subsumption and self-subsumption, and literals to propagate
+        self.queue = []
+        self.units = []
+        self.unsat = False
+        # report
+        self.removed_clauses = 0
+        self.eliminated_vars = 0
+        self.subsumed = 0
+        self.strengthened = 0
+        self.substituted = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self.num_clauses = len(formula.clist)
+        for clause in formula.clist:
+            self.add(list(dict.fromkeys(clause.lits)))
+
+    def simplify(self) -> Formula:
+        """
+        Returns the simplified formula, with an empty clause if the formula was found unsatisfiable.
+        """
+        start = time.perf_counter()
+        if self.propagate() and self.subsume():
+            if not self.probe or self.substitute() and self.probe_literals():
+                self.eliminate()
+        formula = Formula([Clause([]) if self.unsat else Clause(list(lits)) for lits in self.result()],
+                          self.formula.get_variables())
+        self.removed_clauses = self.num_clauses - len(formula.clist)
+        self.elapsed = time.perf_counter() - start
+        return formula
+
+    def result(self) -> List[List[int]]:
+        if self.unsat:
+            return [[]]
+        # level 0 assignments are kept as unit clauses, the solver has to make them too
+        units = [[var << 1 | (val ^ VAL_TRUE)] for var, val in enumerate(self.values) if val != VAL_UNASSIGNED]
+        return units + [lits for lits in self.clauses if lits is not None]
+
+    def extend_model(self, m: Model):
+        """
+        Gives the eliminated variables the values satisfying the clauses removed with them, latest first.
+        """
+        values = m.values
+        for pivot, lits in reversed(self.stack):
+            if not any(values[lit >> 1] ^ (lit & 1) == VAL_TRUE for lit in lits):
+                m.extend(pivot, True, m.level[pivot >> 1], m.reason[pivot >> 1])
+
+    def add(self, lits: List[int]) -> int:
+        if any(lit ^ 1 in lits for lit in lits):
+            # tautology
+            return -1
+        i = len(self.clauses)
+        self.clauses.append(lits)
+        self.sets.append(set(lits))
+        self.sigs.append(self.signature(lits))
+        for lit in lits:
+            self.occ[lit].append(i)
+            self.num_occ[lit] += 1
+        self.queue.append(i)
+        if len(lits) <= 1:
+            self.units.append(i)
+        return i
+
+    def remove(self, i: int):
+        for lit in self.clauses[i]:
+            self.num_occ[lit] -= 1
+        self.clauses[i] = None
+        self.sets[i] = None
+
+    def strengthen(self, i: int, lit: int):
+        self.clauses[i].remove(lit)
+        self.sets[i].discard(lit)
+        self.sigs[i] = self.signature(self.clauses[i])
+        self.num_occ[lit] -= 1
+        self.strengthened += 1
+        self.queue.append(i)
+        if len(self.clauses[i]) <= 1:
+            self.units.append(i)
+
+    # Returns the live clauses containing lit.
+    def occurrences(self, lit: int) -> List[int]:
+        sets = self.sets
+        live = [i for i in self.occ[lit] if sets[i] is not None and lit in sets[i]]
+        self.occ[lit] = live
+        return live
+
+    def propagate(self) -> bool:
+        """
+        Assigns the literals of unit clauses, removes the satisfied clauses and strips the false literals.
+        Returns False if the formula is unsatisfiable.
+        """
+        values = self.values
+        while self.units:
+            i = self.units.pop()
+            lits = self.clauses[i]
+            if lits is None or len(lits) > 1:
+                continue
+            if not lits:
+                self.unsat = True
+                return False
+            lit = lits[0]
+            val = values[lit >> 1] ^ (lit & 1)
+            if val == VAL_TRUE:
+                self.remove(i)
+                continue
+            elif val == VAL_FALSE:
+                self.unsat = True
+                return False
+            values[lit >> 1] = VAL_TRUE ^ (lit & 1)
+            for j in self.occurrences(lit):
+                self.remove(j)
+            for j in self.occurrences(lit ^ 1):
+                self.strengthen(j, lit ^ 1)
+        return True
+
+    def subsume(self) -> bool:
+        """
+        Runs backward subsumption and self-subsuming resolution with every queued clause.
+        Returns False if the formula is unsatisfiable.
+        """
+        while self.queue:
+            i = self.queue.pop()
+            lits = self.clauses[i]
+            if not lits:
+                continue
+            # every clause subsumed or strengthened by this one contains its literal of fewest occurrences
+            best = min(lits, key=lambda lit: self.num_occ[lit] + self.num_occ[lit ^ 1])
+            for j in self.occurrences(best) + self.occurrences(best ^ 1):
+                if j == i or self.clauses[j] is None or self.clauses[i] is None:
+                    continue
+                lit = self.subset(i, j)
+                if lit is None:
+                    continue
+                elif lit < 0:
+                    self.remove(j)
+                    self.subsumed += 1
+                else:
+                    self.strengthen(j, lit)
+            if self.units and not self.propagate():
+                return False
+        return True
+
+    def subset(self, i: int, j: int) -> int:
+        """
+        Returns -1 if clause i subsumes clause j, the literal to remove from clause j if clause i strengthens it
+        by self-subsuming resolution, None otherwise.
+        """
+        c, d = self.clauses[i], self.sets[j]
+        if len(c) > len(d) or self.sigs[i] & ~self.sigs[j]:
+            return None
+        flip = -1
+        for lit in c:
+            if lit in d:
+                continue
+            elif flip < 0 and lit ^ 1 in d:
+                flip = lit ^ 1
+            else:
+                return None
+        return flip
+
+    def eliminate(self):
+        """
+        Bounded variable elimination, variables of fewest occurrences first.
+        """
+        num_occ = self.num_occ
+        order = [(num_occ[v << 1] + num_occ[v << 1 | 1], v) for v in range(self.formula.num_vars)
+                 if self.values[v] == VAL_UNASSIGNED]
+        heapify(order)
+        while order and not self.unsat:
+            _, var = heappop(order)
+            if self.values[var] != VAL_UNASSIGNED or not self.try_eliminate(var):
+                continue
+            if not self.subsume():
+                return
+
+    def try_eliminate(self, var: int) -> bool:
+        pos, neg = self.occurrences(var << 1), self.occurrences(var << 1 | 1)
+        if not pos and not neg or len(pos) + len(neg) > ELIM_OCC_LIMIT:
+            return False
+        resolvents = []
+        for i in pos:
+            for j in neg:
+                resolvent = self.resolve(i, j, var)
+                if resolvent is None:
+                    continue
+                if len(resolvent) > RESOLVENT_LIMIT or len(resolvents) == len(pos) + len(neg):
+                    return False
+                resolvents.append(resolvent)
+
+        for i, pivot in [(i, var << 1) for i in pos] + [(j, var << 1 | 1) for j in neg]:
+            self.stack.append((pivot, self.clauses[i]))
+            self.remove(i)
+        self.eliminated[var] = 1
+        self.eliminated_vars += 1
+        for resolvent in resolvents:
+            self.add(resolvent)
+        return self.propagate()
+
+    def substitute(self) -> bool:
+        """
+        Replaces every literal by the representative of its strongly connected component in the binary
+        implication graph, the literal of smallest variable. Returns False if the formula is unsatisfiable.
+        """
+        num_lits = 2 * self.formula.num_vars
+        edges = [[] for _ in range(num_lits)]
+        for lits in self.clauses:
+            if lits is not None and len(lits) == 2:
+                edges[lits[0] ^ 1].append(lits[1])
+                edges[lits[1] ^ 1].append(lits[0])
+
+        rep = list(range(num_lits))
+        for component in self.components(edges):
+            if len(component) == 1:
+                continue
+            root = min(component, key=lambda lit: lit >> 1)
+            if root ^ 1 in component:
+                # x and -x are equivalent
+                self.unsat = True
+                return False
+            for lit in component:
+                rep[lit] = root
+
+        for var in range(self.formula.num_vars):
+            lit = var << 1
+            if rep[lit] == lit:
+                continue
+            root = rep[lit]
+            # lit takes the value of root: it is the pivot of lit v -root and -lit v root
+            self.stack.append((lit, [lit, root ^ 1]))
+            self.stack.append((lit ^ 1, [lit ^ 1, root]))
+            self.eliminated[var] = 1
+            self.substituted += 1
+            for i in self.occurrences(lit) + self.occurrences(lit ^ 1):
+                if self.clauses[i] is None:
+                    continue
+                lits = list(dict.fromkeys(rep[l] for l in self.clauses[i]))
+                self.remove(i)
+                self.add(lits)
+        return self.propagate() and self.subsume()
+
+    @classmethod
+    def components(cls, edges: List[List[int]]) -> List[List[int]]:
+        """
+        Returns the strongly connected components of a graph given by its adjacency lists (Tarjan, iteratively).
+        """
+        index = [-1] * len(edges)
+        low = [0] * len(edges)
+        on_stack = bytearray(len(edges))
+        stack, components = [], []
+        counter = 0
+        for start in range(len(edges)):
+            if index[start] >= 0:
+                continue
+            # (node, position of the next edge to visit)
+            work = [(start, 0)]
+            while work:
+                node, pos = work.pop()
+                if pos == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = 1
+                for k in range(pos, len(edges[node])):
+                    succ = edges[node][k]
+                    if index[succ] < 0:
+                        work.append((node, k + 1))
+                        work.append((succ, 0))
+                        break
+                    elif on_stack[succ]:
+                        low[node] = min(low[node], index[succ])
+                else:
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            lit = stack.pop()
+                            on_stack[lit] = 0
+                            component.append(lit)
+                            if lit == node:
+                                break
+                        components.append(component)
+        return components
+
+    def probe_literals(self) -> bool:
+        """
+        Failed literal probing with the propagation of the solver, within the budget.
+        Returns False if the formula is unsatisfiable.
+        """
+        # imported here, the solver imports the preprocessor
+        from internal.sat.lookahead import Lookahead
+        from internal.sat.solver import Solver
+        clauses = [Clause(list(lits)) for lits in self.clauses if lits is not None and len(lits) > 1]
+        lookahead = Lookahead(Formula(clauses, self.formula.get_variables()))
+        state = lookahead.state
+        values = state.get_model().values
+        budget = PROBE_PROPAGATION_FACTOR * sum(len(c) for c in clauses)
+        deadline = time.perf_counter() + PROBE_TIME_LIMIT
+        units = []
+
+        # variables in binary clauses first, their propagation is the cheapest and the most likely to fail
+        num_occ = self.num_occ
+        candidates = sorted((v for v in range(self.formula.num_vars) if self.values[v] == VAL_UNASSIGNED
+                             and not self.eliminated[v]), key=lambda v: -(num_occ[v << 1] + num_occ[v << 1 | 1]))
+        for var in candidates:
+            if budget <= 0 or time.perf_counter() > deadline:
+                break
+            if values[var] != VAL_UNASSIGNED:
+                continue
+            implied = []
+            for lit in (var << 1, var << 1 | 1):
+                start = len(state.trail)
+                assigned = lookahead.propagate(lit, 1)
+                implied.append(set(state.trail[start + 1:]))
+                Solver.backtrack(state, 0, 1)
+                budget -= max(assigned, 1)
+                if assigned < 0:
+                    units.append(lit ^ 1)
+                    self.failed += 1
+                    break
+            else:
+                # literals implied by both polarities
+                units.extend(implied[0] & implied[1])
+            # units are kept at level 0 for the next probes
+            while units:
+                lit = units.pop()
+                self.add([lit])
+                if values[lit >> 1] == VAL_UNASSIGNED:
+                    state.assign(lit, TRUE, None, 0)
+                    if Solver.unit_propagate(lookahead.formula, state, 0) is not None:
+                        self.unsat = True
+                        return False
+        return self.propagate() and self.subsume()
+
+    # Returns the resolvent of clauses i and j on var, None if it is a tautology.
+    def resolve(self, i: int, j: int, var: int) -> List[int]:
+        resolvent = [lit for lit in self.clauses[i] if lit >> 1 != var]
+        c = self.sets[i]
+        for lit in self.clauses[j]:
+            if lit >> 1 == var or lit in c:
+                continue
+            if lit ^ 1 in c:
+                return None
+            resolvent.append(lit)
+        return resolvent
+
+    # Returns a 64 bit abstraction of the variables of a clause: if c is a subset of d, sig(c) & ~sig(d) == 0.
+    @classmethod
+    def signature(cls, lits: List[int]) -> int:
+        sig = 0
+        for lit in lits:
+            sig |= 1 << ((lit >> 1) & 63)
+        return sig
+
+    def string(self) -> str:
+        s = (f"PREPROCESS: {self.removed_clauses} of {self.num_clauses} clauses removed "
+             f"({self.subsumed} subsumed, {self.strengthened} strengthened), "
+             f"{self.eliminated_vars} variables eliminated")
+        if self.probe:
+            s += f", {self.substituted} substituted by equivalent literals, {self.failed} failed literals"
+        return s + f" in {self.elapsed:0.4f} seconds"
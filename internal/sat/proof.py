@@ -0,0 +1,79 @@
+from typing import List
+from internal.sat.literal import VariableMap
+from internal.utils.parser import OPENERS
+
+# the proof is written to the file once this many bytes are buffered
+BUFFER_SIZE = 1 << 20
+
+class DratWriter:
+    """
+    Writes a DRAT proof of unsatisfiability: the clauses added (learnt) and deleted by the solver, in order,
+    ending with the empty clause. Literals are written with the DIMACS variables of the input.
+    Text format: "l1 l2 0" for an addition, "d l1 l2 0" for a deletion.
+    Binary format: "a" or "d", then each literal as 2 * variable (+ 1 if negative) in 7-bit little endian
+    groups, the high bit set on all groups but the last, then a 0 byte.
+    The encoding of each literal is computed once, and the proof is buffered in memory and written in large
+    blocks, compressed if the file name ends with .gz, .xz or .bz2.
+    """
+    def __init__(self, filepath: str, variables: VariableMap, binary: bool=False, buffer_size: int=BUFFER_SIZE):
+        opener = next((o for ext, o in OPENERS.items() if filepath.endswith(ext)), open)
+        self.file = opener(filepath, "wb")
+        self.binary = binary
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.added = 0
+        self.deleted = 0
+        # literal -> its encoding
+        self.encoding = []
+        for dimacs in self.numbering(variables.names):
+            if binary:
+                self.encoding += [self.varint(2 * dimacs), self.varint(2 * dimacs + 1)]
+            else:
+                self.encoding += [b"%d " % dimacs, b"-%d " % dimacs]
+
+    def add(self, lits: List[int]):
+        self.added += 1
+        self.write(b"a" if self.binary else b"", lits)
+
+    def delete(self, lits: List[int]):
+        self.deleted += 1
+        self.write(b"d" if self.binary else b"d ", lits)
+
+    def write(self, prefix: bytes, lits: List[int]):
+        buffer = self.buffer
+        buffer += prefix
+        buffer += b"".join([self.encoding[lit] for lit in lits])
+        buffer += b"\0" if self.binary else b"0\n"
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    # Returns the DIMACS variable of each name: its integer, or for names that are not DIMACS integers (or repeat
+    # the integer of another name, e.g. "07" and "7"), the next integer above all of them, in order of appearance.
+    @classmethod
+    def numbering(cls, names: List[str]) -> List[int]:
+        numbers = [int(name) if name.isdigit() else 0 for name in names]
+        top = max(numbers, default=0)
+        used = set()
+        for i, n in enumerate(numbers):
+            if n == 0 or n in used:
+                top += 1
+                n = numbers[i] = top
+            used.add(n)
+        return numbers
+
+    @classmethod
+    def varint(cls, n: int) -> bytes:
+        out = bytearray()
+        while n > 0x7f:
+            out.append(n & 0x7f | 0x80)
+            n >>= 7
+        out.append(n)
+        return bytes(out)
@@ -0,0 +1,136 @@
+from collections import deque
+from internal.utils.exceptions import ArgumentFormatError
+
+class RestartPolicy:
+    """
+    Decides when the CDCL loop should restart, i.e. backtrack to decision level 0 while keeping learnt clauses.
+    The solver reports every conflict, and asks the policy before each decision.
+    """
+    def on_conflict(self, lbd: int, trail_size: int):
+        pass
+
+    def should_restart(self) -> bool:
+        return False
+
+    def on_restart(self):
+        pass
+
+class LubyRestart(RestartPolicy):
+    """
+    Restarts after unit * luby(i) conflicts for the i-th restart: 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ...
+    """
+    def __init__(self, unit: int=100):
+        self.unit = unit
+        self.restarts = 0
+        self.conflicts = 0
+        self.limit = unit * LubyRestart.luby(0)
+
+    @classmethod
+    def luby(cls, i: int) -> int:
+        """
+        Returns the i-th (0-based) element of the Luby sequence.
+        """
+        # find the finite subsequence of size 2^k - 1 that contains index i
+        size, k = 1, 0
+        while size < i + 1:
+            k += 1
+            size = 2 * size + 1
+        while size - 1 != i:
+            size = (size - 1) >> 1
+            k -= 1
+            i = i % size
+        return 1 << k
+
+    def on_conflict(self, lbd: int, trail_size: int):
+        self.conflicts += 1
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.restarts += 1
+        self.conflicts = 0
+        self.limit = self.unit * LubyRestart.luby(self.restarts)
+
+class GeometricRestart(RestartPolicy):
+    """
+    Restarts after first, first * factor, first * factor^2 ... conflicts.
+    """
+    def __init__(self, first: int=100, factor: float=1.5):
+        self.conflicts = 0
+        self.limit = first
+        self.factor = factor
+
+    def on_conflict(self, lbd: int, trail_size: int):
+        self.conflicts += 1
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.conflicts = 0
+        self.limit *= self.factor
+
+class GlucoseRestart(RestartPolicy):
+    """
+    Glucose-style dynamic restarts, driven by the LBD of learnt clauses.
+    Restarts when the average LBD of the last window_size learnt clauses, scaled by k, exceeds the average LBD
+    of all learnt clauses: the recent clauses are worse than usual, so the search is probably in a bad subtree.
+    Restarts are blocked when the trail is much larger than its recent average, as the solver may be
+    close to a model.
+    """
+    def __init__(self, window_size: int=50, k: float=0.8, trail_window_size: int=5000, r: float=1.4,
+                 block_after: int=10000):
+        self.lbd_queue = deque(maxlen=window_size)
+        self.lbd_queue_sum = 0
+        self.lbd_sum = 0
+        self.conflicts = 0
+        self.k = k
+        self.trail_queue = deque(maxlen=trail_window_size)
+        self.trail_queue_sum = 0
+        self.r = r
+        self.block_after = block_after
+
+    @classmethod
+    def push(cls, q: deque, total: int, value: int) -> int:
+        """
+        Pushes value in the bounded queue q, returns the updated sum of the queue.
+        """
+        if len(q) == q.maxlen:
+            total -= q[0]
+        q.append(value)
+        return total + value
+
+    def on_conflict(self, lbd: int, trail_size: int):
+        self.conflicts += 1
+        self.lbd_sum += lbd
+        self.trail_queue_sum = GlucoseRestart.push(self.trail_queue, self.trail_queue_sum, trail_size)
+        # block the restart if the trail is much larger than usual
+        if self.conflicts > self.block_after and len(self.lbd_queue) == self.lbd_queue.maxlen and \
+                len(self.trail_queue) == self.trail_queue.maxlen and \
+                trail_size > self.r * self.trail_queue_sum / len(self.trail_queue):
+            self.lbd_queue.clear()
+            self.lbd_queue_sum = 0
+        self.lbd_queue_sum = GlucoseRestart.push(self.lbd_queue, self.lbd_queue_sum, lbd)
+
+    def should_restart(self) -> bool:
+        if len(self.lbd_queue) < self.lbd_queue.maxlen:
+            return False
+        return self.lbd_queue_sum / len(self.lbd_queue) * self.k > self.lbd_sum / self.conflicts
+
+    def on_restart(self):
+        self.lbd_queue.clear()
+        self.lbd_queue_sum = 0
+
+# Returns the restart policy matching the name given with --restart.
+def get_restart_policy(restart: str) -> RestartPolicy:
+    if restart == "NONE":
+        return RestartPolicy()
+    elif restart == "LUBY":
+        return LubyRestart()
+    elif restart == "GEOMETRIC":
+        return GeometricRestart()
+    elif restart == "GLUCOSE":
+        return GlucoseRestart()
+
+    raise ArgumentFormatError(f"{restart} is not a valid restart policy")
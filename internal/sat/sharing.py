@@ -0,0 +1,58 @@
+from queue import Empty
+from typing import List
+from internal.sat.clause import Clause
+
+class ClauseExchange:
+    """
+    Learnt clause sharing between solvers working on the same formula in different processes.
+    Every solver has an inbox (a multiprocessing Queue, i.e. a pipe) and exports its short learnt clauses,
+    LBD at most max_lbd and at most max_size literals, to the inboxes of all the other solvers.
+    Imported clauses are only added at decision level 0, see Solver.import_clauses.
+    Clauses already exported or imported are filtered out, by their set of literals.
+    """
+    def __init__(self, inbox, outboxes: list, max_lbd: int=2, max_size: int=8):
+        self.inbox = inbox
+        self.outboxes = outboxes
+        for q in [inbox] + outboxes:
+            # never block the exit of the process on clauses nobody will read
+            q.cancel_join_thread()
+        self.max_lbd = max_lbd
+        self.max_size = max_size
+        self.known = set()
+        self.exported = 0
+        self.imported = 0
+        self.duplicates = 0
+
+    def export(self, c: Clause, lbd: int):
+        if lbd > self.max_lbd or len(c) > self.max_size:
+            return
+        key = frozenset(c.lits)
+        if key in self.known:
+            self.duplicates += 1
+            return
+        self.known.add(key)
+        for q in self.outboxes:
+            q.put((list(c.lits), lbd))
+        self.exported += 1
+
+    def receive(self) -> List[tuple]:
+        """
+        Returns the (literals, lbd) of the clauses received since the last call, duplicates removed.
+        """
+        received = []
+        while True:
+            try:
+                lits, lbd = self.inbox.get_nowait()
+            except Empty:
+                return received
+            key = frozenset(lits)
+            if key in self.known:
+                self.duplicates += 1
+                continue
+            self.known.add(key)
+            received.append((lits, lbd))
+            self.imported += 1
+
+    # Returns True if clauses may be waiting in the inbox.
+    def poll(self) -> bool:
+        return not self.inbox.empty()
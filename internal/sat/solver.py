@@ -1,6 +1,5 @@
-from collections import deque
+import logging
 from typing import List, Callable
-from heapq import nlargest
 from internal.sat.model import Model
 from internal.sat.stats import Stats
 from internal.sat.symbol import Symbol
@@ -8,18 +7,34 @@ from internal.sat.symbols import Symbols
 from internal.sat.formula import Formula
 from internal.sat.clause import Clause
 from internal.sat.state_manager import StateManager
-from internal.sat.constants import TRUE, FALSE, UNASSIGNED
-from internal.utils.constants import F_PROGRESS
+from internal.sat.vsids import VSIDS
+from internal.sat.literal_scores import LiteralScores
+from internal.sat.restart import get_restart_policy
+from internal.sat.learnt_db import LearntClauseDB
+from internal.sat.phase import Phases
+from internal.sat.sharing import ClauseExchange
+from internal.sat.preprocessor import Preprocessor
+from internal.sat.proof import DratWriter
+from internal.sat.constants import TRUE, FALSE, UNASSIGNED, VAL_TRUE, VAL_FALSE, VAL_UNASSIGNED
+from internal.utils.constants import F_PROGRESS, F_HEURISTIC, F_RESTART, F_REDUCE_BASE, F_REDUCE_INC, F_MINIMIZE, F_PHASE, \
+    F_SIMPLIFY
+from internal.utils.exceptions import ArgumentFormatError
 from internal.utils.logger import Logger
 
 logger = Logger.get_logger()
 
+# branching heuristics that read the literal scores of the unresolved clauses
+SCORED_HEURISTICS = ("DLIS", "RDLIS", "JWOS", "JWTS", "MOMS", "3CH")
+# learnt clause minimization modes
+MINIMIZE_MODES = ("NONE", "LOCAL", "RECURSIVE")
+
 class Solver:
     """
     Solver for CDCL algorithm.
-    Symbols = the remaining unassigned symbols. Only symbols in original formula.
+    Symbols = the remaining unassigned variables. Only variables in original formula.
     Clauses = the set of clauses.
-    Model = the truth assignments of ALL variables (positive & negative), all initialised to None.
+    Model = the truth assignments of ALL literals (positive & negative), all initialised to None.
+    The solver works on integer literals (see internal.sat.literal), symbols are only produced for the output.
     """
     def __init__(self, symbols: Symbols,
                  formula: Formula,
@@ -33,108 +48,395 @@ class Solver:
         self.heuristic_fn = heuristic_fn
         self.stats = stats
         self.config = config
+        if config[F_HEURISTIC] == "VSIDS":
+            self.state.set_vsids(VSIDS(formula.num_vars))
+        elif config[F_HEURISTIC] in SCORED_HEURISTICS:
+            self.state.set_scores(LiteralScores(formula.get_clauses_with_learnt(), formula.num_vars, model))
+        self.restart_policy = get_restart_policy(config[F_RESTART])
+        if config[F_PHASE] != "NONE":
+            self.state.set_phases(Phases(formula.num_vars, config[F_PHASE]))
+        if config[F_MINIMIZE] not in MINIMIZE_MODES:
+            raise ArgumentFormatError(f"{config[F_MINIMIZE]} is not a valid minimization mode")
+        self.state.set_learnt_db(LearntClauseDB(formula, config[F_REDUCE_BASE], config[F_REDUCE_INC]))
+        # clause sharing with other solvers, only in parallel runs
+        self.exchange = None
+        # extends the model to the variables eliminated by preprocessing, if any
+        self.preprocessor = None
+        # DRAT proof of the clauses learnt and deleted, if any
+        self.proof = None
+        # number of level 0 assignments logged as unit clauses in the proof
+        self.proof_units = 0
+        # number of level 0 assignments at the last root simplification, -1 before the first one
+        self.simplified_assigns = -1
+        # incremental solving, see solve: pure literals are not assigned as clauses may still be added
+        self.incremental = False
+        # an empty clause was added, no call can succeed anymore
+        self.unsat = False
+        # outcome of the last call to solve: the model if SAT, the assumptions that failed if UNSAT
+        self.sat_model = None
+        self.core = []
+
+    def set_exchange(self, exchange: ClauseExchange):
+        self.exchange = exchange
+
+    def set_preprocessor(self, preprocessor: Preprocessor):
+        self.preprocessor = preprocessor
+
+    def set_proof(self, proof: DratWriter):
+        self.proof = proof
+
+    def solve(self, assumptions: List[int]=None) -> bool:
+        """
+        Incremental interface: solves the formula under the assumptions, literals made TRUE at decision levels
+        1 to len(assumptions) before any branching. Clauses may be added between calls, see add_clause, and
+        learnt clauses are kept from one call to the next.
+        On SAT, the model is in sat_model. On UNSAT, core holds the assumptions that made the formula
+        unsatisfiable, it is empty if the formula is unsatisfiable without them.
+        """
+        self.incremental = True
+        self.sat_model, self.core = None, []
+        if self.unsat:
+            return FALSE
+        is_sat, self.sat_model = self.cdcl(assumptions)
+        if not is_sat and not self.core:
+            # unsatisfiable whatever the assumptions
+            self.unsat = True
+        # back to level 0, where clauses can be added
+        Solver.backtrack(self.state, 0, self.state.get_decision_level())
+        return is_sat
+
+    def add_clause(self, lits: List[int]) -> bool:
+        """
+        Adds a clause between two calls to solve, over the variables of the formula.
+        Literals FALSE at level 0 are left out, and so is a clause already satisfied at level 0.
+        Returns False if the formula became unsatisfiable.
+        """
+        assert self.state.get_decision_level() == 0, "clauses can only be added between calls to solve"
+        if any(lit >> 1 >= self.formula.num_vars for lit in lits):
+            raise ArgumentFormatError(f"Clause {lits} has variables outside of the formula")
+        self.incremental = True
+        values = self.state.get_model().values
+        lits = list(dict.fromkeys(lits))
+        if any(lit ^ 1 in lits or values[lit >> 1] ^ (lit & 1) == VAL_TRUE for lit in lits):
+            return not self.unsat
+        lits = [lit for lit in lits if values[lit >> 1] ^ (lit & 1) != VAL_FALSE]
+        if not lits:
+            self.unsat = True
+            return False
+        clause = Clause(lits)
+        self.formula.add_clause(clause)
+        self.state.scores_add_clause(clause)
+        if len(lits) == 1:
+            # propagated at the start of the next call
+            self.state.assign(lits[0], TRUE, clause, 0)
+        return not self.unsat
 
-    def cdcl(self) -> (bool, Model):
+    def cdcl(self, assumptions: List[int]=None) -> (bool, List[Symbol]):
         logger.info(f"Formula {self.formula}")
         logger.info(f"Initial model {self.state.get_model()}")
         dl = 0 # no guesses have been made
+        assumptions = [] if assumptions is None else assumptions
+        # the messages of every iteration format the model or clauses, only when they are logged
+        verbose = logger.isEnabledFor(logging.INFO)
 
-        while not Solver.all_variables_assigned(self.formula, self.state.get_model()):
-            logger.info(f"Now at decision level: {dl}")
-            logger.info(f"Current model: {self.state.get_model_summary()}")
+        # unit and empty clauses are never watched, handle them once at decision level 0
+        if not Solver.assign_unit_clauses(self.formula, self.state):
+            if self.proof is not None:
+                self.proof.add([])
+            return FALSE, None
+
+        while True:
+            if verbose:
+                logger.info(f"Now at decision level: {dl}")
+                logger.info(f"Current model: {self.state.get_model_summary()}")
             if self.config[F_PROGRESS]:
                 Solver.progress_bar(self.formula, self.state.get_model())
 
             # this strange position of unit_propagate is to ensure we propagate immediately after backtracking
             logger.info(f"Begin unit propagation")
+            size = len(self.state.trail)
             conf_clause = Solver.unit_propagate(self.formula, self.state, dl)
             logger.info(f"End unit propagation")
+            if self.stats:
+                self.stats.inc_propagations(len(self.state.trail) - size)
 
             if conf_clause:
+                if self.stats:
+                    self.stats.inc_conflicts(dl)
                 # diagnose stage
-                logger.info(f"Begin conflict analysis on clause {conf_clause}")
+                if verbose:
+                    logger.info(f"Begin conflict analysis on clause {conf_clause}")
                 learnt, lvl = Solver.conflict_analysis(conf_clause, self.state, dl)
-                logger.info(f"End conflict analysis on clause {conf_clause}")
-                logger.debug(f"Decision level reset to {lvl}")
-                logger.debug(f"Learnt {learnt}")
+                if lvl >= 0 and self.config[F_MINIMIZE] != "NONE":
+                    size = len(learnt)
+                    learnt, lvl = Solver.minimize(learnt, self.state, self.config[F_MINIMIZE] == "RECURSIVE")
+                    if self.stats:
+                        self.stats.inc_minimized(size - len(learnt))
+                if verbose:
+                    logger.info(f"End conflict analysis on clause {conf_clause}")
+                    logger.debug(f"Decision level reset to {lvl}")
+                    logger.debug(f"Learnt {learnt}")
                 if lvl < 0:
+                    if self.proof is not None:
+                        # conflict at level 0, the empty clause follows by unit propagation
+                        self.proof.add([])
                     return FALSE, None
                 else:
+                    self.state.decay_activity()
+                    self.state.decay_clause_activity()
+                    lbd = Solver.compute_lbd(learnt, self.state)
+                    # the trail size before backtracking tells glucose-style restarts how close we are to a model
+                    self.restart_policy.on_conflict(lbd, len(self.state.trail))
                     # revert history to before we made the mistake
                     logger.info(f"Begin backtrack from {dl} to {lvl}")
                     Solver.backtrack(self.state, lvl, dl)
                     logger.info(f"End backtrack from {dl} to {lvl}")
                     # avoid repeating the same mistake
+                    self.state.get_learnt_db().add(learnt, lbd)
                     self.formula.add_learnt_clause(learnt)
+                    if self.proof is not None:
+                        self.proof.add(learnt.lits)
+                    self.state.scores_add_clause(learnt)
+                    if self.stats:
+                        self.stats.inc_learnt(len(learnt), lbd)
+                    if self.exchange is not None:
+                        self.exchange.export(learnt, lbd)
+                        if self.stats:
+                            self.stats.set_shared(self.exchange.exported, self.exchange.imported)
                     # decrement decision level due to backtracking
                     dl = lvl
-            elif Solver.all_variables_assigned(self.formula, self.state.get_model()):
+                    # the learnt clause is unit after backtracking, assert its only unassigned literal
+                    self.state.assign(learnt.lits[0], TRUE, learnt, dl)
+            elif dl >= len(assumptions) and Solver.all_variables_assigned(self.formula, self.state.get_model()):
                 logger.info("All variables assigned, break")
                 break
+            elif dl == 0 and self.config[F_SIMPLIFY] and len(self.state.trail) != self.simplified_assigns:
+                # new level 0 assignments since the last simplification
+                if not self.simplify():
+                    return FALSE, None
+            elif dl == 0 and self.exchange is not None and self.exchange.poll():
+                # clauses from other solvers are only added at level 0, where they cannot be conflicting or unit
+                # without the current assignment noticing it
+                if not self.import_clauses():
+                    return FALSE, None
+            elif dl > 0 and self.restart_policy.should_restart():
+                # learnt clauses are kept, only the assignments above level 0 are undone
+                logger.info(f"Restart from {dl}")
+                Solver.backtrack(self.state, 0, dl)
+                dl = 0
+                self.restart_policy.on_restart()
+                if self.state.get_phases() is not None:
+                    self.state.get_phases().on_restart()
+                if self.stats:
+                    self.stats.inc_restarts()
             else:
+                learnt_db = self.state.get_learnt_db()
+                if learnt_db.should_reduce():
+                    logger.info(f"Reducing learnt clause database of size {len(learnt_db)}")
+                    deleted = learnt_db.reduce(self.state.get_model())
+                    self.state.scores_remove_clauses(deleted)
+                    if self.proof is not None:
+                        for c in deleted:
+                            self.proof.delete(c.lits)
+                    if self.stats:
+                        self.stats.inc_deleted(len(deleted))
+                if self.state.get_phases() is not None:
+                    self.state.get_phases().on_decision(self.state.get_model().values, len(self.state.trail))
                 dl += 1
+                if dl <= len(assumptions):
+                    # the next assumption is made in place of a branching decision
+                    lit = assumptions[dl - 1]
+                    status = self.state.get_model()[lit]
+                    if status == FALSE:
+                        self.core = Solver.analyze_final(lit, self.state)
+                        logger.info(f"Assumption {lit} failed, core {self.core}")
+                        return FALSE, None
+                    elif status == TRUE:
+                        # already implied, the level stays empty so that levels and assumptions still match
+                        self.state.new_decision_level()
+                    else:
+                        self.state.assign(lit, TRUE, None, dl)
+                    continue
                 logger.info(f"Begin pick branching variable")
-                var, val = Solver.pick_branching_variable_update_state(self.state, dl, self.heuristic_fn, self.formula)
-                logger.info(f"End pick branching variable {var} {val}")
-                self.state.extend_model(var, val)
+                lit, val = Solver.pick_branching_variable_update_state(self.state, dl, self.heuristic_fn, self.formula)
+                logger.info(f"End pick branching variable {lit} {val}")
                 if self.stats:
-                    self.stats.inc_bc()
+                    self.stats.inc_bc(dl)
 
         # if we reach here, formula must be sat
         formula_status = self.state.get_model().get_formula_status(self.formula)
         assert formula_status == TRUE
         logger.info(f"Verified formula SAT status with model")
+        if self.preprocessor is not None:
+            self.preprocessor.extend_model(self.state.get_model())
+
+        # translate back to the symbols of the input
+        return TRUE, self.formula.get_variables().to_symbols(self.state.get_model().get_true_literals())
+
+    def simplify(self) -> bool:
+        """
+        Root level simplification, at decision level 0 after propagation: removes the clauses satisfied at
+        level 0 and the FALSE literals of the others, then assigns the pure literals at level 0 (unless solving
+        incrementally or writing a proof) and starts over until there are none. Returns False if the formula is unsatisfiable.
+        """
+        model = self.state.get_model()
+        removed = []
+        if self.proof is not None:
+            # the clauses implying the level 0 assignments may be deleted, the assignments are logged as units
+            for lit in self.state.trail[self.proof_units:]:
+                self.proof.add([lit])
+            self.proof_units = len(self.state.trail)
+        while True:
+            removed += self.formula.simplify(model.values, self.proof)
+            # a pure literal may be made FALSE by clauses or assumptions given later, and has no DRAT derivation
+            # once learnt clauses contain its negation
+            pure = [] if self.incremental or self.proof is not None else Solver.pure_literals(self.formula, model)
+            if not pure:
+                break
+            logger.debug(f"Assign pure literals {pure}")
+            for lit in pure:
+                self.state.assign(lit, TRUE, None, 0)
+            if Solver.unit_propagate(self.formula, self.state, 0) is not None:
+                return False
+        if removed and self.state.get_scores() is not None:
+            # literals were stripped from tracked clauses, the scores are recomputed over what is left
+            self.state.set_scores(LiteralScores(self.formula.get_clauses_with_learnt(), self.formula.num_vars, model))
+        if self.stats:
+            self.stats.inc_simplified(len(removed), sum(c.learnt for c in removed))
+        self.simplified_assigns = len(self.state.trail)
+        return True
 
-        return TRUE, self.state.get_model_summary()
+    @classmethod
+    def analyze_final(cls, lit: int, state: StateManager) -> List[int]:
+        """
+        Returns the assumptions responsible for assumption lit being FALSE, lit included.
+        Walks the trail backwards from the assignment of -lit through the reasons: the decisions reached are
+        assumptions, as no branching happens before all of them are made.
+        """
+        model = state.get_model()
+        level, reason, seen = model.level, model.reason, state.seen
+        core = [lit]
+        if level[lit >> 1] == 0:
+            return core
+        seen[lit >> 1] = 1
+        for x in reversed(state.trail[state.trail_lim[0]:]):
+            var = x >> 1
+            if not seen[var]:
+                continue
+            seen[var] = 0
+            if reason[var] is None:
+                core.append(x)
+            else:
+                for y in reason[var]:
+                    if y >> 1 != var and level[y >> 1] > 0:
+                        seen[y >> 1] = 1
+        return core
+
+    @classmethod
+    def pure_literals(cls, f: Formula, m: Model) -> List[int]:
+        """
+        Returns the unassigned literals occurring in the original clauses while their negation does not.
+        Learnt clauses are implied by the original ones, assigning a pure literal keeps them satisfiable.
+        """
+        occurs = bytearray(2 * f.num_vars)
+        for clause in f.clist:
+            for lit in clause:
+                occurs[lit] = 1
+        values = m.values
+        return [lit for lit in range(2 * f.num_vars)
+                if occurs[lit] and not occurs[lit ^ 1] and values[lit >> 1] == VAL_UNASSIGNED]
+
+    def import_clauses(self) -> bool:
+        """
+        Adds the clauses received from other solvers, at decision level 0. Literals FALSE at level 0 are removed,
+        and clauses TRUE at level 0 are skipped. Unit clauses are assigned, and will be propagated.
+        Returns False if a clause is FALSE at level 0: the formula is unsatisfiable.
+        """
+        values = self.state.get_model().values
+        added = 0
+        for lits, lbd in self.exchange.receive():
+            if any(values[lit >> 1] ^ (lit & 1) == VAL_TRUE for lit in lits):
+                continue
+            clause = Clause([lit for lit in lits if values[lit >> 1] ^ (lit & 1) != VAL_FALSE])
+            if len(clause) == 0:
+                return False
+            self.state.get_learnt_db().add(clause, min(lbd, len(clause)))
+            self.formula.add_learnt_clause(clause)
+            self.state.scores_add_clause(clause)
+            added += 1
+            if len(clause) == 1:
+                self.state.assign(clause.lits[0], TRUE, clause, 0)
+        if self.stats:
+            self.stats.set_shared(self.exchange.exported, self.exchange.imported)
+            self.stats.inc_imported_learnt(added)
+        return True
 
     @classmethod
     def all_variables_assigned(cls, f: Formula, m: Model) -> bool:
         """
-        Returns True when every symbol in the formula has an assignment in model.
+        Returns True when every variable in the formula has an assignment in model.
+        """
+        return m.num_assigned >= f.num_vars
+
+    @classmethod
+    def assign_unit_clauses(cls, f: Formula, state: StateManager) -> bool:
+        """
+        Assigns the literal of every unit clause at decision level 0.
+        Returns False if the formula contains an empty clause or contradicting unit clauses.
         """
-        for symbol in f.get_symbols():
-            if m[symbol] == UNASSIGNED:
+        for clause in f.get_clauses_with_learnt():
+            if len(clause) == 0:
                 return False
+            if len(clause) == 1:
+                lit = clause.lits[0]
+                status = state.get_model()[lit]
+                if status == FALSE:
+                    return False
+                elif status == UNASSIGNED:
+                    state.assign(lit, TRUE, clause, 0)
         return True
 
     @classmethod
     def unit_propagate(cls, f: Formula, state: StateManager, dl: int) -> Clause:
         """
+        Two-watched-literal unit propagation, driven by the propagation queue of newly assigned literals.
+        Only clauses watching the falsified literal are visited.
         Returns None if no conflict is detected, or the conflicting clause otherwise.
         """
-        # First filter out all SAT clauses
-        while True:
-            # propagation queue
-            q = deque()
-            seen_symbols = set()
-            for clause in f.get_clauses_with_learnt():
-                clause_status = state.get_model_clause_status(clause)
-                if clause_status == TRUE:
-                    # ignore already satisfied clauses
+        values = state.get_model().values
+        watches = f.watches
+        while state.has_pending_propagation():
+            false_lit = state.next_propagation() ^ 1
+            watchers = watches[false_lit]
+            kept = []
+            for i, clause in enumerate(watchers):
+                lits = clause.lits
+                # keep the falsified watch in second position
+                if lits[0] == false_lit:
+                    lits[0], lits[1] = lits[1], false_lit
+                other = lits[0]
+                # clause already satisfied by the other watch
+                if values[other >> 1] ^ (other & 1) == VAL_TRUE:
+                    kept.append(clause)
                     continue
-                elif clause_status == FALSE:
-                    # one clause false -> formula false
-                    logger.debug(f"Found UNSAT clause {clause}")
-                    return clause
+                # look for a new literal to watch that is not FALSE
+                for k in range(2, len(lits)):
+                    if values[lits[k] >> 1] ^ (lits[k] & 1) != VAL_FALSE:
+                        lits[1], lits[k] = lits[k], false_lit
+                        watches[lits[1]].append(clause)
+                        break
                 else:
-                    # filter unit clauses
-                    is_unit, unassigned_sbl = state.get_model().is_unit_clause(clause)
-                    tup = (unassigned_sbl, clause)
-                    if is_unit and not (unassigned_sbl in seen_symbols or unassigned_sbl.negate() in seen_symbols):
-                        q.append(tup)
-                        # don't add the same symbol to the implication graph in one UP
-                        seen_symbols.add(unassigned_sbl)
-            logger.debug(f"Propagate queue: {q}")
-            # propagate (if there's something to propagate)
-            if len(q) == 0:
-                return None
-            else:
-                while len(q) > 0:
-                    symbol, antecedent = q.popleft()
-                    symbol_pos, val = Solver.to_positive(symbol, TRUE)
-                    state.get_model().extend(symbol_pos, val)
-                    state.add_graph_node(symbol_pos, val, antecedent, dl)
-                    state.sbls_mark_assigned(symbol_pos)
+                    # no replacement found: the clause is unit or conflicting
+                    kept.append(clause)
+                    if values[other >> 1] ^ (other & 1) == VAL_FALSE:
+                        logger.debug(f"Found UNSAT clause {clause}")
+                        kept.extend(watchers[i + 1:])
+                        watches[false_lit] = kept
+                        state.clear_propagation()
+                        return clause
+                    state.assign(other, TRUE, clause, dl)
+            watches[false_lit] = kept
+        return None
 
     @classmethod
     def pick_branching_variable_update_state(cls,
@@ -142,18 +444,18 @@ class Solver:
                                              dl: int,
                                              heuristic_fn: Callable,
                                              formula: Formula
-                                             ) -> (Symbol, bool):
+                                             ) -> (int, bool):
         """
-        Picks new branching variable and updates history. dl for recording purposes.
+        Picks new branching literal and assigns it, updating history. dl for recording purposes.
         """
-        sbl, val = heuristic_fn(state, formula)
-        # sbl, val = state.sbls_get_unassigned_sbl_fifo()
-        logger.debug(f"Pick unassigned symbol {sbl} {val}")
-        state.add_graph_node(sbl, val, None, dl)
-        logger.debug(f"Update implication graph {sbl} {val} {None} {dl}")
-        state.sbls_mark_assigned(sbl)
-        logger.debug(f"Mark {sbl} as assigned")
-        return sbl, val
+        lit, val = heuristic_fn(state, formula)
+        if state.get_phases() is not None:
+            # the heuristic picks the variable, the saved phase its value
+            lit, val = state.get_phases().pick_phase(lit, val)
+        logger.debug(f"Pick unassigned literal {lit} {val}")
+        state.assign(lit, val, None, dl)
+        logger.debug(f"Update implication graph {lit} {val} {None} {dl}")
+        return lit, val
 
 
     @classmethod
@@ -161,44 +463,132 @@ class Solver:
         """
         Conflict analysis involves finding the first Unique Implication Point.
         A UIP is a node in the implication graph other than the conflict node that is on all paths from the current
-        decision symbol (symbol@d) to the conflict (K@d).
+        decision literal (literal@d) to the conflict (K@d).
         A First UIP is the UIP closest to the conflict.
-        Receives conflicting clause, returns learnt clause and backtrack level
+        Receives conflicting clause, returns learnt clause and backtrack level.
+        The trail is walked backwards once: literals of the current level still to resolve are marked seen and
+        counted, the others go to the learnt clause. The last seen literal left when the count drops to 1 is the UIP.
+        Literals assigned at level 0 are FALSE for good, they are left out of the learnt clause, as in MiniSat.
+        Every other variable seen during the analysis has its activity bumped.
         """
-        def next_recently_assigned(pool: List[Symbol]) -> (Symbol, List[Symbol]):
-            """
-            Separate the latest assigned symbol according to assignment history from the rest in the clause
-            """
-            assign_history = list(g.get_history(dl))
-            for s in reversed(assign_history):
-                if s in pool or s.negate() in pool:
-                    return s, [x for x in pool if x.literal != s.literal]
-
         # Conflict at first unit propagation, not solvable!
         if dl == 0:
             return None, -1
 
-        done_sbls_pos = set()
-        learnt_clause = c
-        symbol_pool = c.symbol_list
-        # Continue until first UIP
-        while len(g.get_graph_sbls_at_lvl_in_clause(dl, learnt_clause)) != 1:
-            if len(symbol_pool) == 0:
+        model = g.get_model()
+        level, reason = model.level, model.reason
+        trail, seen = g.trail, g.seen
+        learnt = []
+        counter = 0 # seen literals of the current level not resolved yet
+        uip = -1
+        index = len(trail) - 1
+        clause = c
+        while True:
+            g.bump_clause_activity(clause)
+            for lit in clause:
+                var = lit >> 1
+                if seen[var] or var == uip >> 1 or level[var] == 0:
+                    continue
+                seen[var] = 1
+                g.bump_activity(var)
+                if level[var] >= dl:
+                    counter += 1
+                else:
+                    learnt.append(lit)
+            # most recently assigned literal to resolve on
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            uip = trail[index]
+            index -= 1
+            seen[uip >> 1] = 0
+            counter -= 1
+            if counter == 0:
                 break
-            last_assigned, symbol_pool = next_recently_assigned(symbol_pool)
-            last_assgn_pos = last_assigned.to_positive()
-            if last_assgn_pos not in done_sbls_pos:
-                done_sbls_pos.add(last_assgn_pos)
-                clause = g.get_graph_antecedent(last_assgn_pos)
-                symbol_pool.extend(g.get_graph_parent_symbols(last_assgn_pos))
-                if clause: # branching variables have no antecedent
-                    logger.debug(f"Resolution {learnt_clause} {clause}")
-                    learnt_clause = Solver.resolution(learnt_clause, clause, last_assgn_pos)
+            clause = reason[uip >> 1]
+            logger.debug(f"Resolution on {uip} with {clause}")
 
-        # We assume every symbol in learnt clause is recorded in implication graph
-        lbd = [g.get_graph_level(sbl.to_positive()) for sbl in learnt_clause]
+        for lit in learnt:
+            seen[lit >> 1] = 0
+        return Solver.order_learnt_clause(Clause([uip ^ 1] + learnt), g)
 
-        return (learnt_clause, 0) if len(lbd) == 1 else (learnt_clause, nlargest(2, lbd)[-1])
+    @classmethod
+    def order_learnt_clause(cls, c: Clause, g: StateManager) -> (Clause, int):
+        """
+        Moves the literal of highest level after the asserting literal, which must be first, for the watches.
+        Returns the clause and the backtrack level, the level of its second literal.
+        """
+        if len(c) == 1:
+            return c, 0
+        level = g.get_model().level
+        lits = c.lits
+        i = max(range(1, len(lits)), key=lambda k: level[lits[k] >> 1])
+        lits[1], lits[i] = lits[i], lits[1]
+        return c, level[lits[1] >> 1]
+
+    @classmethod
+    def minimize(cls, c: Clause, g: StateManager, recursive: bool) -> (Clause, int):
+        """
+        Removes redundant literals from a learnt clause, whose asserting literal is first.
+        A literal is redundant if its negation is implied by the other literals of the clause:
+            local       every other literal of its reason is in the clause (self-subsuming resolution)
+            recursive   every other literal of its reason is in the clause, or is itself redundant.
+        Recursive minimization only explores variables whose decision level occurs in the clause, tested
+        cheaply on a 32-bit abstraction of the set of levels of the clause.
+        Returns the minimized clause and its backtrack level.
+        """
+        model = g.get_model()
+        level, reason = model.level, model.reason
+        seen = g.seen
+        marked = [lit >> 1 for lit in c]
+        abstract_levels = 0
+        for var in marked:
+            seen[var] = 1
+            abstract_levels |= 1 << (level[var] & 31)
+
+        def is_redundant(lit: int) -> bool:
+            stack = [lit >> 1]
+            top = len(marked)
+            while stack:
+                for x in reason[stack.pop()]:
+                    var = x >> 1
+                    if seen[var] or level[var] == 0:
+                        continue
+                    if reason[var] is not None and abstract_levels >> (level[var] & 31) & 1:
+                        seen[var] = 1
+                        marked.append(var)
+                        stack.append(var)
+                    else:
+                        # a decision, or a level absent from the clause: the literal cannot be removed
+                        for v in marked[top:]:
+                            seen[v] = 0
+                        del marked[top:]
+                        return False
+            # variables found redundant stay marked, they will not be explored again
+            return True
+
+        kept = [c.lits[0]]
+        for lit in c.lits[1:]:
+            antecedent = reason[lit >> 1]
+            if antecedent is None:
+                kept.append(lit)
+            elif recursive:
+                if not is_redundant(lit):
+                    kept.append(lit)
+            elif any(not seen[x >> 1] and level[x >> 1] > 0 for x in antecedent):
+                kept.append(lit)
+
+        for var in marked:
+            seen[var] = 0
+        return Solver.order_learnt_clause(Clause(kept), g)
+
+    @classmethod
+    def compute_lbd(cls, c: Clause, state: StateManager) -> int:
+        """
+        Literal Block Distance (LBD) of a clause: the number of distinct decision levels among its literals.
+        Clauses of low LBD link few decision levels, and tend to be the most useful learnt clauses.
+        """
+        level = state.get_model().level
+        return len(set(level[lit >> 1] for lit in c))
 
     @classmethod
     def backtrack(cls, state: StateManager, dl_lower: int, dl_upper: int):
@@ -207,26 +597,26 @@ class Solver:
         state.revert_history(dl_lower, dl_upper)
 
     @classmethod
-    def resolution(cls, c1: Clause, c2: Clause, s: Symbol) -> Clause:
+    def resolution(cls, c1: Clause, c2: Clause, lit: int) -> Clause:
         assert c1 is not None
         assert c2 is not None
-        assert (s in c1 and s.negate() in c2) or (s.negate() in c1 and s in c2)
-        sbl_list_no_dups = list(set([sbl for sbl in c1 if sbl.literal != s.literal] +
-                                    [sbl for sbl in c2 if sbl.literal != s.literal]))
-        return Clause(sbl_list_no_dups)
+        assert (lit in c1 and lit ^ 1 in c2) or (lit ^ 1 in c1 and lit in c2)
+        var = lit >> 1
+        lits_no_dups = list(set([x for x in c1 if x >> 1 != var] +
+                                [x for x in c2 if x >> 1 != var]))
+        return Clause(lits_no_dups)
 
     @classmethod
-    def to_positive(cls, s: Symbol, val: bool) -> (Symbol, bool):
+    def to_positive(cls, lit: int, val: bool) -> (int, bool):
         """
-        Returns respective symbol and truth assignment s.t. symbol is positive
-        to_positive(Symbol(A, False), True)) -> Symbol(A, True), False
-        to_positive(Symbol(A, True), False)) -> Symbol(A, True), False
+        Returns respective literal and truth assignment s.t. literal is positive
+        to_positive(-A, True)) -> A, False
+        to_positive(A, False)) -> A, False
         """
-        if s.is_pos:
-            return s, val
+        if not lit & 1:
+            return lit, val
         else:
-            return s.negate(), not val
-
+            return lit ^ 1, not val
     @classmethod
     def get_unresolved_clauses(cls, f: Formula, m: Model) -> List[Clause]:
         return [x for x in f.get_clauses_with_learnt() if m.get_clause_status(x) == UNASSIGNED]
@@ -1,11 +1,14 @@
-from collections import deque, defaultdict
-from typing import List
+import logging
+from typing import List, Dict
 
 from internal.sat.model import Model
-from internal.sat.symbol import Symbol
 from internal.sat.symbols import Symbols
 from internal.sat.clause import Clause
 from internal.sat.constants import TRUE
+from internal.sat.vsids import VSIDS
+from internal.sat.literal_scores import LiteralScores
+from internal.sat.learnt_db import LearntClauseDB
+from internal.sat.phase import Phases
 from internal.utils.logger import Logger
 
 logger = Logger.get_logger()
@@ -14,128 +17,209 @@ class StateManager:
     """
     During execution of CDCL, assigned variables as well as their antecedents define a directed acyclic graph.
     This is called an Implication Graph.
-    Also handles tracking history of the solver.
-    All symbols will be only positive.
+    The graph is kept implicitly: the trail records the literals made TRUE in assignment order, trail_lim the
+    index in the trail where each decision level starts, and the Model the level and reason (antecedent)
+    of every variable. The explicit graph is only built on demand, see build_implication_graph.
+    The trail also serves as the propagation queue: literals from qhead onwards are not yet propagated.
     """
     @classmethod
-    def from_values(cls, s: Symbols, m: Model, ig: dict, h: 'History'):
-        return StateManager(s, m, ig, h)
+    def from_values(cls, s: Symbols, m: Model, trail: List[int], trail_lim: List[int]):
+        return StateManager(s, m, trail, trail_lim)
 
-    def __init__(self, symbols: Symbols, model: Model, implication_graph:dict=None, h:'History'=None):
-        for s in symbols:
-            assert s.is_pos
-        # for easier picking of branching variable (only positive)
+    def __init__(self, symbols: Symbols, model: Model, trail: List[int]=None, trail_lim: List[int]=None):
+        # for easier picking of branching variable
         self.unassigned_symbols = symbols
         self.model = model
-        # makes it easier to match with symbols in a clause, and deleting based on symbols inferred at a level.
-        # Symbol (only positive) -> ImplicationNode
-        self.implication_graph = {} if implication_graph is None else implication_graph
-        # makes it easier to know which history to delete when we backtrack later.
-        # dl (int) -> deque[Symbol (only positive)]
-        self.history = History() if h is None else h
-
-    def add_graph_node(self, s: Symbol, val: bool, antecedent: Clause, dl: int):
+        # literals made TRUE, in assignment order
+        self.trail = [] if trail is None else trail
+        # trail_lim[dl - 1] is the index in the trail of the first assignment of decision level dl
+        self.trail_lim = [] if trail_lim is None else trail_lim
+        # index of the next literal on the trail to propagate
+        self.qhead = len(self.trail)
+        # per variable marks for conflict analysis and minimization, always cleared after use
+        self.seen = bytearray(len(model))
+        # variable activities, only kept when branching with VSIDS
+        self.vsids = None
+        # literal scores over unresolved clauses, only kept when branching with a clause-based heuristic
+        self.scores = None
+        # learnt clause activities and deletion schedule
+        self.learnt_db = None
+        # saved phases of the variables, only kept when phase saving is on
+        self.phases = None
+
+    def add_graph_node(self, lit: int, val: bool, antecedent: Clause, dl: int):
         """
-        Adds a node X to the implication graph, updating its history.
-        Its parents are the antecedent(X), and those nodes in the antecedent have X as their child.
-        Symbol s must only be positive Symbol('A', True), not Symbol('A', False), otherwise there may
-        be issues when finding the implication graph node when updating parents.
+        Records the assignment on the trail, opening the decision levels up to dl if needed.
+        Its parents in the implication graph are the other variables of the antecedent, read from the model.
         """
-        logger.debug(f"Implication Graph: {self.implication_graph}")
-        assert s not in self.implication_graph, f"{s} should not be in implication graph"
-        assert s.negate() not in self.implication_graph, f"{s.negate()} should not be in implication graph"
-        # We only want to deal with positive symbols
-        s_pos, v_pos = s, val
-        if not s.is_pos:
-            s_pos = s.negate()
-            v_pos = not val
-        impl_node = ImplicationGraphNode(s_pos, v_pos, dl, antecedent)
-        self.implication_graph[s_pos] = impl_node
-        self.history.add_history(dl, s_pos)
-
-        # antecedent is None only when we are selecting a branching symbol, hence no parent
-        if antecedent:
-            for symbol_pos in [sbl.to_positive() for sbl in antecedent if sbl.literal != s.literal]:
-                # all positive symbols of the antecedent should have been assigned
-                if symbol_pos in self.implication_graph:
-                    impl_node.add_parent(self.implication_graph[symbol_pos])
-                    self.implication_graph[symbol_pos].add_child(impl_node)
-
-    def get_graph_parent_symbols_at_lvl(self, s: Symbol, dl: int) -> List[Symbol]:
-        """
-        During conflict analysis, we need a way to get all implications at a certain level wrt a certain symbol.
-        """
-        assert s in self.implication_graph
-        parents = self.implication_graph[s].get_parents()
-        return [x.symbol for x in parents if x.level == dl]
-
-    def get_graph_parent_symbols(self, s: Symbol) -> List[Symbol]:
-        assert s in self.implication_graph
-        parents = self.implication_graph[s].get_parents()
-        return [x.symbol for x in parents]
-
-    # Returns the list of symbols in the clause matching the decision level
-    def get_graph_sbls_at_lvl_in_clause(self, dl: int, c: Clause) -> List[Symbol]:
-        ret = []
-        assert dl in self.history, f"symbols_at_level dl {dl} not in history"
-        for symbol in c:
-            if symbol.to_positive() in self.history.get_history_at_lvl(dl):
-                ret.append(symbol)
-        return ret
-
-    def get_graph_level(self, s: Symbol) -> int:
-        assert s in self.implication_graph, f"get_level {s} not in graph"
-        return self.implication_graph[s].level
-
-    def get_graph_antecedent(self, s: Symbol) -> Clause:
-        assert s in self.implication_graph, f"get_antecedent {s} not in graph"
-        return self.implication_graph[s].antecedent
-
-    def sbls_mark_unassigned(self, s: Symbol):
-        self.unassigned_symbols.add(s)
-
-    def sbls_mark_assigned(self, s: Symbol):
-        neg = s.negate()
-        if s in self.unassigned_symbols:
-            self.unassigned_symbols.remove(s)
-        if neg in self.unassigned_symbols:
-            self.unassigned_symbols.remove(neg)
-
-    def sbls_get_unassigned_sbl_fifo(self) -> (Symbol, bool):
-        return self.unassigned_symbols.pop_fifo(), TRUE
+        while len(self.trail_lim) < dl:
+            self.trail_lim.append(len(self.trail))
+        assert len(self.trail_lim) == dl, f"cannot assign at level {dl} below current level {len(self.trail_lim)}"
+        self.trail.append(lit if val else lit ^ 1)
+
+    def get_graph_parent_symbols(self, var: int) -> List[int]:
+        antecedent = self.model.reason[var]
+        if antecedent is None:
+            return []
+        return [x >> 1 for x in antecedent if x >> 1 != var]
+
+    # Returns the list of literals in the clause matching the decision level
+    def get_graph_sbls_at_lvl_in_clause(self, dl: int, c: Clause) -> List[int]:
+        level = self.model.level
+        return [lit for lit in c if level[lit >> 1] == dl]
+
+    def get_graph_level(self, var: int) -> int:
+        return self.model.level[var]
+
+    def get_graph_antecedent(self, var: int) -> Clause:
+        return self.model.reason[var]
+
+    def get_decision_level(self) -> int:
+        return len(self.trail_lim)
+
+    # Opens a decision level without any assignment.
+    def new_decision_level(self):
+        self.trail_lim.append(len(self.trail))
+
+    def sbls_mark_unassigned(self, var: int):
+        self.unassigned_symbols.add(var)
+
+    def sbls_mark_assigned(self, var: int):
+        if var in self.unassigned_symbols:
+            self.unassigned_symbols.remove(var)
+
+    def sbls_get_unassigned_sbl_fifo(self) -> (int, bool):
+        return self.unassigned_symbols.pop_fifo() << 1, TRUE
+
+    def set_vsids(self, vsids: VSIDS):
+        self.vsids = vsids
+
+    def get_vsids(self) -> VSIDS:
+        return self.vsids
+
+    # Bumps the activity of a variable involved in a conflict, if activities are kept.
+    def bump_activity(self, var: int):
+        if self.vsids is not None:
+            self.vsids.bump(var)
+
+    # Decays all activities, called once per conflict.
+    def decay_activity(self):
+        if self.vsids is not None:
+            self.vsids.decay()
+
+    def set_scores(self, scores: LiteralScores):
+        self.scores = scores
+
+    def get_scores(self) -> LiteralScores:
+        return self.scores
+
+    # Starts tracking a new clause in the literal scores, if they are kept.
+    def scores_add_clause(self, c: Clause):
+        if self.scores is not None:
+            self.scores.add_clause(c)
+
+    # Stops tracking deleted clauses in the literal scores, if they are kept.
+    def scores_remove_clauses(self, clauses: List[Clause]):
+        if self.scores is not None:
+            self.scores.remove_clauses(clauses)
+
+    def set_learnt_db(self, learnt_db: LearntClauseDB):
+        self.learnt_db = learnt_db
+
+    def get_learnt_db(self) -> LearntClauseDB:
+        return self.learnt_db
+
+    # Bumps the activity of a learnt clause involved in a conflict.
+    def bump_clause_activity(self, c: Clause):
+        if self.learnt_db is not None and c.learnt:
+            self.learnt_db.bump(c)
+
+    # Decays all clause activities, called once per conflict.
+    def decay_clause_activity(self):
+        if self.learnt_db is not None:
+            self.learnt_db.decay()
+
+    def set_phases(self, phases: Phases):
+        self.phases = phases
+
+    def get_phases(self) -> Phases:
+        return self.phases
 
     def revert_history(self, dl_lower: int, dl_upper: int):
         """
-        Removes all implied nodes and branching nodes NOT INCLUDING dl_from, UP TO AND INCLUDING dl_to
-        Also reverts all symbols to their unassigned state, if any.
-        ALso removes all nodes in children list which have been deleted.
-        Also reverts the model.
+        Removes all implied and branching assignments NOT INCLUDING dl_lower, UP TO AND INCLUDING dl_upper.
+        Only the suffix of the trail above dl_lower is visited: those variables are reverted to their unassigned
+        state in the model and in the unassigned symbols, their last value is saved if phases are kept.
+        Pending propagations all belong to reverted levels, watched literals need no update when backtracking.
         """
         assert dl_lower <= dl_upper
-        # range(1,5): 1 2 3 4
-        logger.trace(f"Reverting History from {dl_lower} to {dl_upper}")
-        logger.trace(f"Graph {self.implication_graph}")
-        logger.trace(f"Unasgn Sbls {self.unassigned_symbols}")
-        logger.trace(f"History {self.history}")
-        logger.trace(f"Model {self.model}")
-        for i in range(dl_lower + 1, dl_upper + 1):
-            q = self.history.get_history_at_lvl(i)
-            while len(q) > 0:
-                sbl = q.popleft()
-                self.implication_graph.pop(sbl)
-                self.sbls_mark_unassigned(sbl)
-            self.history.del_history_at_lvl(i)
-        # removes all nodes in children list which have been deleted.
-        symbols_left = set(self.implication_graph.keys())
-        for node in self.implication_graph.values():
-            node.revert_children(to_keep=symbols_left)
-        # revert model
-        self.model.revert_model(to_keep=symbols_left)
-        logger.trace(f"Reverted History from {dl_lower} to {dl_upper}")
-        logger.trace(f"New Graph {self.implication_graph}")
-        logger.trace(f"New Unasgn Sbls {self.unassigned_symbols}")
-        logger.trace(f"New History {self.history}")
-        logger.trace(f"New Model {self.model}")
+        if dl_lower >= len(self.trail_lim):
+            return
+        start = self.trail_lim[dl_lower]
+        if logger.isEnabledFor(logging.TRACE):
+            logger.trace(f"Reverting trail from {dl_upper} to {dl_lower}: {self.trail[start:]}")
+        if self.scores is not None:
+            for lit in self.trail[start:]:
+                self.scores.on_unassign(lit)
+        unassigned = [lit >> 1 for lit in self.trail[start:]]
+        for var in unassigned:
+            self.sbls_mark_unassigned(var)
+        if self.vsids is not None:
+            for var in unassigned:
+                self.vsids.insert(var)
+        if self.phases is not None:
+            values = self.model.values
+            for var in unassigned:
+                self.phases.save(var, values[var])
+        self.model.revert_model(unassigned)
+        del self.trail[start:]
+        del self.trail_lim[dl_lower:]
+        self.qhead = len(self.trail)
+
+    def assign(self, lit: int, val: bool, antecedent: Clause, dl: int):
+        """
+        Assigns val to lit in the model, records it on the trail and marks its variable assigned.
+        """
+        self.model.extend(lit, val, dl, antecedent)
+        self.add_graph_node(lit, val, antecedent, dl)
+        self.sbls_mark_assigned(lit >> 1)
+        if self.scores is not None:
+            self.scores.on_assign(lit if val else lit ^ 1)
+
+    def has_pending_propagation(self) -> bool:
+        return self.qhead < len(self.trail)
+
+    # Returns the next literal made TRUE whose watchers should be visited.
+    def next_propagation(self) -> int:
+        lit = self.trail[self.qhead]
+        self.qhead += 1
+        return lit
+
+    def clear_propagation(self):
+        self.qhead = len(self.trail)
+
+    # Returns the variables assigned at decision level dl, in assignment order.
+    def get_history(self, dl: int) -> List[int]:
+        start = 0 if dl == 0 else self.trail_lim[dl - 1]
+        end = len(self.trail) if dl >= len(self.trail_lim) else self.trail_lim[dl]
+        return [lit >> 1 for lit in self.trail[start:end]]
+
+    def build_implication_graph(self) -> Dict[int, 'ImplicationGraphNode']:
+        """
+        Builds the explicit implication graph from the trail, for debugging and export only.
+        variable (int) -> ImplicationGraphNode
+        """
+        graph = {}
+        for lit in self.trail:
+            var = lit >> 1
+            antecedent = self.model.reason[var]
+            node = ImplicationGraphNode(var, not lit & 1, self.model.level[var], antecedent)
+            for parent_var in self.get_graph_parent_symbols(var):
+                if parent_var in graph:
+                    node.add_parent(graph[parent_var])
+                    graph[parent_var].add_child(node)
+            graph[var] = node
+        return graph
 
     def get_model_summary(self) -> str:
         return self.model.shorten()
@@ -143,11 +227,8 @@ class StateManager:
     def get_model_clause_status(self, c: Clause) -> bool:
         return self.model.get_clause_status(c)
 
-    def extend_model(self, s: Symbol, val: bool):
-        self.model.extend(s, val)
-
-    def get_history(self, dl: int):
-        return self.history.get_history_at_lvl(dl)
+    def extend_model(self, lit: int, val: bool):
+        self.model.extend(lit, val)
 
     def get_model(self) -> Model:
         return self.model
@@ -155,19 +236,19 @@ class StateManager:
     def __eq__(self, other):
         return self.unassigned_symbols == other.unassigned_symbols and\
                 self.model == other.model and\
-                self.history == other.history and\
-                self.implication_graph == other.implication_graph
+                self.trail == other.trail and\
+                self.trail_lim == other.trail_lim
 
 class ImplicationGraphNode:
     @classmethod
-    def from_values(cls, s: Symbol, val: bool, dl: int, antecedent: Clause, p: list, c: list):
-        return ImplicationGraphNode(s, val, dl, antecedent, p, c)
+    def from_values(cls, var: int, val: bool, dl: int, antecedent: Clause, p: list, c: list):
+        return ImplicationGraphNode(var, val, dl, antecedent, p, c)
 
-    def __init__(self, s: Symbol, val: bool, dl: int, antecedent: Clause, p: List['ImplicationGraphNode']=None, c: List['ImplicationGraphNode']=None):
+    def __init__(self, var: int, val: bool, dl: int, antecedent: Clause, p: List['ImplicationGraphNode']=None, c: List['ImplicationGraphNode']=None):
         self.parents = [] if p is None else p
         self.children = [] if c is None else c
         self.antecedent = antecedent # Clause
-        self.symbol = s
+        self.symbol = var
         self.value = val
         self.level = dl
 
@@ -177,9 +258,6 @@ class ImplicationGraphNode:
     def add_child(self, node: 'ImplicationGraphNode'):
         self.children.append(node)
 
-    def revert_children(self, to_keep: set):
-        self.children = [x for x in self.children if x.symbol in to_keep]
-
     def get_parents(self):
         return self.parents
 
@@ -193,39 +271,3 @@ class ImplicationGraphNode:
         children = list(map(lambda x: f"{x.symbol}",self.children))
         return f"[{self.symbol} {self.value} Lvl:{self.level} "\
                f"A:{self.antecedent} P:{parents} C:{children}]"
-
-class History:
-    """
-    Records the symbols selected (branching, or implied)
-    """
-    @classmethod
-    def from_values(cls, d: defaultdict):
-        return History(d)
-
-    def __init__(self, history:defaultdict=None):
-        # dl (int) -> deque[Symbol (only positive)]
-        # makes it easier to know which history to delete when we backtrack later.
-        self.history = defaultdict(deque) if history is None else history
-
-    def add_history(self, dl: int, s: Symbol):
-        assert s.is_pos, f"add_history: {s} is not positive"  # simplify implementation
-        self.history[dl].append(s)
-
-    def get_history_at_lvl(self, dl: int) -> deque:
-        assert dl in self.history, f"get_history_queue: level {dl} not in history"
-        return self.history[dl]
-
-    def del_history_at_lvl(self, dl: int):
-        self.history.pop(dl)
-
-    def __iter__(self):
-        return self.history.__iter__()
-
-    def __repr__(self):
-        return self.history.__repr__()
-
-    def __len__(self):
-        return self.history.__len__()
-
-    def __eq__(self, other):
-        return self.history == other.history
\ No newline at end of file
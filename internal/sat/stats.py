@@ -1,21 +1,153 @@
-import time
+import json, time
 
+# output formats of the statistics
+STATS_FORMATS = ("TEXT", "JSON")
+# upper bounds of the histogram buckets of the LBD and size of learnt clauses, the last bucket has no bound
+BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
 
 class Stats:
+    """
+    Search statistics. The solver only updates them if it was given a Stats, and each update is a few additions:
+    without --stats, nothing is counted. Averages, rates and histogram buckets are computed when reported.
+    """
     def __init__(self):
         self.branching_count = 0
+        self.conflict_count = 0
+        self.propagation_count = 0
+        self.restart_count = 0
+        self.learnt_count = 0
+        self.deleted_count = 0
+        self.minimized_count = 0
+        self.simplified_count = 0
+        # learnt clauses among the clauses removed at level 0
+        self.simplified_learnt_count = 0
+        self.exported_count = 0
+        self.imported_count = 0
+        # imported clauses added to the learnt clauses, the others were TRUE at level 0
+        self.imported_learnt_count = 0
+        self.max_level = 0
+        # sum of the decision levels of the conflicts
+        self.conflict_level_sum = 0
+        # LBD (and size) -> number of learnt clauses
+        self.lbd_histogram = {}
+        self.size_histogram = {}
+        self.parse_size = 0
+        self.parse_time = 0.0
         self.start_time = time.perf_counter()
 
-    def inc_bc(self):
+    # Counts a decision at decision level dl.
+    def inc_bc(self, dl: int=0):
         self.branching_count += 1
+        if dl > self.max_level:
+            self.max_level = dl
+
+    # Counts a conflict at decision level dl.
+    def inc_conflicts(self, dl: int=0):
+        self.conflict_count += 1
+        self.conflict_level_sum += dl
+
+    # Counts the literals assigned by unit propagation.
+    def inc_propagations(self, n: int):
+        self.propagation_count += n
+
+    def inc_restarts(self):
+        self.restart_count += 1
+
+    def inc_learnt(self, size: int=0, lbd: int=0):
+        self.learnt_count += 1
+        self.size_histogram[size] = self.size_histogram.get(size, 0) + 1
+        self.lbd_histogram[lbd] = self.lbd_histogram.get(lbd, 0) + 1
+
+    def inc_deleted(self, n: int):
+        self.deleted_count += n
+
+    def inc_minimized(self, n: int):
+        self.minimized_count += n
+
+    # Counts the clauses removed by root level simplification, learnt of them learnt clauses.
+    def inc_simplified(self, n: int, learnt: int=0):
+        self.simplified_count += n
+        self.simplified_learnt_count += learnt
+
+    # Counts the imported clauses added to the learnt clauses.
+    def inc_imported_learnt(self, n: int):
+        self.imported_learnt_count += n
+
+    # Records the number of clauses shared with other solvers so far.
+    def set_shared(self, exported: int, imported: int):
+        self.exported_count = exported
+        self.imported_count = imported
+
+    # Records the size in bytes of the parsed input and the time taken to parse it.
+    def set_parse(self, size: int, elapsed: float):
+        self.parse_size = size
+        self.parse_time = elapsed
+
+    # Returns the counts of the histogram by bucket, labelled by the values they hold.
+    @classmethod
+    def buckets(cls, histogram: dict) -> dict:
+        counts = {}
+        lower = 1
+        for upper in BUCKETS:
+            label = str(upper) if upper == lower else f"{lower}-{upper}"
+            counts[label] = sum(n for value, n in histogram.items() if lower <= value <= upper)
+            lower = upper + 1
+        counts[f"{lower}+"] = sum(n for value, n in histogram.items() if value >= lower)
+        return counts
+
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.start_time
+        kept = self.learnt_count + self.imported_learnt_count - self.deleted_count - self.simplified_learnt_count
+        return {
+            "parse_size": self.parse_size,
+            "parse_time": self.parse_time,
+            "elapsed": elapsed,
+            "decisions": self.branching_count,
+            "conflicts": self.conflict_count,
+            "propagations": self.propagation_count,
+            "restarts": self.restart_count,
+            "learnt": self.learnt_count,
+            "learnt_kept": kept,
+            "deleted": self.deleted_count,
+            "minimized": self.minimized_count,
+            "simplified": self.simplified_count,
+            "simplified_learnt": self.simplified_learnt_count,
+            "exported": self.exported_count,
+            "imported": self.imported_count,
+            "imported_learnt": self.imported_learnt_count,
+            "max_level": self.max_level,
+            "average_level": self.conflict_level_sum / self.conflict_count if self.conflict_count else 0.0,
+            "decisions_per_second": self.branching_count / elapsed if elapsed > 0 else 0.0,
+            "conflicts_per_second": self.conflict_count / elapsed if elapsed > 0 else 0.0,
+            "propagations_per_second": self.propagation_count / elapsed if elapsed > 0 else 0.0,
+            "lbd_histogram": {str(k): v for k, v in sorted(self.lbd_histogram.items())},
+            "size_histogram": {str(k): v for k, v in sorted(self.size_histogram.items())},
+        }
+
+    def json(self) -> str:
+        return json.dumps(self.to_dict())
 
     def string(self) -> str:
-        end_time = time.perf_counter()
+        d = self.to_dict()
+        throughput = self.parse_size / 1e6 / self.parse_time if self.parse_time > 0 else 0.0
+        lbd = ", ".join(f"{k}: {v}" for k, v in self.buckets(self.lbd_histogram).items())
+        size = ", ".join(f"{k}: {v}" for k, v in self.buckets(self.size_histogram).items())
 
         s = f"""
         ----- STATISTICS -----
-        Branching count: {self.branching_count}
-        Time elapsed: {end_time-self.start_time:0.4f} seconds
+        Parse: {self.parse_size / 1e6:0.2f} MB in {self.parse_time:0.4f} seconds ({throughput:0.2f} MB/s)
+        Branching count: {self.branching_count} ({d['decisions_per_second']:0.1f}/s)
+        Conflicts: {self.conflict_count} ({d['conflicts_per_second']:0.1f}/s)
+        Propagations: {self.propagation_count} ({d['propagations_per_second']:0.1f}/s)
+        Decision level: max {self.max_level}, average {d['average_level']:0.2f} at conflicts
+        Restart count: {self.restart_count}
+        Learnt clauses: {d['learnt_kept']} kept (learnt {self.learnt_count}, imported {self.imported_learnt_count}, deleted {self.deleted_count}, removed at level 0 {self.simplified_learnt_count})
+        Learnt LBD: {lbd}
+        Learnt size: {size}
+        Literals removed by minimization: {self.minimized_count}
+        Clauses removed at level 0: {self.simplified_count}
+        Shared clauses: exported {self.exported_count}, imported {self.imported_count}
+        Time elapsed: {d['elapsed']:0.4f} seconds
         ----------------------
         """
         return s
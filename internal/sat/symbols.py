@@ -1,40 +1,40 @@
-from collections import deque
-from internal.sat.symbol import Symbol
-
 class Symbols:
     """
-    Represents a collection of symbols, allows us to define branching strategy.
-    Only contains positive symbols.
+    Represents a collection of variables (dense ids, see internal.sat.literal), allows us to define branching strategy.
+    Kept in insertion order, so that variables can be picked in FIFO order.
     """
     @classmethod
-    def from_values(cls, d: deque):
-        return Symbols(d)
+    def from_values(cls, variables):
+        return Symbols(variables)
+
+    def __init__(self, variables=None):
+        # dict used as an ordered set: O(1) add/remove while keeping FIFO order
+        self.symbols = {} if variables is None else dict.fromkeys(variables)
 
-    def __init__(self, d: deque=None):
-        self.symbols = deque() if d is None else d # may change to set
+    def add(self, var: int):
+        self.symbols[var] = None
 
-    def add(self, s: Symbol):
-        pos = s.to_positive()
-        if pos not in self.symbols:
-            self.symbols.append(pos)
+    def pop_fifo(self) -> int:
+        var = next(iter(self.symbols))
+        del self.symbols[var]
+        return var
 
-    def pop_fifo(self):
-        return self.symbols.popleft()
+    def remove(self, var: int):
+        del self.symbols[var]
 
-    def remove(self, s: Symbol):
-        pos = s.to_positive()
-        self.symbols.remove(pos)
-        assert pos not in self.symbols # no duplicates should be present
+    # allow "if var in symbols"
+    def __contains__(self, var: int):
+        return var in self.symbols
 
     # allow "for s in symbols"
     def __iter__(self):
         return self.symbols.__iter__()
 
     def __repr__(self):
-        return self.symbols.__repr__()
+        return list(self.symbols).__repr__()
 
     def __len__(self):
         return self.symbols.__len__()
 
     def __eq__(self, other):
-        return self.symbols == other.symbols
\ No newline at end of file
+        return list(self.symbols) == list(other.symbols)
@@ -1,14 +1,41 @@
 import unittest
+import gzip, json, os, subprocess, sys, tempfile, time
+import multiprocessing as mp
 from internal.sat.formula import Formula
 from internal.sat.model import Model
 from internal.sat.clause import Clause
-from internal.sat.state_manager import StateManager, History, ImplicationGraphNode
+from internal.sat.state_manager import StateManager, ImplicationGraphNode
 from internal.sat.symbol import Symbol
+from internal.sat.literal import VariableMap, negate, var_of
 from internal.sat.symbols import Symbols
 from internal.sat.solver import Solver
+from internal.sat.vsids import VSIDS
+from internal.sat.literal_scores import LiteralScores
+from internal.sat.restart import LubyRestart, GlucoseRestart
+from internal.sat.learnt_db import LearntClauseDB
+from internal.sat.phase import Phases
+from internal.sat.sharing import ClauseExchange
+from internal.sat.lookahead import Lookahead
+from internal.sat.preprocessor import Preprocessor
+from internal.sat.enumeration import ModelEnumerator
+from internal.sat.proof import DratWriter
+from internal.sat.checker import DratChecker
+from internal.sat.stats import Stats
 from internal.sat.constants import TRUE, FALSE, UNASSIGNED
 from internal.utils.logger import Logger
-from collections import deque, defaultdict
+from internal.utils.parser import Parser
+from internal.utils.exceptions import ArgumentFormatError
+from internal.utils.utils import get_branch_heuristic, solve_cnf, check_proof
+from internal.utils.benchmark import run_benchmark, compare
+from internal.utils.parallel import solve_dir_parallel, solve_portfolio, portfolio_configs, solve_cubes
+from internal.utils.constants import *
+
+# configuration of main.py with the default flags, for the tests solving files
+CONFIG = {F_LOG_LEVEL: "NONE", F_STATS: False, F_STATS_FORMAT: "TEXT", F_PROGRESS: False, F_HEURISTIC: "DEFAULT",
+          F_RESTART: "NONE", F_REDUCE_BASE: 2000, F_REDUCE_INC: 300, F_MINIMIZE: "NONE", F_PHASE: "NONE", F_SEED: None,
+          F_SHARE_LBD: 0, F_SHARE_SIZE: 8, F_TIMEOUT: None, F_CUBE_DEPTH: 0,
+          F_PREPROCESS: False, F_PROBE: False, F_SIMPLIFY: False, F_ENUMERATE: "NONE", F_MAX_MODELS: 0,
+          F_PROJECT: None, F_PROOF: None, F_BINARY_PROOF: False, F_CHECK_PROOF: None}
 
 class TestSolver(unittest.TestCase):
     def setUp(self):
@@ -21,21 +48,22 @@ class TestSolver(unittest.TestCase):
         {1: TRUE, 2: TRUE, 3: TRUE, 4: TRUE}
         > True
         """
-        a = Symbol('a', TRUE)
-        b = Symbol('b', TRUE)
-        c = Symbol('c', TRUE)
-        d = Symbol('d', TRUE)
+        vm = VariableMap()
+        a = vm.to_literal(Symbol('a', TRUE))
+        b = vm.to_literal(Symbol('b', TRUE))
+        c = vm.to_literal(Symbol('c', TRUE))
+        d = vm.to_literal(Symbol('d', TRUE))
         c1 = Clause([a, b])
         c2 = Clause([c, d])
-        f = Formula([c1, c2])
-        m_assigned = Model.from_mapping({a: TRUE, a.negate(): FALSE,
-                                         b: TRUE, b.negate(): FALSE,
-                                         c: TRUE, c.negate(): FALSE,
-                                         d: TRUE, d.negate(): FALSE})
-        m_unassigned = Model.from_mapping({a: TRUE, a.negate(): FALSE,
-                                           b: TRUE, b.negate(): FALSE,
-                                           c: UNASSIGNED, c.negate(): UNASSIGNED,
-                                           d: TRUE, d.negate(): FALSE})
+        f = Formula([c1, c2], vm)
+        m_assigned = Model.from_mapping({a: TRUE, negate(a): FALSE,
+                                         b: TRUE, negate(b): FALSE,
+                                         c: TRUE, negate(c): FALSE,
+                                         d: TRUE, negate(d): FALSE})
+        m_unassigned = Model.from_mapping({a: TRUE, negate(a): FALSE,
+                                           b: TRUE, negate(b): FALSE,
+                                           c: UNASSIGNED, negate(c): UNASSIGNED,
+                                           d: TRUE, negate(d): FALSE})
         self.assertEqual(Solver.all_variables_assigned(f, m_assigned), True, "all variables should be assigned")
         self.assertEqual(Solver.all_variables_assigned(f, m_unassigned), False, "there should be unassigned variables")
 
@@ -45,231 +73,898 @@ class TestSolver(unittest.TestCase):
         Input:
         Formula:    w1 (-1,-4,5), w2 (-4,6), w3 (-5,-6,7), w4 (-7,8), w5 (-2,-7,9), w6 (-8,-9), w7(-8,9)
         Model:      { 1:True, 2:True, 3:True, 4:True, rest unassigned }
+        Trail:      [1, 2, 3, 4], each starting a decision level: trail_lim [0, 1, 2, 3]
         IG:         { 1:INode(1,True,1,None), 2:INode(2,True,2,None), 3:INode(3,True,3,None), 4:INode(4,True,4,None) }
-        History:    { 1:deque([1]), 2:deque([2]), 3:deque([3]), 4:deque([4])}
         Output:     w6 (the conflicting clause)
         """
         # Create symbols
-        x1 = Symbol("1", True)
-        x2 = Symbol("2", True)
-        x3 = Symbol("3", True)
-        x4 = Symbol("4", True)
-        x5 = Symbol("5", True)
-        x6 = Symbol("6", True)
-        x7 = Symbol("7", True)
-        x8 = Symbol("8", True)
-        x9 = Symbol("9", True)
+        vm = VariableMap()
+        x1 = vm.to_literal(Symbol("1", True))
+        x2 = vm.to_literal(Symbol("2", True))
+        x3 = vm.to_literal(Symbol("3", True))
+        x4 = vm.to_literal(Symbol("4", True))
+        x5 = vm.to_literal(Symbol("5", True))
+        x6 = vm.to_literal(Symbol("6", True))
+        x7 = vm.to_literal(Symbol("7", True))
+        x8 = vm.to_literal(Symbol("8", True))
+        x9 = vm.to_literal(Symbol("9", True))
         # Create clauses
-        w1 = Clause([x1.negate(),x4.negate(),x5])
-        w2 = Clause([x4.negate(),x6])
-        w3 = Clause([x5.negate(),x6.negate(),x7])
-        w4 = Clause([x7.negate(),x8])
-        w5 = Clause([x2.negate(),x7.negate(),x9])
-        w6 = Clause([x8.negate(),x9.negate()])
-        w7 = Clause([x8.negate(),x9])
+        w1 = Clause([negate(x1),negate(x4),x5])
+        w2 = Clause([negate(x4),x6])
+        w3 = Clause([negate(x5),negate(x6),x7])
+        w4 = Clause([negate(x7),x8])
+        w5 = Clause([negate(x2),negate(x7),x9])
+        w6 = Clause([negate(x8),negate(x9)])
+        w7 = Clause([negate(x8),x9])
         # Create formula
-        f = Formula([w1,w2,w3,w4,w5,w6,w7])
-        # Lower level integration tests: model, symbols, history (no test for implication graph)
-        m_actual = Model.from_symbols([x1,x2,x3,x4,x5,x6,x7,x8,x9])
-        m_actual.extend(x1,TRUE)
-        m_actual.extend(x2,TRUE)
-        m_actual.extend(x3,TRUE)
-        m_actual.extend(x4,TRUE)
-        m_expected = Model.from_mapping({x1:TRUE,x1.negate():FALSE,
-                                x2:TRUE,x2.negate():FALSE,
-                                x3:TRUE,x3.negate():FALSE,
-                                x4:TRUE,x4.negate():FALSE,
-                                x5:UNASSIGNED,x5.negate():UNASSIGNED,
-                                x6:UNASSIGNED,x6.negate():UNASSIGNED,
-                                x7:UNASSIGNED,x7.negate():UNASSIGNED,
-                                x8:UNASSIGNED,x8.negate():UNASSIGNED,
-                                x9:UNASSIGNED,x9.negate():UNASSIGNED})
+        f = Formula([w1,w2,w3,w4,w5,w6,w7], vm)
+        # Lower level integration tests: model, symbols
+        m_actual = Model.from_symbols(Symbols.from_values(range(9)))
+        m_actual.extend(x1,TRUE,1)
+        m_actual.extend(x2,TRUE,2)
+        m_actual.extend(x3,TRUE,3)
+        m_actual.extend(x4,TRUE,4)
+        m_expected = Model.from_mapping({x1:TRUE,negate(x1):FALSE,
+                                x2:TRUE,negate(x2):FALSE,
+                                x3:TRUE,negate(x3):FALSE,
+                                x4:TRUE,negate(x4):FALSE,
+                                x5:UNASSIGNED,negate(x5):UNASSIGNED,
+                                x6:UNASSIGNED,negate(x6):UNASSIGNED,
+                                x7:UNASSIGNED,negate(x7):UNASSIGNED,
+                                x8:UNASSIGNED,negate(x8):UNASSIGNED,
+                                x9:UNASSIGNED,negate(x9):UNASSIGNED})
         self.assertEqual(m_actual, m_expected)
         sbls_expected = Symbols() # unassigned symbols
-        sbls_expected.add(x5)
-        sbls_expected.add(x6)
-        sbls_expected.add(x7)
-        sbls_expected.add(x8)
-        sbls_expected.add(x9)
-        sbls_actual = Symbols.from_values(deque([x5,x6,x7,x8,x9]))
+        sbls_expected.add(var_of(x5))
+        sbls_expected.add(var_of(x6))
+        sbls_expected.add(var_of(x7))
+        sbls_expected.add(var_of(x8))
+        sbls_expected.add(var_of(x9))
+        sbls_actual = Symbols.from_values([var_of(x) for x in [x5,x6,x7,x8,x9]])
         self.assertEqual(sbls_actual, sbls_expected)
-        implication_graph = {
-            x1: ImplicationGraphNode.from_values(x1, TRUE, 1, None, [], []),
-            x2: ImplicationGraphNode.from_values(x2, TRUE, 2, None, [], []),
-            x3: ImplicationGraphNode.from_values(x3, TRUE, 3, None, [], []),
-            x4: ImplicationGraphNode.from_values(x4, TRUE, 4, None, [], []),
-        }
-        history_actual = History()
-        history_actual.add_history(1, x1)
-        history_actual.add_history(2, x2)
-        history_actual.add_history(3, x3)
-        history_actual.add_history(4, x4)
-        history_expected = History.from_values(defaultdict(
-            deque,
-            {
-                1: deque([x1]),
-                2: deque([x2]),
-                3: deque([x3]),
-                4: deque([x4]),
-            }
-        ))
-        self.assertEqual(history_actual, history_expected)
         # Higher level integration tests (using API from StateManager)
-        sm_actual = StateManager(Symbols.from_values(deque([x1,x2,x3,x4,x5,x6,x7,x8,x9])), m_actual)
-        sm_actual.add_graph_node(x1, TRUE, None, 1) # also updates history
+        sm_actual = StateManager(Symbols.from_values(range(9)), m_actual)
+        sm_actual.add_graph_node(x1, TRUE, None, 1) # records the trail
         sm_actual.add_graph_node(x2, TRUE, None, 2)
         sm_actual.add_graph_node(x3, TRUE, None, 3)
         sm_actual.add_graph_node(x4, TRUE, None, 4)
-        sm_actual.sbls_mark_assigned(x1)
-        sm_actual.sbls_mark_assigned(x2)
-        sm_actual.sbls_mark_assigned(x3)
-        sm_actual.sbls_mark_assigned(x4)
-        sm_expected = StateManager.from_values(sbls_expected,m_expected,implication_graph,history_expected)
+        sm_actual.sbls_mark_assigned(var_of(x1))
+        sm_actual.sbls_mark_assigned(var_of(x2))
+        sm_actual.sbls_mark_assigned(var_of(x3))
+        sm_actual.sbls_mark_assigned(var_of(x4))
+        sm_expected = StateManager.from_values(sbls_expected,m_expected,[x1,x2,x3,x4],[0,1,2,3])
         self.assertEqual(sm_actual, sm_expected)
+        # the implication graph is only built on demand
+        implication_graph = {
+            var_of(x1): ImplicationGraphNode.from_values(var_of(x1), TRUE, 1, None, [], []),
+            var_of(x2): ImplicationGraphNode.from_values(var_of(x2), TRUE, 2, None, [], []),
+            var_of(x3): ImplicationGraphNode.from_values(var_of(x3), TRUE, 3, None, [], []),
+            var_of(x4): ImplicationGraphNode.from_values(var_of(x4), TRUE, 4, None, [], []),
+        }
+        self.assertEqual(sm_actual.build_implication_graph(), implication_graph)
 
         conf_clause = Solver.unit_propagate(f, sm_actual, 4)
         self.assertEqual(conf_clause, w6)
 
         # EXTRA: test conflict analysis
         learnt_clause, bt_lvl = Solver.conflict_analysis(conf_clause, sm_actual, 4)
-        self.assertEqual(learnt_clause, Clause([x2.negate(), x7.negate()]))
+        self.assertEqual(learnt_clause, Clause([negate(x2), negate(x7)]))
         self.assertEqual(bt_lvl, 2)
+        # seen marks are cleared for the next analysis
+        self.assertEqual(sum(sm_actual.seen), 0)
 
         # EXTRA: backtrack to level 2 with magic number 4 (current dl)
         l1 = len(sm_actual.unassigned_symbols)
-        l2 = len(sm_actual.history.get_history_at_lvl(3))
-        l3 = len(sm_actual.history.get_history_at_lvl(4))
+        l2 = len(sm_actual.get_history(3))
+        l3 = len(sm_actual.get_history(4))
         Solver.backtrack(sm_actual, bt_lvl, 4)
         l4 = len(sm_actual.unassigned_symbols)
-        self.assertTrue(4 not in sm_actual.history)
-        self.assertTrue(3 not in sm_actual.history)
-        self.assertTrue(2 in sm_actual.history)
+        self.assertEqual(sm_actual.get_decision_level(), 2)
+        self.assertEqual(sm_actual.trail, [x1, x2])
+        self.assertEqual(m_actual[x3], UNASSIGNED)
         self.assertTrue(l4 == l1 + l2 + l3)
 
     def test_pick_branching_variable(self):
         symbols = Symbols() # unassigned symbols
-        x1 = Symbol("1", True)
-        x2 = Symbol("2", True)
-        x3 = Symbol("3", True)
-        symbols.add(x1)
-        symbols.add(x2)
-        symbols.add(x3)
-        implication_graph = {}
-        history = History()
-        model = Model({})
-        sm = StateManager.from_values(symbols, model, implication_graph, history)
-        sbl, val = Solver.pick_branching_variable_update_state(sm, 1)
+        vm = VariableMap()
+        x1 = vm.to_literal(Symbol("1", True))
+        x2 = vm.to_literal(Symbol("2", True))
+        x3 = vm.to_literal(Symbol("3", True))
+        symbols.add(var_of(x1))
+        symbols.add(var_of(x2))
+        symbols.add(var_of(x3))
+        model = Model.from_symbols(symbols)
+        sm = StateManager.from_values(symbols, model, [], [])
+        fifo = lambda state, formula: state.sbls_get_unassigned_sbl_fifo()
+        sbl, val = Solver.pick_branching_variable_update_state(sm, 1, fifo, None)
         self.assertTrue(sbl == x1 or sbl == x2 or sbl == x3)
+        # the model is extended with the branching assignment
+        self.assertEqual(model[sbl], val)
         self.assertTrue(val is TRUE or val is FALSE)
         # one symbol should have been removed from unassigned symbols
         self.assertTrue(len(sm.unassigned_symbols) == 2)
-        # implication graph and history should be updated with branching variable
-        self.assertTrue(len(sm.history) == 1)
-        self.assertTrue(len(sm.implication_graph) == 1)
+        # trail should be updated with branching variable, opening decision level 1
+        self.assertTrue(len(sm.trail) == 1)
+        self.assertTrue(sm.get_decision_level() == 1)
 
     def test_unsatisfiable(self):
         # Unsatisfiable formula from https://www.youtube.com/watch?v=DIcRFQ2xzlA&t=369s
-        a = Symbol("a", TRUE)
-        b = Symbol("b", TRUE)
-        c = Symbol("c", TRUE)
-        d = Symbol("d", TRUE)
-        c1 = Clause([a.negate(),b.negate(),c])
-        c2 = Clause([a,b.negate(),c])
-        c3 = Clause([c.negate(),d])
-        c4 = Clause([c.negate(),d.negate()])
-        c5 = Clause([a.negate(),c,d])
-        c6 = Clause([a.negate(),b,d.negate()])
-        c7 = Clause([b,c,d.negate()])
+        vm = VariableMap()
+        a = vm.to_literal(Symbol("a", TRUE))
+        b = vm.to_literal(Symbol("b", TRUE))
+        c = vm.to_literal(Symbol("c", TRUE))
+        d = vm.to_literal(Symbol("d", TRUE))
+        c1 = Clause([negate(a),negate(b),c])
+        c2 = Clause([a,negate(b),c])
+        c3 = Clause([negate(c),d])
+        c4 = Clause([negate(c),negate(d)])
+        c5 = Clause([negate(a),c,d])
+        c6 = Clause([negate(a),b,negate(d)])
+        c7 = Clause([b,c,negate(d)])
         c8 = Clause([a,b,d])
-        f = Formula([c1,c2,c3,c4,c5,c6,c7,c8])
-        m = Model.from_mapping({
-            a:FALSE,a.negate():TRUE,
-            b:TRUE,b.negate():FALSE,
-            c:UNASSIGNED,c.negate():UNASSIGNED,
-            d:UNASSIGNED,d.negate():UNASSIGNED
-        })
-        s = Symbols()
-        s.add(c)
-        s.add(d)
-        implication_graph = {
-            a: ImplicationGraphNode(a.negate(),TRUE,1,None),
-            b: ImplicationGraphNode(b,TRUE,2,None)
-        }
-        history = History()
-        history.add_history(1, a)
-        history.add_history(2, b)
-        state = StateManager.from_values(s,m,implication_graph,history)
+        f = Formula([c1,c2,c3,c4,c5,c6,c7,c8], vm)
+        # assignments go through the state so that they are queued for propagation
+        state = StateManager(Symbols.from_values(range(4)), Model.from_symbols(Symbols.from_values(range(4))))
+        state.assign(a, FALSE, None, 1)
+        state.assign(b, TRUE, None, 2)
         dl = 2
         conf_clause = Solver.unit_propagate(f,state,2)
-        self.assertEqual(conf_clause, Clause([c.negate(),d.negate()]))
+        self.assertEqual(conf_clause, Clause([negate(c),negate(d)]))
 
         # conflict clause [-c, -d], now conflict analyze
         learnt, lvl = Solver.conflict_analysis(conf_clause, state, dl)
-        self.assertEqual(learnt, Clause([c.negate()]))
+        self.assertEqual(learnt, Clause([negate(c)]))
         self.assertEqual(lvl, 0)
 
         Solver.backtrack(state, lvl, dl)
         f.add_learnt_clause(learnt)
         dl = lvl # 0
-        self.assertTrue(len(state.history) == 0)
-        self.assertTrue(len(state.implication_graph) == 0)
+        self.assertTrue(state.get_decision_level() == 0)
+        self.assertTrue(len(state.trail) == 0)
         self.assertTrue(len(state.unassigned_symbols) == 4)
 
-        state.add_graph_node(c.negate(), TRUE, None, 0) # also updates history
-        state.add_graph_node(a.negate(), TRUE, None, 1)
-        state.sbls_mark_assigned(a)
-        state.sbls_mark_assigned(c)
-        m = Model.from_mapping({
-            a:FALSE,a.negate():TRUE,
-            b:UNASSIGNED,b.negate():UNASSIGNED,
-            c:FALSE,c.negate():TRUE,
-            d:UNASSIGNED,d.negate():UNASSIGNED
-        })
-        state.model = m
+        state.assign(c, FALSE, learnt, 0) # learnt unit clause is asserted at level 0
+        self.assertEqual(Solver.unit_propagate(f,state,dl), None)
+        state.assign(a, FALSE, None, 1)
         dl = 1 # Assume we're at dl 1 now
         conf_clause = Solver.unit_propagate(f,state,dl)
         self.assertEqual(conf_clause, Clause([a,b,d]))
 
         learnt, lvl = Solver.conflict_analysis(conf_clause,state,dl)
-        self.assertEqual(learnt, Clause([a,c]))
-        self.assertEqual(lvl, 0) # second highest dl: a = 1, c = 0
+        # -c is FALSE at level 0, it is left out of [a, c]
+        self.assertEqual(learnt, Clause([a]))
+        self.assertEqual(lvl, 0)
 
         Solver.backtrack(state,lvl,dl) # backtrack to dl 0
         f.add_learnt_clause(learnt)
         dl = lvl # 0
-        self.assertTrue(len(state.history) == 1)
-        self.assertTrue(len(state.implication_graph) == 1)
+        self.assertTrue(state.get_decision_level() == 0)
+        self.assertTrue(len(state.trail) == 1)
         self.assertTrue(len(state.unassigned_symbols) == 3)
-        m = Model.from_mapping({
-            a:UNASSIGNED,a.negate():UNASSIGNED,
-            b:UNASSIGNED,b.negate():UNASSIGNED,
-            c:FALSE,c.negate():TRUE,
-            d:UNASSIGNED,d.negate():UNASSIGNED
-        })
-        state.model = m
+        # asserting symbol of the learnt clause comes first
+        self.assertEqual(learnt.lits[0], a)
+        state.assign(a, TRUE, learnt, 0)
 
         conf_clause = Solver.unit_propagate(f,state,dl)
-        self.assertEqual(conf_clause, Clause([a.negate(),b,d.negate()]))
+        self.assertEqual(state.get_model().get_clause_status(conf_clause), FALSE)
 
         # Formula is unsatisfiable
         learnt, lvl = Solver.conflict_analysis(conf_clause,state,dl)
         self.assertEqual(lvl, -1)
 
+    def test_learnt_level_zero(self):
+        """
+        [x], [-x, -y, z], [-x, -y, -z]
+        x is TRUE at level 0, deciding y at level 1 conflicts: the learnt clause is [-y], not [-y, -x].
+        """
+        vm = VariableMap()
+        x = vm.to_literal(Symbol("x", TRUE))
+        y = vm.to_literal(Symbol("y", TRUE))
+        z = vm.to_literal(Symbol("z", TRUE))
+        f = Formula([Clause([negate(x), negate(y), z]), Clause([negate(x), negate(y), negate(z)])], vm)
+        state = StateManager(Symbols.from_values(range(3)), Model.from_symbols(Symbols.from_values(range(3))))
+        state.assign(x, TRUE, Clause([x]), 0)
+        self.assertIsNone(Solver.unit_propagate(f, state, 0))
+        state.assign(y, TRUE, None, 1)
+        conf_clause = Solver.unit_propagate(f, state, 1)
+        self.assertIsNotNone(conf_clause)
+
+        learnt, lvl = Solver.conflict_analysis(conf_clause, state, 1)
+        self.assertEqual(learnt, Clause([negate(y)]))
+        self.assertEqual(lvl, 0)
+        self.assertEqual(Solver.compute_lbd(learnt, state), 1)
+        self.assertFalse(any(state.seen))
+
+    def test_watched_literals(self):
+        """
+        [a, b, c], [-a, b]
+        Assigning a visits only clauses watching -a, watches are not reverted on backtrack.
+        """
+        vm = VariableMap()
+        a = vm.to_literal(Symbol("a", TRUE))
+        b = vm.to_literal(Symbol("b", TRUE))
+        c = vm.to_literal(Symbol("c", TRUE))
+        c1 = Clause([a, b, c])
+        c2 = Clause([negate(a), b])
+        f = Formula([c1, c2], vm)
+        self.assertEqual(f.get_watches(a), [c1])
+        self.assertEqual(f.get_watches(negate(a)), [c2])
+        self.assertEqual(f.get_watches(c), [])
+        state = StateManager(Symbols.from_values(range(3)), Model.from_symbols(Symbols.from_values(range(3))))
+        state.assign(a, TRUE, None, 1)
+        self.assertEqual(Solver.unit_propagate(f, state, 1), None)
+        # -a was falsified, so [-a, b] became unit
+        self.assertEqual(state.get_model()[b], TRUE)
+        self.assertEqual(state.get_graph_antecedent(var_of(b)), c2)
+        self.assertFalse(state.has_pending_propagation())
+
+        Solver.backtrack(state, 0, 1)
+        state.assign(a, FALSE, None, 1)
+        state.assign(b, FALSE, None, 2)
+        self.assertEqual(Solver.unit_propagate(f, state, 2), None)
+        # [a, b, c] moved its watch from a/b to c and propagated it
+        self.assertEqual(state.get_model()[c], TRUE)
+        self.assertTrue(c1 in f.get_watches(c))
+
+    def test_model(self):
+        """
+        Values, levels and reasons are stored per variable, revert only touches the given variables.
+        """
+        vm = VariableMap()
+        a = vm.to_literal(Symbol("a", TRUE))
+        b = vm.to_literal(Symbol("b", TRUE))
+        c = vm.to_literal(Symbol("c", TRUE))
+        reason = Clause([negate(a), negate(b)])
+        m = Model.from_symbols(Symbols.from_values(range(3)))
+        m.extend(a, TRUE, 1)
+        m.extend(negate(b), TRUE, 1, reason)
+        self.assertEqual((m[a], m[negate(a)]), (TRUE, FALSE))
+        self.assertEqual((m[b], m[negate(b)]), (FALSE, TRUE))
+        self.assertEqual((m[c], m[negate(c)]), (UNASSIGNED, UNASSIGNED))
+        self.assertEqual(m.level[var_of(b)], 1)
+        self.assertEqual(m.reason[var_of(b)], reason)
+        self.assertEqual(m.get_clause_status(reason), TRUE)
+        self.assertEqual(m.get_clause_status(Clause([b, c])), UNASSIGNED)
+        self.assertEqual(m.get_clause_status(Clause([negate(a), b])), FALSE)
+        self.assertEqual(m, Model.from_mapping({a: TRUE, negate(b): TRUE, c: UNASSIGNED}))
+        m.revert_model([var_of(b)])
+        self.assertEqual((m[a], m[b]), (TRUE, UNASSIGNED))
+        self.assertEqual(m.reason[var_of(b)], None)
+        self.assertEqual(m.num_assigned, 1)
+
+    def test_vsids(self):
+        """
+        Bumped variables come out of the heap first, decay makes later bumps weigh more,
+        and variables can be reinserted after being picked.
+        """
+        vsids = VSIDS(4, decay=0.5)
+        vsids.bump(2)
+        vsids.decay()
+        vsids.bump(1) # bumped with twice the increment of variable 2
+        self.assertEqual(vsids.pop_max(), 1)
+        self.assertEqual(vsids.pop_max(), 2)
+        self.assertTrue(1 not in vsids)
+        vsids.insert(1)
+        vsids.insert(1) # no duplicates
+        self.assertEqual(len(vsids), 3)
+        self.assertEqual(vsids.pop_max(), 1)
+        vsids.bump(3)
+        self.assertEqual(vsids.pop_max(), 3)
+        self.assertEqual(vsids.pop_max(), 0)
+        self.assertEqual(vsids.pop_max(), -1)
+        # rescaling keeps the order of activities
+        vsids = VSIDS(2)
+        vsids.var_inc = 1e99
+        vsids.bump(0)
+        vsids.bump(1)
+        vsids.bump(1)
+        self.assertTrue(vsids.activity[1] < 1e100)
+        self.assertEqual(vsids.pop_max(), 1)
+
+    def test_literal_scores(self):
+        """
+        [a, b], [-a, b, c], [-b, -c]
+        Scores only count unresolved clauses, and are restored when the state is backtracked.
+        """
+        vm = VariableMap()
+        a = vm.to_literal(Symbol("a", TRUE))
+        b = vm.to_literal(Symbol("b", TRUE))
+        c = vm.to_literal(Symbol("c", TRUE))
+        c1 = Clause([a, b])
+        c2 = Clause([negate(a), b, c])
+        c3 = Clause([negate(b), negate(c)])
+        f = Formula([c1, c2, c3], vm)
+        m = Model.from_symbols(f.get_symbols())
+        scores = LiteralScores(f.get_clauses_with_learnt(), f.num_vars, m)
+        state = StateManager(Symbols.from_values(range(3)), m)
+        state.set_scores(scores)
+        self.assertEqual(scores.count[b], 2)
+        self.assertEqual(scores.jw[b], 0.25 + 0.125)
+        self.assertEqual(scores.moms[negate(b)], 1) # [a, b] and [-b, -c] are of minimum size
+        self.assertEqual(scores.count_var(var_of(a)), 2)
+
+        state.assign(b, FALSE, None, 1) # satisfies [-b, -c]
+        self.assertEqual(scores.moms[negate(b)], 0)
+        self.assertEqual(scores.count[b], 2)
+        state.assign(a, TRUE, None, 2) # satisfies [a, b]
+        self.assertEqual(scores.count[b], 1)
+        self.assertEqual(scores.jw_var(var_of(c)), 0.125)
+
+        Solver.backtrack(state, 0, 2)
+        self.assertEqual(scores.count[b], 2)
+        self.assertEqual(scores.moms[negate(b)], 1)
+        # learnt clauses are tracked as well, a smaller one changes the MOMS minimum size
+        scores.add_clause(Clause([c]))
+        self.assertEqual(scores.moms_var(var_of(b)), 0)
+        self.assertEqual(scores.moms[c], 1)
+
+    def test_restart(self):
+        """
+        Luby sequence 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8, scaled by the unit.
+        Glucose restarts once the recent LBDs are worse than the overall average.
+        """
+        self.assertEqual([LubyRestart.luby(i) for i in range(15)], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+        luby = LubyRestart(unit=2)
+        intervals = []
+        for _ in range(4):
+            conflicts = 0
+            while not luby.should_restart():
+                luby.on_conflict(1, 0)
+                conflicts += 1
+            luby.on_restart()
+            intervals.append(conflicts)
+        self.assertEqual(intervals, [2, 2, 4, 2])
+
+        glucose = GlucoseRestart(window_size=3)
+        for _ in range(10):
+            glucose.on_conflict(2, 0)
+        self.assertFalse(glucose.should_restart())
+        for _ in range(3):
+            glucose.on_conflict(10, 0)
+        self.assertTrue(glucose.should_restart())
+        glucose.on_restart()
+        self.assertFalse(glucose.should_restart())
+
+    def test_learnt_db(self):
+        """
+        The worse half of the learnt clauses is deleted: highest LBD first, then lowest activity.
+        Glue clauses and reasons of current assignments are kept.
+        """
+        vm = VariableMap()
+        a, b, c, d, e = [vm.to_literal(Symbol(x, TRUE)) for x in "abcde"]
+        formula = Formula([Clause([a, b, c, d, e])], vm)
+        model = Model(formula.num_vars)
+        db = LearntClauseDB(formula, first_reduce=2, reduce_inc=1)
+        glue = Clause([a, b, c])
+        locked = Clause([d, a, b])
+        worst = Clause([negate(a), b, c])
+        low_activity = Clause([negate(b), c, d])
+        high_activity = Clause([negate(c), d, e])
+        for clause, lbd in [(glue, 2), (locked, 3), (worst, 4), (low_activity, 3), (high_activity, 3)]:
+            db.add(clause, lbd)
+            formula.add_learnt_clause(clause)
+        db.bump(high_activity)
+        model.extend(d, TRUE, 1, locked)
+        db.decay()
+        self.assertFalse(db.should_reduce())
+        db.decay()
+        self.assertTrue(db.should_reduce())
+        deleted = db.reduce(model)
+        self.assertEqual([id(x) for x in deleted], [id(worst), id(low_activity)])
+        self.assertEqual([id(x) for x in formula.learnt_clist], [id(glue), id(locked), id(high_activity)])
+        self.assertNotIn(id(worst), [id(x) for x in formula.get_watches(negate(a))])
+        self.assertFalse(db.should_reduce())
+
+    def test_minimize(self):
+        """
+        a@1, b@1 implied by [b, -a], d@1 implied by [d, -b], c@2
+        learnt [-c, -a, -d]: -d is kept by local minimization, as -b is not in the clause,
+        but removed by recursive minimization since -b is itself implied by -a.
+        learnt [-c, -a, -b]: -b is removed by local minimization.
+        """
+        vm = VariableMap()
+        a, b, c, d = [vm.to_literal(Symbol(x, TRUE)) for x in "abcd"]
+        b_reason = Clause([b, negate(a)])
+        d_reason = Clause([d, negate(b)])
+        formula = Formula([b_reason, d_reason, Clause([negate(c), negate(a), negate(d)])], vm)
+        state = StateManager(formula.get_symbols(), Model(formula.num_vars))
+        state.assign(a, TRUE, None, 1)
+        state.assign(b, TRUE, b_reason, 1)
+        state.assign(d, TRUE, d_reason, 1)
+        state.assign(c, TRUE, None, 2)
+
+        learnt = Clause([negate(c), negate(a), negate(d)])
+        local, lvl = Solver.minimize(learnt, state, False)
+        self.assertEqual(local.lits, [negate(c), negate(a), negate(d)])
+        self.assertEqual(lvl, 1)
+        recursive, lvl = Solver.minimize(learnt, state, True)
+        self.assertEqual(recursive.lits, [negate(c), negate(a)])
+        self.assertEqual(lvl, 1)
+        local, lvl = Solver.minimize(Clause([negate(c), negate(a), negate(b)]), state, False)
+        self.assertEqual(local.lits, [negate(c), negate(a)])
+
+    def test_phases(self):
+        """
+        Phase saving remembers the values undone by backtracking, best-phase rephasing restores
+        the values of the largest conflict-free trail on restart.
+        """
+        vm = VariableMap()
+        a, b, c = [vm.to_literal(Symbol(x, TRUE)) for x in "abc"]
+        formula = Formula([Clause([a, b, c])], vm)
+        state = StateManager(formula.get_symbols(), Model(formula.num_vars))
+        phases = Phases(formula.num_vars, "BEST")
+        state.set_phases(phases)
+        # no saved phase yet: keep the polarity of the heuristic
+        self.assertEqual(phases.pick_phase(a, TRUE), (a, TRUE))
+        state.assign(a, FALSE, None, 1)
+        state.assign(b, TRUE, None, 2)
+        phases.on_decision(state.get_model().values, len(state.trail))
+        state.assign(c, FALSE, None, 3)
+        Solver.backtrack(state, 0, 3)
+        self.assertEqual(phases.pick_phase(a, TRUE), (a, FALSE))
+        self.assertEqual(phases.pick_phase(negate(c), TRUE), (c, FALSE))
+        # c is flipped, then a restart brings back the best phase of a and b only
+        state.assign(c, TRUE, None, 1)
+        state.assign(a, TRUE, None, 2)
+        Solver.backtrack(state, 0, 2)
+        phases.on_restart()
+        self.assertEqual(phases.pick_phase(a, TRUE), (a, FALSE))
+        self.assertEqual(phases.pick_phase(b, FALSE), (b, TRUE))
+        self.assertEqual(phases.pick_phase(c, FALSE), (c, TRUE))
+
+    def test_parser(self):
+        """
+        Clauses spanning lines or sharing one, comments, blank lines and the SATLIB trailer, gzip compressed.
+        """
+        cnf = b"c comment\np cnf 3 3\n1 -3\n0 2 3 -1 0\n\nc comment\n  -2\n 0\n%\n0\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.cnf.gz")
+            with gzip.open(path, "wb") as f:
+                f.write(cnf)
+            parser = Parser()
+            symbols, formula = parser.parse(path)
+        vm = formula.get_variables()
+        self.assertEqual(len(symbols), 3)
+        self.assertEqual([vm.to_symbols(c.lits) for c in formula.clist],
+                         [[Symbol("1", TRUE), Symbol("3", FALSE)],
+                          [Symbol("2", TRUE), Symbol("3", TRUE), Symbol("1", FALSE)],
+                          [Symbol("2", FALSE)]])
+        self.assertEqual(parser.size, len(cnf))
+
+    def test_solve_dir_parallel(self):
+        """
+        Results come back in the order of the files, a failing instance does not stop the batch.
+        """
+        config = dict(CONFIG)
+        config[F_HEURISTIC] = "VSIDS"
+        with tempfile.TemporaryDirectory() as tmp:
+            cnfs = [b"p cnf 2 2\n1 2 0\n-1 0\n", b"p cnf 1 1\n1 x! 0\n", b"p cnf 1 2\n1 0\n-1 0\n"]
+            filepaths = []
+            for i, cnf in enumerate(cnfs):
+                filepaths.append(os.path.join(tmp, f"{i}.cnf"))
+                with open(filepaths[-1], "wb") as f:
+                    f.write(cnf)
+            results = solve_dir_parallel(filepaths, config, 2)
+        self.assertEqual([r.filepath for r in results], filepaths)
+        self.assertEqual([r.status for r in results], ["SAT", "ERROR", "UNSAT"])
+
+    def test_portfolio(self):
+        """
+        Workers get different configurations and seeds, the first answer is returned.
+        """
+        config = dict(CONFIG)
+        configs = portfolio_configs(config, 3)
+        self.assertEqual([c[F_SEED] for c in configs], [0, 1, 2])
+        self.assertEqual(len(set((c[F_HEURISTIC], c[F_RESTART], c[F_PHASE]) for c in configs)), 3)
+        self.assertEqual(config[F_HEURISTIC], "DEFAULT")
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "unsat.cnf")
+            with open(filepath, "wb") as f:
+                f.write(b"p cnf 2 4\n1 2 0\n-1 2 0\n1 -2 0\n-1 -2 0\n")
+            result = solve_portfolio(filepath, config, 3)
+        self.assertEqual(result.status, "UNSAT")
+
+    def test_clause_exchange(self):
+        """
+        Only clauses under the LBD and size thresholds are exported, each clause is imported once.
+        """
+        inbox_a, inbox_b = mp.Queue(), mp.Queue()
+        a = ClauseExchange(inbox_a, [inbox_b], max_lbd=2, max_size=3)
+        b = ClauseExchange(inbox_b, [inbox_a], max_lbd=2, max_size=3)
+        a.export(Clause([0, 3, 4]), 2)
+        a.export(Clause([4, 3, 0]), 2) # same clause
+        a.export(Clause([0, 2, 5]), 3) # LBD too high
+        a.export(Clause([0, 2, 5, 7]), 1) # too long
+        self.assertEqual((a.exported, a.duplicates), (1, 1))
+        received = []
+        deadline = time.perf_counter() + 5
+        while not received and time.perf_counter() < deadline:
+            received = b.receive()
+        self.assertEqual(received, [([0, 3, 4], 2)])
+        # a clause already received is not sent back
+        b.export(Clause([3, 0, 4]), 2)
+        self.assertEqual((b.exported, b.imported, b.duplicates), (0, 1, 1))
+
+    def test_cubes(self):
+        """
+        Lookahead cubes cover every assignment not refuted, a SAT cube answers SAT, all UNSAT cubes answer UNSAT.
+        """
+        # (1 v 2) (-1 v 2) (1 v -2) (-1 v -2 v 3): -1 is a failed literal, 1 propagates everything
+        clauses = [[0, 2], [1, 2], [0, 3], [1, 3, 4]]
+        lookahead = Lookahead(Formula([Clause(c) for c in clauses]))
+        self.assertEqual(lookahead.cubes(2), [[0]])
+        self.assertEqual(lookahead.refuted, 1)
+        # (1 v 2 v 3) (-1 v -2 v -3): no propagation, 2 levels of splits
+        lookahead = Lookahead(Formula([Clause([0, 2, 4]), Clause([1, 3, 5])]))
+        cubes = lookahead.cubes(2)
+        self.assertEqual(len(cubes), 4)
+        self.assertEqual(len(set(c[0] >> 1 for c in cubes)), 1)
+        self.assertEqual(Lookahead(Formula([Clause([0]), Clause([1])])).cubes(2), [])
+
+        config = dict(CONFIG)
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "unsat.cnf")
+            with open(filepath, "wb") as f:
+                f.write(b"p cnf 3 8\n1 2 3 0\n1 2 -3 0\n1 -2 3 0\n1 -2 -3 0\n"
+                        b"-1 2 3 0\n-1 2 -3 0\n-1 -2 3 0\n-1 -2 -3 0\n")
+            self.assertEqual(solve_cubes(filepath, config, 2, 2), "UNSAT")
+            filepath = os.path.join(tmp, "sat.cnf")
+            with open(filepath, "wb") as f:
+                f.write(b"p cnf 3 2\n1 2 3 0\n-1 -2 0\n")
+            self.assertEqual(solve_cubes(filepath, config, 2, 2), "SAT")
+
+    def test_preprocessor(self):
+        """
+        [a, b], [a, b, c], [-a, c], [-b, c], [-c, d], [a, -b, d]
+        """
+        vm = VariableMap()
+        a, b, c, d = [vm.to_literal(Symbol(name, TRUE)) for name in "abcd"]
+        clauses = [[a, b], [a, b, c], [negate(a), c], [negate(b), c], [negate(c), d], [a, negate(b), d]]
+        f = Formula([Clause(list(lits)) for lits in clauses], vm)
+        preprocessor = Preprocessor(f)
+        self.assertEqual(preprocessor.subset(0, 1), -1) # [a, b] subsumes [a, b, c]
+        self.assertEqual(preprocessor.subset(0, 5), negate(b)) # and strengthens [a, -b, d] to [a, d]
+        self.assertIsNone(preprocessor.subset(2, 3))
+
+        g = preprocessor.simplify()
+        self.assertGreater(preprocessor.subsumed + preprocessor.strengthened, 0)
+        self.assertGreater(preprocessor.eliminated_vars, 0)
+        self.assertLess(len(g.clist), len(clauses))
+        self.assertEqual(g.num_vars, f.num_vars)
+        # any model of the simplified formula extends to a model of the input
+        m = Model.from_symbols(g.get_symbols())
+        solver = Solver(g.get_symbols(), g, m, get_branch_heuristic("DEFAULT"), None, CONFIG)
+        solver.set_preprocessor(preprocessor)
+        self.assertEqual(solver.cdcl()[0], TRUE)
+        for lits in clauses:
+            self.assertEqual(m.get_clause_status(Clause(lits)), TRUE)
+
+        # [a], [-a, b], [-b]
+        preprocessor = Preprocessor(Formula([Clause([a]), Clause([negate(a), b]), Clause([negate(b)])], vm))
+        self.assertEqual(preprocessor.simplify().clist[0].lits, [])
+        self.assertTrue(preprocessor.unsat)
+
+    def test_probing(self):
+        """
+        [-a, b], [-b, c], [-c, a], [a, d], [-d, e], [-e, g], [-d, -g], [c, e, f]
+        a, b and c are equivalent, d is a failed literal.
+        """
+        vm = VariableMap()
+        a, b, c, d, e, f, g = [vm.to_literal(Symbol(name, TRUE)) for name in "abcdefg"]
+        clauses = [[negate(a), b], [negate(b), c], [negate(c), a], [a, d], [negate(d), e], [negate(e), g],
+                   [negate(d), negate(g)], [c, e, f]]
+        self.assertEqual(sorted(len(component) for component in Preprocessor.components([[1], [2], [0], []])),
+                         [1, 3])
+        preprocessor = Preprocessor(Formula([Clause(list(lits)) for lits in clauses], vm), probe=True)
+        simplified = preprocessor.simplify()
+        self.assertEqual(preprocessor.substituted, 2)
+        self.assertEqual(preprocessor.failed, 1)
+        m = Model.from_symbols(simplified.get_symbols())
+        solver = Solver(simplified.get_symbols(), simplified, m, get_branch_heuristic("DEFAULT"), None, CONFIG)
+        solver.set_preprocessor(preprocessor)
+        self.assertEqual(solver.cdcl()[0], TRUE)
+        for lits in clauses:
+            self.assertEqual(m.get_clause_status(Clause(lits)), TRUE)
+        self.assertEqual(m[a], m[b])
+        self.assertEqual(m[b], m[c])
+
+    def test_simplify(self):
+        """
+        [a], [-a, b, c], [a, d], [-b, e], [-e, c]
+        At level 0, [a, d] is satisfied and -a stripped, then c is pure, which satisfies [b, c] and [-e, c],
+        then -b and e are pure.
+        """
+        vm = VariableMap()
+        a, b, c, d, e = [vm.to_literal(Symbol(name, TRUE)) for name in "abcde"]
+        f = Formula([Clause([a]), Clause([negate(a), b, c]), Clause([a, d]), Clause([negate(b), e]),
+                     Clause([negate(e), c])], vm)
+        config = dict(CONFIG)
+        config[F_SIMPLIFY] = True
+        m = Model.from_symbols(f.get_symbols())
+        solver = Solver(f.get_symbols(), f, m, get_branch_heuristic("DEFAULT"), None, config)
+        self.assertTrue(Solver.assign_unit_clauses(f, solver.state))
+        self.assertIsNone(Solver.unit_propagate(f, solver.state, 0))
+        self.assertTrue(solver.simplify())
+        self.assertEqual(f.clist, [])
+        self.assertEqual(m[c], TRUE)
+        self.assertEqual(m[d], UNASSIGNED)
+        self.assertEqual(solver.simplified_assigns, len(solver.state.trail))
+        # clauses are stripped of their FALSE literals
+        f = Formula([Clause([a]), Clause([negate(a), b, c]), Clause([negate(b), c]), Clause([b, negate(c)])], vm)
+        m = Model.from_symbols(f.get_symbols())
+        solver = Solver(f.get_symbols(), f, m, get_branch_heuristic("DEFAULT"), None, config)
+        Solver.assign_unit_clauses(f, solver.state)
+        Solver.unit_propagate(f, solver.state, 0)
+        self.assertTrue(solver.simplify())
+        self.assertEqual(f.clist, [Clause([b, c]), Clause([negate(b), c]), Clause([b, negate(c)])])
+        self.assertEqual(f.get_watches(negate(a)), [])
+        self.assertEqual(solver.cdcl()[0], TRUE)
+
+    def test_incremental(self):
+        """
+        [a, b], [-a, c], [-b, c], [c, d]
+        Assumptions, added clauses and failed assumption cores over successive calls.
+        """
+        vm = VariableMap()
+        a, b, c, d = [vm.to_literal(Symbol(name, TRUE)) for name in "abcd"]
+        f = Formula([Clause([a, b]), Clause([negate(a), c]), Clause([negate(b), c]), Clause([c, d])], vm)
+        config = dict(CONFIG)
+        config[F_HEURISTIC] = "VSIDS"
+        solver = Solver(f.get_symbols(), f, Model.from_symbols(f.get_symbols()), get_branch_heuristic("VSIDS"),
+                        None, config)
+        self.assertEqual(solver.solve([negate(c)]), FALSE)
+        self.assertEqual(solver.core, [negate(c)])
+        self.assertEqual(solver.solve([a, negate(d)]), TRUE)
+        self.assertIn(Symbol("a", TRUE), solver.sat_model)
+        self.assertIn(Symbol("c", TRUE), solver.sat_model)
+        self.assertEqual(solver.state.get_decision_level(), 0)
+
+        # -a v -b, then a and b together fail, d is not part of the core
+        self.assertTrue(solver.add_clause([negate(a), negate(b)]))
+        self.assertEqual(solver.solve([d, a, b]), FALSE)
+        self.assertEqual(sorted(solver.core), sorted([a, b]))
+        self.assertEqual(solver.solve([b]), TRUE)
+        self.assertIn(Symbol("a", FALSE), solver.sat_model)
+
+        # -c makes the formula unsatisfiable for good
+        solver.add_clause([negate(c)])
+        self.assertEqual(solver.solve(), FALSE)
+        self.assertEqual(solver.core, [])
+        self.assertFalse(solver.add_clause([d]))
+        with self.assertRaises(ArgumentFormatError):
+            solver.add_clause([8])
+
+    def test_enumeration(self):
+        """
+        [a, b], [-a, -b, c]: 5 models, 3 projected onto a and b.
+        """
+        vm = VariableMap()
+        a, b, c = [vm.to_literal(Symbol(name, TRUE)) for name in "abc"]
+        for mode in ["blocking", "backtrack"]:
+            f = Formula([Clause([a, b]), Clause([negate(a), negate(b), c])], vm)
+            enumerator = ModelEnumerator(Solver(f.get_symbols(), f, Model.from_symbols(f.get_symbols()),
+                                                get_branch_heuristic("DEFAULT"), None, CONFIG))
+            models = list(getattr(enumerator, mode)())
+            self.assertEqual(len(models), 5)
+            self.assertEqual(len(set(tuple(m) for m in models)), 5)
+            for m in models:
+                self.assertTrue(a in m or b in m)
+
+            f = Formula([Clause([a, b]), Clause([negate(a), negate(b), c])], vm)
+            enumerator = ModelEnumerator(Solver(f.get_symbols(), f, Model.from_symbols(f.get_symbols()),
+                                                get_branch_heuristic("DEFAULT"), None, CONFIG), [var_of(a), var_of(b)])
+            self.assertEqual(sorted(getattr(enumerator, mode)()), sorted([[a, b], [a, negate(b)], [negate(a), b]]))
+            # models are produced lazily
+            f = Formula([Clause([a, b]), Clause([negate(a), negate(b), c])], vm)
+            enumerator = ModelEnumerator(Solver(f.get_symbols(), f, Model.from_symbols(f.get_symbols()),
+                                                get_branch_heuristic("DEFAULT"), None, CONFIG))
+            models = getattr(enumerator, mode)(2)
+            next(models)
+            self.assertEqual(enumerator.solve_calls, 1)
+            self.assertEqual(len(list(models)), 1)
+
+    def test_proof(self):
+        """
+        Text and binary DRAT encodings, and the proof of an unsatisfiable formula ends with the empty clause.
+        """
+        vm = VariableMap.from_names(["1", "2", "130"])
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "proof.drat")
+            proof = DratWriter(filepath, vm)
+            proof.add([0, 3])
+            proof.delete([5])
+            proof.add([])
+            proof.close()
+            with open(filepath, "rb") as f:
+                self.assertEqual(f.read(), b"1 -2 0\nd -130 0\n0\n")
+            filepath = os.path.join(tmp, "proof.drat.gz")
+            proof = DratWriter(filepath, vm, binary=True, buffer_size=4)
+            proof.add([0, 3])
+            proof.delete([5])
+            proof.close()
+            with gzip.open(filepath, "rb") as f:
+                # 2 * 130 + 1 = 261 = 0b10_0000101
+                self.assertEqual(f.read(), b"a\x02\x05\x00d\x85\x02\x00")
+            self.assertEqual((proof.added, proof.deleted), (1, 1))
+            # other names are numbered above the DIMACS ones, without colliding with them
+            self.assertEqual(DratWriter.numbering(["a", "2", "b", "0", "02", "5"]), [6, 2, 7, 8, 9, 5])
+
+            filepath = os.path.join(tmp, "unsat.cnf")
+            with open(filepath, "wb") as f:
+                f.write(b"p cnf 2 4\n1 2 0\n-1 2 0\n1 -2 0\n-1 -2 0\n")
+            config = dict(CONFIG)
+            config[F_PROOF] = os.path.join(tmp, "unsat.drat")
+            self.assertFalse(solve_cnf(filepath, config))
+            with open(config[F_PROOF], "rb") as f:
+                self.assertEqual(f.read().splitlines()[-1], b"0")
+
+    def test_proof_refused(self):
+        """
+        A proof is only written by a single solver: main.py refuses --proof with several solvers or instances,
+        which would all write to the same file.
+        """
+        main = os.path.join(os.path.dirname(__file__), "..", "..", "main.py")
+        with tempfile.TemporaryDirectory() as tmp:
+            proof = os.path.join(tmp, "proof.drat")
+            for flags in (["-f", "uuf50-218/uuf50-01.cnf", "-pf", "2"], ["-d", "uuf50-218"],
+                          ["-f", "uuf50-218/uuf50-01.cnf", "-cd", "2"]):
+                result = subprocess.run([sys.executable, main, *flags, "-o", proof], capture_output=True, text=True)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn("--proof", result.stderr)
+                self.assertFalse(os.path.exists(proof))
+
+    def test_checker(self):
+        """
+        Proofs written by the solver are verified, in both formats. A lemma that is RAT but not RUP is accepted,
+        a proof of a satisfiable formula, or one whose lemmas do not follow, is not.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = "input/uuf50-218/uuf50-01.cnf"
+            config = dict(CONFIG)
+            config[F_HEURISTIC] = "VSIDS"
+            for binary in (False, True):
+                config[F_PROOF] = os.path.join(tmp, "uuf50.drat")
+                config[F_BINARY_PROOF] = binary
+                self.assertFalse(solve_cnf(filepath, config))
+                config[F_CHECK_PROOF] = config[F_PROOF]
+                self.assertTrue(check_proof(filepath, config))
+
+            cnf = os.path.join(tmp, "unsat.cnf")
+            with open(cnf, "wb") as f:
+                f.write(b"p cnf 2 4\n1 2 0\n-1 2 0\n1 -2 0\n-1 -2 0\n")
+            _, formula = Parser().parse(cnf)
+            drat = os.path.join(tmp, "proof.drat")
+            # 3 is a new variable, [3] is RAT as no clause contains -3, and [-3, 2] is RUP
+            with open(drat, "wb") as f:
+                f.write(b"3 0\n-3 2 0\nd 1 2 0\n2 0\n0\n")
+            checker = DratChecker(formula)
+            checker.read_proof(drat)
+            self.assertTrue(checker.check())
+            self.assertEqual(checker.core_lemmas(), 2)
+            # the conflict is found once [2] is added, [1] is never checked
+            _, formula = Parser().parse(cnf)
+            with open(drat, "wb") as f:
+                f.write(b"2 0\n1 0\n0\n")
+            checker = DratChecker(formula)
+            checker.read_proof(drat)
+            self.assertTrue(checker.check())
+            self.assertEqual((checker.core_lemmas(), checker.checks), (1, 1))
+
+            # [4, 1] is in the core, it is not RUP, RAT on 4 but not on 1, which the watches put first
+            rat = os.path.join(tmp, "rat.cnf")
+            with open(rat, "wb") as f:
+                f.write(b"p cnf 5 13\n-5 3 0\n-1 4 0\n-2 -1 0\n-4 5 0\n-1 2 3 0\n-2 1 5 0\n-3 1 5 0\n-2 3 0\n"
+                        b"-4 3 0\n-2 -1 0\n-5 -3 1 0\n3 5 0\n-5 -3 0\n")
+            with open(drat, "wb") as f:
+                f.write(b"-3 -2 1 0\n1 -3 -2 0\n4 1 0\n-2 4 -1 0\n4 2 -6 0\n4 0\n0\n")
+            _, formula = Parser().parse(rat)
+            checker = DratChecker(formula)
+            checker.read_proof(drat)
+            self.assertTrue(checker.check())
+            self.assertEqual(checker.pivots[checker.num_original + 2], formula.get_variables().get_ids()["4"] << 1)
+            self.assertTrue(checker.core[checker.num_original + 2])
+
+            with open(cnf, "wb") as f:
+                f.write(b"p cnf 2 3\n1 2 0\n-1 2 0\n1 -2 0\n")
+            for proof in (b"2 0\n0\n", b"1 0\n2 0\n0\n", b"-1 0\n0\n"):
+                _, formula = Parser().parse(cnf)
+                with open(drat, "wb") as f:
+                    f.write(proof)
+                checker = DratChecker(formula)
+                checker.read_proof(drat)
+                self.assertFalse(checker.check())
+
+            # the exit status of main.py tells whether the proof is verified
+            main = os.path.join(os.path.dirname(__file__), "..", "..", "main.py")
+            for flags, status in ((["-f", filepath.split("/", 1)[1], "-cp", config[F_PROOF]], 0),
+                                  (["-f", cnf, "-cp", drat], 1)):
+                result = subprocess.run([sys.executable, main, *flags], capture_output=True, text=True)
+                self.assertEqual(result.returncode, status)
+
+    def test_benchmark(self):
+        """
+        The counters of an instance are the same from one run to the next, and only a significant change of a
+        metric over the instances of a family is reported.
+        """
+        config = dict(CONFIG)
+        config[F_SEED] = 0
+        results = run_benchmark(["input/uf20-91", "input/uuf50-218"], config, limit=3)
+        self.assertEqual(len(results["instances"]), 6)
+        rows = compare(results, run_benchmark(["input/uf20-91", "input/uuf50-218"], config, limit=3))
+        self.assertTrue(all(row[-1] == "OK" for row in rows if row[1] != "time"))
+
+        def family(conflicts):
+            return {"instances": {f"f/{i}.cnf": {"sat": True, "time": 1.0, "decisions": 10, "conflicts": c,
+                                                 "propagations": 100} for i, c in enumerate(conflicts)}}
+        baseline = family([100, 200, 300, 400])
+        status = lambda rows: {row[1]: row[-1] for row in rows}
+        self.assertEqual(status(compare(family([130, 250, 400, 500]), baseline))["conflicts"], "REGRESSION")
+        self.assertEqual(status(compare(family([70, 150, 200, 300]), baseline))["conflicts"], "IMPROVEMENT")
+        # within the threshold, or not significant
+        self.assertEqual(status(compare(family([105, 210, 300, 400]), baseline))["conflicts"], "OK")
+        self.assertEqual(status(compare(family([400, 100, 900, 100]), baseline))["conflicts"], "OK")
+        self.assertEqual(status(compare(family([100, 200, 300, 400]), baseline))["time"], "OK")
+        wrong = family([100, 200, 300, 400])
+        wrong["instances"]["f/0.cnf"]["sat"] = False
+        self.assertEqual(status(compare(wrong, baseline))["sat"], "WRONG")
+
+    def test_stats(self):
+        """
+        The counters of a search agree with each other, and are reported as text and JSON.
+        """
+        symbols, formula = Parser().parse("input/uuf50-218/uuf50-01.cnf")
+        config = dict(CONFIG)
+        config[F_HEURISTIC] = "VSIDS"
+        config[F_RESTART] = "LUBY"
+        config[F_MINIMIZE] = "RECURSIVE"
+        stats = Stats()
+        solver = Solver(symbols, formula, Model.from_symbols(symbols), get_branch_heuristic("VSIDS"), stats, config)
+        self.assertFalse(solver.cdcl()[0])
+        # the last conflict is at level 0, nothing is learnt from it
+        self.assertEqual(stats.conflict_count, stats.learnt_count + 1)
+        self.assertEqual(sum(stats.lbd_histogram.values()), stats.learnt_count)
+        self.assertEqual(sum(stats.size_histogram.values()), stats.learnt_count)
+        self.assertEqual(sum(Stats.buckets(stats.size_histogram).values()), stats.learnt_count)
+        self.assertGreater(stats.propagation_count, stats.conflict_count)
+        report = json.loads(stats.json())
+        self.assertEqual(report["conflicts"], stats.conflict_count)
+        self.assertTrue(0 < report["average_level"] <= report["max_level"] == stats.max_level)
+        self.assertGreater(report["conflicts_per_second"], 0)
+        self.assertIn(f"Conflicts: {stats.conflict_count}", stats.string())
+        self.assertEqual(report["learnt_kept"], len(formula.learnt_clist))
+
+        # learnt clauses removed by root level simplification are not kept either
+        symbols, formula = Parser().parse("input/uuf50-218/uuf50-01.cnf")
+        config[F_SIMPLIFY] = True
+        stats = Stats()
+        solver = Solver(symbols, formula, Model.from_symbols(symbols), get_branch_heuristic("VSIDS"), stats, config)
+        self.assertFalse(solver.cdcl()[0])
+        self.assertGreater(stats.simplified_learnt_count, 0)
+        self.assertEqual(stats.to_dict()["learnt_kept"], len(formula.learnt_clist))
+        buckets = Stats.buckets({1: 2, 5: 1, 100: 3})
+        self.assertEqual((buckets["1"], buckets["5-6"], buckets["33-64"], buckets["65+"]), (2, 1, 0, 3))
+
+        config[F_STATS] = True
+        config[F_STATS_FORMAT] = "XML"
+        with self.assertRaises(ArgumentFormatError):
+            solve_cnf("input/uuf50-218/uuf50-01.cnf", config)
+
     def test_resolution(self):
         """
         Resolution algorithm.
         [-7,-9] and [-2,-7,9] -> [-2,-7]
         [-7,-9] and [-2,8] -> Exception
         """
-        x2 = Symbol("2", TRUE)
-        x7 = Symbol("7", TRUE)
-        x8 = Symbol("8", TRUE)
-        x9 = Symbol("9", TRUE)
-        c1 = Clause([x7.negate(),x9.negate()])
-        c2 = Clause([x2.negate(),x7.negate(),x9])
-        c3 = Clause([x2.negate(),x8])
+        vm = VariableMap()
+        x2 = vm.to_literal(Symbol("2", TRUE))
+        x7 = vm.to_literal(Symbol("7", TRUE))
+        x8 = vm.to_literal(Symbol("8", TRUE))
+        x9 = vm.to_literal(Symbol("9", TRUE))
+        c1 = Clause([negate(x7),negate(x9)])
+        c2 = Clause([negate(x2),negate(x7),x9])
+        c3 = Clause([negate(x2),x8])
         res1_actual = Solver.resolution(c1, c2, x9)
-        res1_expected = Clause([x2.negate(),x7.negate()])
+        res1_expected = Clause([negate(x2),negate(x7)])
         # Normal resolution
         self.assertEqual(res1_actual, res1_expected)
         # Resolution with no common symbol
@@ -281,8 +976,27 @@ class TestSolver(unittest.TestCase):
         Solver.to_positive(1, FALSE) -> (1, FALSE)
         Solver.to_positive(-1, TRUE) -> (1, FALSE)
         """
-        s = Symbol("1", TRUE)
+        vm = VariableMap()
+        s = vm.to_literal(Symbol("1", TRUE))
         self.assertEqual(Solver.to_positive(s, TRUE), (s, TRUE))
         self.assertEqual(Solver.to_positive(s, FALSE), (s, FALSE))
-        self.assertEqual(Solver.to_positive(s.negate(), TRUE), (s, FALSE))
+        self.assertEqual(Solver.to_positive(negate(s), TRUE), (s, FALSE))
         return True
+
+    def test_literal_encoding(self):
+        """
+        Variables get dense ids in order of appearance, literal = 2 * id + sign.
+        """
+        vm = VariableMap()
+        x5 = vm.to_literal(Symbol("5", TRUE))
+        not_x2 = vm.to_literal(Symbol("2", FALSE))
+        self.assertEqual(x5, 0)
+        self.assertEqual(not_x2, 3)
+        self.assertEqual(negate(not_x2), 2)
+        self.assertEqual(var_of(not_x2), 1)
+        self.assertEqual(vm.to_literal(Symbol("5", FALSE)), negate(x5))
+        self.assertEqual(len(vm), 2)
+        # symbols are restored with their original names
+        self.assertEqual(vm.to_symbol(not_x2), Symbol("2", FALSE))
+        self.assertEqual(vm.to_symbols([x5, negate(x5)]), [Symbol("5", TRUE), Symbol("5", FALSE)])
+
@@ -0,0 +1,107 @@
+from typing import List
+
+# activities are multiplied by 1/VSIDS_DECAY on every conflict (EVSIDS), by bumping with a growing increment
+VSIDS_DECAY = 0.95
+# rescale all activities once one of them exceeds this value, to stay within float range
+VSIDS_RESCALE_LIMIT = 1e100
+
+class VSIDS:
+    """
+    Variable State Independent Decaying Sum (VSIDS), in its exponential form (EVSIDS) as used in MiniSat.
+    Variables seen during conflict analysis are bumped by an increment, and the increment grows by 1/decay
+    after each conflict, which decays all previous bumps exponentially.
+    Unassigned variables are kept in an indexed binary max-heap on activity:
+    picking a variable and reinserting it on backtrack both cost O(log n).
+    Assigned variables are removed lazily, when they reach the top of the heap.
+    """
+    def __init__(self, num_vars: int, decay: float=VSIDS_DECAY):
+        self.activity = [0.0] * num_vars
+        self.var_inc = 1.0
+        self.decay_factor = decay
+        # heap of variables, and the position of each variable in the heap (-1 if not in heap)
+        self.heap = []
+        self.indices = [-1] * num_vars
+        for var in range(num_vars):
+            self.insert(var)
+
+    def bump(self, var: int):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > VSIDS_RESCALE_LIMIT:
+            self.rescale()
+        if self.indices[var] >= 0:
+            self.percolate_up(self.indices[var])
+
+    def decay(self):
+        self.var_inc /= self.decay_factor
+
+    def rescale(self):
+        # scaling every activity by the same factor keeps the heap ordered
+        self.activity = [a / VSIDS_RESCALE_LIMIT for a in self.activity]
+        self.var_inc /= VSIDS_RESCALE_LIMIT
+
+    def insert(self, var: int):
+        if self.indices[var] >= 0:
+            return
+        self.indices[var] = len(self.heap)
+        self.heap.append(var)
+        self.percolate_up(len(self.heap) - 1)
+
+    def pop_max(self) -> int:
+        """
+        Removes and returns the variable of highest activity, or -1 if the heap is empty.
+        """
+        heap = self.heap
+        if len(heap) == 0:
+            return -1
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if len(heap) > 0:
+            heap[0] = last
+            self.indices[last] = 0
+            self.percolate_down(0)
+        return top
+
+    def percolate_up(self, i: int):
+        heap, indices, activity = self.heap, self.indices, self.activity
+        var = heap[i]
+        act = activity[var]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if activity[heap[parent]] >= act:
+                break
+            heap[i] = heap[parent]
+            indices[heap[i]] = i
+            i = parent
+        heap[i] = var
+        indices[var] = i
+
+    def percolate_down(self, i: int):
+        heap, indices, activity = self.heap, self.indices, self.activity
+        var = heap[i]
+        act = activity[var]
+        size = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+            if activity[heap[child]] <= act:
+                break
+            heap[i] = heap[child]
+            indices[heap[i]] = i
+            i = child
+        heap[i] = var
+        indices[var] = i
+
+    # Returns the variables in the heap, for debugging.
+    def get_heap(self) -> List[int]:
+        return list(self.heap)
+
+    # allow "if var in vsids"
+    def __contains__(self, var: int):
+        return self.indices[var] >= 0
+
+    def __len__(self):
+        return self.heap.__len__()
@@ -0,0 +1,115 @@
+import json, math, os, platform, time
+from random import seed
+from statistics import NormalDist, mean, median, stdev
+from typing import Callable, List, Tuple
+from internal.utils.constants import F_HEURISTIC, F_SEED, F_PREPROCESS, F_PROBE
+from internal.sat.model import Model
+from internal.sat.solver import Solver
+from internal.sat.stats import Stats
+from internal.sat.preprocessor import Preprocessor
+from internal.utils.exceptions import ArgumentFormatError
+from internal.utils.parser import Parser
+from internal.utils.utils import get_branch_heuristic
+
+# recorded for every instance, the time is the median over the repetitions, the counters do not change with a seed
+METRICS = ("time", "decisions", "conflicts", "propagations")
+# seconds, times below this are measurement noise and compare as equal
+MIN_TIME = 0.01
+
+def benchmark_cnf(filepath: str, config: dict, heuristic_fn: Callable, repeat: int=1) -> dict:
+    """
+    Solves the formula repeat times, reseeding the random heuristics with config[F_SEED] each time.
+    Returns its status, the median wall time (parsing included) and the search counters of the last run.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        seed(config[F_SEED])
+        symbols, formula = Parser().parse(filepath)
+        preprocessor = None
+        if config[F_PREPROCESS] or config[F_PROBE]:
+            preprocessor = Preprocessor(formula, config[F_PROBE])
+            formula = preprocessor.simplify()
+        stats = Stats()
+        solver = Solver(symbols, formula, Model.from_symbols(symbols), heuristic_fn, stats, config)
+        if preprocessor is not None:
+            solver.set_preprocessor(preprocessor)
+        is_sat, _ = solver.cdcl()
+        times.append(time.perf_counter() - start)
+    return {"sat": bool(is_sat), "time": median(times), "times": times, "decisions": stats.branching_count,
+            "conflicts": stats.conflict_count, "propagations": stats.propagation_count}
+
+def run_benchmark(dirpaths: List[str], config: dict, limit: int=0, repeat: int=1) -> dict:
+    """
+    Solves the first limit instances (all if 0) of each family directory in order, printing one line per instance.
+    Returns the results: the configuration, the machine, and the records of the instances by family/file name.
+    """
+    heuristic_fn = get_branch_heuristic(config[F_HEURISTIC])
+    instances = {}
+    for dirpath in dirpaths:
+        family = os.path.basename(os.path.normpath(dirpath))
+        filenames = sorted(entry.name for entry in os.scandir(dirpath) if entry.is_file())
+        for filename in filenames[:limit] if limit > 0 else filenames:
+            record = benchmark_cnf(os.path.join(dirpath, filename), config, heuristic_fn, repeat)
+            name = f"{family}/{filename}"
+            instances[name] = record
+            print(f"{name}: {'SAT' if record['sat'] else 'UNSAT'} in {record['time']:0.4f} seconds, "
+                  f"{record['decisions']} decisions, {record['conflicts']} conflicts, "
+                  f"{record['propagations']} propagations")
+    return {"config": config, "repeat": repeat, "python": platform.python_version(),
+            "machine": platform.machine(), "instances": instances}
+
+def save(results: dict, filepath: str):
+    with open(filepath, "w") as f:
+        json.dump(results, f, indent=1)
+
+def load(filepath: str) -> dict:
+    with open(filepath) as f:
+        return json.load(f)
+
+def compare(results: dict, baseline: dict, threshold: float=0.1, confidence: float=0.95) -> List[Tuple]:
+    """
+    Compares each metric of each family with the baseline, over the instances they both solved.
+    The log ratios of the instances (new over baseline) are averaged: their exponential is the geometric mean
+    ratio, with a normal confidence interval. A metric regresses if it is more than threshold worse on
+    (geometric) average and the whole interval is worse; it improves in the symmetric case.
+    Returns rows of (family, metric, instances, ratio, low, high, status), status being OK, REGRESSION,
+    IMPROVEMENT, or WRONG if an instance changed status.
+    """
+    if not 0 < confidence < 1:
+        raise ArgumentFormatError(f"Confidence {confidence} is not between 0 and 1")
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    old = baseline["instances"]
+    families = {}
+    for name, record in results["instances"].items():
+        if name in old:
+            families.setdefault(name.split("/")[0], []).append((record, old[name]))
+
+    rows = []
+    for family, pairs in families.items():
+        wrong = sum(new["sat"] != prev["sat"] for new, prev in pairs)
+        if wrong:
+            rows.append((family, "sat", wrong, math.nan, math.nan, math.nan, "WRONG"))
+        for metric in METRICS:
+            if metric == "time":
+                logs = [math.log(max(new[metric], MIN_TIME) / max(prev[metric], MIN_TIME)) for new, prev in pairs]
+            else:
+                # counters can be 0
+                logs = [math.log((new[metric] + 1) / (prev[metric] + 1)) for new, prev in pairs]
+            m = mean(logs)
+            margin = z * stdev(logs) / math.sqrt(len(logs)) if len(logs) > 1 else 0.0
+            ratio, low, high = math.exp(m), math.exp(m - margin), math.exp(m + margin)
+            if ratio > 1 + threshold and low > 1:
+                status = "REGRESSION"
+            elif ratio < 1 / (1 + threshold) and high < 1:
+                status = "IMPROVEMENT"
+            else:
+                status = "OK"
+            rows.append((family, metric, len(logs), ratio, low, high, status))
+    return rows
+
+def summary(rows: List[Tuple]) -> str:
+    lines = [f"{'FAMILY':<14}{'METRIC':<14}{'N':>6}{'RATIO':>9}{'LOW':>9}{'HIGH':>9}  STATUS"]
+    for family, metric, n, ratio, low, high, status in rows:
+        lines.append(f"{family:<14}{metric:<14}{n:>6}{ratio:>9.3f}{low:>9.3f}{high:>9.3f}  {status}")
+    return "\n".join(lines)
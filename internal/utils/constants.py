@@ -3,5 +3,27 @@ F_INPUT_DIR = "input_dir"
 F_LOG_LEVEL = "log_level"
 F_PROFILE = "profile"
 F_STATS = "stats"
+F_STATS_FORMAT = "stats_format"
 F_PROGRESS = "progress"
-F_HEURISTIC = "heuristic"
\ No newline at end of file
+F_HEURISTIC = "heuristic"
+F_RESTART = "restart"
+F_REDUCE_BASE = "reduce_base"
+F_REDUCE_INC = "reduce_inc"
+F_MINIMIZE = "minimize"
+F_PHASE = "phase"
+F_JOBS = "jobs"
+F_TIMEOUT = "timeout"
+F_SEED = "seed"
+F_PORTFOLIO = "portfolio"
+F_SHARE_LBD = "share_lbd"
+F_SHARE_SIZE = "share_size"
+F_CUBE_DEPTH = "cube_depth"
+F_PREPROCESS = "preprocess"
+F_PROBE = "probe"
+F_SIMPLIFY = "simplify"
+F_ENUMERATE = "enumerate"
+F_MAX_MODELS = "max_models"
+F_PROJECT = "project"
+F_PROOF = "proof"
+F_BINARY_PROOF = "binary_proof"
+F_CHECK_PROOF = "check_proof"
@@ -0,0 +1,249 @@
+import contextlib, io, logging, time, traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from typing import List, Iterator, Tuple
+from internal.utils.constants import F_LOG_LEVEL, F_HEURISTIC, F_RESTART, F_PHASE, F_MINIMIZE, F_SEED, \
+    F_SHARE_LBD, F_SHARE_SIZE, F_TIMEOUT
+from internal.sat.lookahead import Lookahead
+from internal.sat.sharing import ClauseExchange
+from internal.utils.logger import Logger
+from internal.utils.parser import Parser
+from internal.utils.utils import solve_cnf
+
+# outcomes of an instance besides SAT and UNSAT
+TIMEOUT = "TIMEOUT"
+CRASH = "CRASH"
+ERROR = "ERROR"
+
+# configurations of the portfolio workers, the i-th worker runs PORTFOLIO[i % len(PORTFOLIO)] with seed i
+PORTFOLIO = [
+    {F_HEURISTIC: "VSIDS", F_RESTART: "LUBY", F_PHASE: "SAVE", F_MINIMIZE: "RECURSIVE"},
+    {F_HEURISTIC: "VSIDS", F_RESTART: "GLUCOSE", F_PHASE: "TARGET", F_MINIMIZE: "RECURSIVE"},
+    {F_HEURISTIC: "VSIDS", F_RESTART: "GEOMETRIC", F_PHASE: "BEST", F_MINIMIZE: "LOCAL"},
+    {F_HEURISTIC: "MOMS", F_RESTART: "LUBY", F_PHASE: "SAVE", F_MINIMIZE: "RECURSIVE"},
+    {F_HEURISTIC: "VSIDS", F_RESTART: "NONE", F_PHASE: "NONE", F_MINIMIZE: "NONE"},
+    {F_HEURISTIC: "JWTS", F_RESTART: "NONE", F_PHASE: "NONE", F_MINIMIZE: "LOCAL"},
+    {F_HEURISTIC: "RDLIS", F_RESTART: "LUBY", F_PHASE: "NONE", F_MINIMIZE: "RECURSIVE"},
+    {F_HEURISTIC: "RANDOM", F_RESTART: "LUBY", F_PHASE: "SAVE", F_MINIMIZE: "RECURSIVE"},
+]
+
+class Result:
+    """
+    Outcome of solving one instance in a worker process: status, solve time and everything the worker printed.
+    """
+    def __init__(self, filepath: str, status: str, elapsed: float, output: str=""):
+        self.filepath = filepath
+        self.status = status
+        self.elapsed = elapsed
+        self.output = output
+
+    def string(self) -> str:
+        return f"{self.filepath}: {self.status} ({self.elapsed:0.4f} seconds)\n{self.output}"
+
+def solve_worker(conn, filepath: str, config: dict, cube: List[int]=None, inbox=None, outboxes: list=None):
+    """
+    Entry point of a worker process: solves one instance, sends (status, time, output) back through conn.
+    With a cube, its literals are added to the formula as unit clauses.
+    With an inbox, learnt clauses are shared with the other workers through their inboxes (outboxes).
+    """
+    if not logging.getLogger().handlers:
+        # spawned rather than forked, the logger has to be set up again
+        Logger.set_level(config[F_LOG_LEVEL])
+    start = time.perf_counter()
+    output = io.StringIO()
+    try:
+        exchange = None
+        if inbox is not None:
+            exchange = ClauseExchange(inbox, outboxes, config[F_SHARE_LBD], config[F_SHARE_SIZE])
+        with contextlib.redirect_stdout(output):
+            is_sat = solve_cnf(filepath, config, exchange, cube)
+        status = "SAT" if is_sat else "UNSAT"
+    except Exception:
+        output.write(traceback.format_exc())
+        status = ERROR
+    conn.send((status, time.perf_counter() - start, output.getvalue()))
+    conn.close()
+
+def run_pool(tasks: List[tuple], jobs: int, timeout: float=None) -> Iterator[Tuple[int, Result]]:
+    """
+    Runs solve_worker(conn, *task) for every task in its own process, at most jobs at a time, and kills those
+    running for more than timeout seconds. A worker that dies without answering is reported as CRASH.
+    Yields (index of the task, result) in order of completion. The workers still running when the generator
+    is closed are terminated.
+    """
+    # index of the task -> (process, connection, start time)
+    running = {}
+    next_start = 0
+    try:
+        while next_start < len(tasks) or running:
+            while next_start < len(tasks) and len(running) < jobs:
+                receiver, sender = mp.Pipe(duplex=False)
+                process = mp.Process(target=solve_worker, args=(sender,) + tasks[next_start], daemon=True)
+                process.start()
+                sender.close()
+                running[next_start] = (process, receiver, time.perf_counter())
+                next_start += 1
+
+            wait_time = None
+            if timeout is not None:
+                now = time.perf_counter()
+                wait_time = max(0.0, min(started + timeout - now for _, _, started in running.values()))
+            ready = wait([receiver for _, receiver, _ in running.values()] +
+                         [process.sentinel for process, _, _ in running.values()], wait_time)
+
+            now = time.perf_counter()
+            for i, (process, receiver, started) in list(running.items()):
+                filepath = tasks[i][0]
+                if receiver in ready or process.sentinel in ready:
+                    try:
+                        result = Result(filepath, *receiver.recv())
+                    except EOFError:
+                        process.join()
+                        result = Result(filepath, CRASH, now - started, f"exit code {process.exitcode}\n")
+                elif timeout is not None and now - started >= timeout:
+                    process.terminate()
+                    result = Result(filepath, TIMEOUT, now - started)
+                else:
+                    continue
+                process.join()
+                receiver.close()
+                del running[i]
+                yield i, result
+    finally:
+        for process, receiver, _ in running.values():
+            process.terminate()
+            process.join()
+            receiver.close()
+
+def solve_dir_parallel(filepaths: List[str], config: dict, jobs: int, timeout: float=None) -> List[Result]:
+    """
+    Solves every instance in its own process, see run_pool, the batch goes on whatever happens to an instance.
+    Results are printed as soon as they are available, in the order of filepaths, followed by a summary.
+    """
+    start = time.perf_counter()
+    results = [None] * len(filepaths)
+    next_print = 0
+    for i, result in run_pool([(filepath, config) for filepath in filepaths], jobs, timeout):
+        results[i] = result
+        # stream the results, but only in order
+        while next_print < len(filepaths) and results[next_print] is not None:
+            print(results[next_print].string())
+            next_print += 1
+
+    print(summary(results, time.perf_counter() - start))
+    return results
+
+def portfolio_configs(config: dict, size: int) -> List[dict]:
+    """
+    Returns the configurations of size portfolio workers, the given config with the PORTFOLIO settings on top.
+    """
+    configs = []
+    for i in range(size):
+        worker_config = dict(config)
+        worker_config.update(PORTFOLIO[i % len(PORTFOLIO)])
+        worker_config[F_SEED] = i
+        configs.append(worker_config)
+    return configs
+
+# Returns the portfolio settings of a configuration, for reports.
+def describe(config: dict) -> str:
+    return " ".join(f"{key}={config[key]}" for key in [F_HEURISTIC, F_RESTART, F_PHASE, F_MINIMIZE, F_SEED])
+
+def solve_portfolio(filepath: str, config: dict, size: int) -> Result:
+    """
+    Solves one instance with size differently configured workers in parallel, see PORTFOLIO.
+    The first worker to answer SAT or UNSAT wins, the others are terminated.
+    If config[F_SHARE_LBD] > 0, workers share their learnt clauses of LBD at most F_SHARE_LBD
+    and at most F_SHARE_SIZE literals.
+    Returns the result of the winner, or an ERROR/CRASH result if no worker answered.
+    """
+    start = time.perf_counter()
+    configs = portfolio_configs(config, size)
+    inboxes = [mp.Queue() for _ in configs] if config[F_SHARE_LBD] > 0 else None
+    tasks = []
+    for i, worker_config in enumerate(configs):
+        if inboxes is None:
+            tasks.append((filepath, worker_config))
+        else:
+            tasks.append((filepath, worker_config, None, inboxes[i], inboxes[:i] + inboxes[i + 1:]))
+
+    winner, result, finished = -1, None, 0
+    pool = run_pool(tasks, size)
+    for i, worker_result in pool:
+        finished += 1
+        if worker_result.status in ("SAT", "UNSAT"):
+            winner, result = i, worker_result
+            break
+        elif result is None:
+            # no answer yet, keep the failure to report in case no worker answers
+            result = worker_result
+    # cancel the workers still running
+    pool.close()
+    if inboxes is not None:
+        for q in inboxes:
+            q.cancel_join_thread()
+            q.close()
+
+    elapsed = time.perf_counter() - start
+    print(result.output, end="")
+    if winner >= 0:
+        print(f"PORTFOLIO WINNER: worker {winner} ({describe(configs[winner])}) "
+              f"{result.status} in {result.elapsed:0.4f} seconds")
+    else:
+        print(f"PORTFOLIO: no worker answered, {result.status}")
+    print(f"PORTFOLIO: {size} workers, {size - finished} cancelled, wall time {elapsed:0.4f} seconds")
+    return result
+
+def solve_cubes(filepath: str, config: dict, depth: int, jobs: int) -> str:
+    """
+    Cube-and-conquer: splits one instance into cubes of at most depth literals by lookahead, see Lookahead,
+    then solves the instance restricted to each cube with jobs worker processes.
+    The first SAT cube answers SAT and cancels the others, the instance is UNSAT once every cube is UNSAT.
+    Returns SAT, UNSAT, or the status of a cube that did not answer.
+    """
+    start = time.perf_counter()
+    _, formula = Parser().parse(filepath)
+    lookahead = Lookahead(formula)
+    cubes = lookahead.cubes(depth)
+    variables = formula.get_variables()
+    print(f"CUBES: {len(cubes)} cubes of depth {depth}, {lookahead.refuted} refuted by lookahead "
+          f"in {time.perf_counter() - start:0.4f} seconds")
+
+    status, winner, finished = "UNSAT", None, 0
+    pool = run_pool([(filepath, config, cube) for cube in cubes], jobs, config[F_TIMEOUT])
+    for i, result in pool:
+        finished += 1
+        print(f"CUBE {i} [{' '.join(map(str, variables.to_symbols(cubes[i])))}]: {result.status} "
+              f"in {result.elapsed:0.4f} seconds")
+        if result.status == "SAT":
+            status, winner = "SAT", result
+            break
+        elif result.status != "UNSAT":
+            # the cube is unknown, so is the instance unless another cube is SAT
+            status = result.status
+    # cancel the cubes still running
+    pool.close()
+
+    if winner is not None:
+        print(winner.output, end="")
+    elif status == "UNSAT":
+        print("SATISIFABLE: False")
+    print(f"CUBES: {status}, {finished} of {len(cubes)} cubes solved, {len(cubes) - finished} cancelled, "
+          f"wall time {time.perf_counter() - start:0.4f} seconds")
+    return status
+
+def summary(results: List[Result], elapsed: float) -> str:
+    statuses = ["SAT", "UNSAT", TIMEOUT, CRASH, ERROR]
+    counts = ", ".join(f"{status} {sum(1 for r in results if r.status == status)}" for status in statuses)
+    solve_time = sum(r.elapsed for r in results)
+    slowest = max(results, key=lambda r: r.elapsed, default=None)
+    s = f"""
+        ----- SUMMARY -----
+        Instances: {len(results)} ({counts})
+        Total solve time: {solve_time:0.4f} seconds
+        Wall time: {elapsed:0.4f} seconds
+        """
+    if slowest is not None:
+        s += f"""Slowest: {slowest.filepath} ({slowest.elapsed:0.4f} seconds)
+        """
+    return s + "-------------------\n"
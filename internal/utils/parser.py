@@ -1,58 +1,127 @@
-from typing import List
+import bz2, gc, gzip, lzma, re, time
 from internal.utils.logger import Logger
 from internal.utils.exceptions import FileFormatError
 from internal.sat.clause import Clause
 from internal.sat.symbol import Symbol
+from internal.sat.literal import VariableMap
 from internal.sat.symbols import Symbols
 from internal.sat.formula import Formula
 
 logger = Logger.get_logger()
 
+# compressed inputs are decompressed transparently, based on the file extension
+OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+# comment lines, "c" followed by a blank or the end of the line
+COMMENT_PATTERN = re.compile(rb"^[ \t]*c(?:[ \t\r].*)?$", re.MULTILINE)
+# the problem line, "p cnf <variables> <clauses>"
+PROBLEM_PATTERN = re.compile(rb"^[ \t]*p[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)[ \t\r]*$", re.MULTILINE)
+# SATLIB files end with a "%" line followed by "0", everything from the "%" line on is ignored
+TRAILER_PATTERN = re.compile(rb"^[ \t]*%", re.MULTILINE)
+
 class Parser:
+    """
+    DIMACS CNF parser.
+    The whole (possibly compressed) file is read at once and tokenized in bulk: clauses are sequences of
+    literals terminated by 0, and may span several lines or share one. Comments, blank lines and the
+    SATLIB "%" trailer are skipped. Variables are DIMACS integers, or alphanumeric names (in which case
+    comments are only allowed before the problem line).
+    After parse, size is the number of bytes parsed and elapsed the time taken, see throughput.
+    """
     def __init__(self):
-        pass
+        self.size = 0
+        self.elapsed = 0.0
 
-    def parse(self, filepath: str) -> (Symbols, List[Symbol], Formula):
+    def parse(self, filepath: str) -> (Symbols, Formula):
+        """
+        Returns the variables parsed IN THE FILE and the formula.
+        DIMACS variables are mapped to dense ids in order of appearance, the formula keeps the mapping.
         """
-        Returns symbols parsed IN THE FILE and the clause list.
+        start = time.perf_counter()
+        opener = next((o for ext, o in OPENERS.items() if filepath.endswith(ext)), open)
+        with opener(filepath, "rb") as f:
+            data = f.read()
+
+        problem = PROBLEM_PATTERN.search(data)
+        if problem is None or problem.group(1) != b"cnf":
+            raise FileFormatError("Incorrect declaration for clauses")
+        try:
+            num_variables, num_clauses = int(problem.group(2)), int(problem.group(3))
+        except ValueError:
+            raise FileFormatError("Incorrect declaration for clauses")
+
+        body = data[problem.end():]
+        trailer = TRAILER_PATTERN.search(body)
+        if trailer is not None:
+            body = body[:trailer.start()]
+
+        # millions of clauses are allocated and none is garbage, collections would only rescan them
+        gc.disable()
+        try:
+            try:
+                clauses, variables = self.parse_integers(COMMENT_PATTERN.sub(b"", body).split())
+            except ValueError:
+                # a variable named "c" may start a line, no comments are allowed after the problem line
+                clauses, variables = self.parse_names(body.split())
+            formula = Formula(clauses, variables)
+        finally:
+            gc.enable()
+        if len(clauses) != num_clauses:
+            logger.warning(f"Declared {num_clauses} clauses, parsed {len(clauses)}")
+        if len(variables) > num_variables:
+            logger.warning(f"Declared {num_variables} variables, parsed {len(variables)}")
+
+        self.size = len(data)
+        self.elapsed = time.perf_counter() - start
+        logger.info(f"Parsed {filepath}: {self.throughput():0.2f} MB/s")
+        return Symbols(range(len(variables))), formula
+
+    def parse_integers(self, tokens: list) -> (list, VariableMap):
         """
-        with open(filepath) as f:
-            num_variables = -1
-            num_clauses = -1
-            # Read comments and variable/clause number dec
-            line = f.readline().strip()
-            while line:
-                if len(line) <= 0:
-                    raise FileFormatError("No empty lines allowed")
-                elif line[0] == 'c':
-                    pass # don't process comments
-                elif line[0] == 'p':
-                    tokens = line.split()
-                    if len(tokens) != 4:
-                        raise FileFormatError("Incorrect declaration for clauses")
-                    num_variables = int(tokens[2])
-                    num_clauses = int(tokens[3])
-
-                    if num_variables == -1 and num_clauses == -1:
-                        raise FileFormatError("Clause declaration before variable/clause number declaration")
-                    # Read clauses and variables
-                    clauses = []
-                    symbols = Symbols()
-                    symbols_lst = []
-                    for _ in range(num_clauses):
-                        tokens = f.readline().strip().split()
-                        if tokens[-1] != '0':
-                            raise FileFormatError("Clause declaration must end with 0")
-                        sbl_lst = list(map(self.parse_symbol, tokens[:-1]))
-                        clauses.append(Clause(sbl_lst))
-                        # Add read symbols as we go
-                        for s in sbl_lst:
-                            symbols_lst.append(s)
-                            symbols.add(s.to_positive()) # changing it to positive shouldn't affect anything
-                    return symbols, symbols_lst, Formula(clauses)
-
-                line = f.readline().strip()
-        raise FileFormatError("You should not be here")
+        Fast path for DIMACS integer variables. Raises ValueError on a non integer token.
+        Every step but the split into clauses runs over the whole token list at once.
+        """
+        ints = list(map(int, tokens))
+        if ints and ints[-1] != 0:
+            raise FileFormatError("Clause declaration must end with 0")
+        # DIMACS variables in order of appearance get the dense ids 0, 1, 2...
+        order = dict.fromkeys(map(abs, ints))
+        order.pop(0, None)
+        # DIMACS literal -> literal, negative DIMACS literals index the table from its end
+        table = [-1] * (2 * max(order, default=0) + 1)
+        for var, v in enumerate(order):
+            table[v] = var << 1
+            table[-v] = var << 1 | 1
+        lits = list(map(table.__getitem__, ints))
+
+        clauses = []
+        start = 0
+        for _ in range(ints.count(0)):
+            end = ints.index(0, start)
+            clauses.append(Clause(lits[start:end]))
+            start = end + 1
+        return clauses, VariableMap.from_names(list(map(str, order)))
+
+    def parse_names(self, tokens: list) -> (list, VariableMap):
+        """
+        Slow path for alphanumeric variable names, e.g. "-a b 0".
+        """
+        variables = VariableMap()
+        clauses = []
+        lits = []
+        for token in tokens:
+            token = token.decode()
+            if token == "0":
+                clauses.append(Clause(lits))
+                lits = []
+            else:
+                lits.append(variables.to_literal(self.parse_symbol(token)))
+        if lits:
+            raise FileFormatError("Clause declaration must end with 0")
+        return clauses, variables
+
+    # Returns the parse throughput of the last parse in MB/s.
+    def throughput(self) -> float:
+        return self.size / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
 
     def parse_symbol(self, sbl: str):
         if sbl and sbl[0] == '-' and sbl[1:].isalnum():
@@ -1,78 +1,169 @@
-from random import getrandbits, choice
+import time
+from random import getrandbits, choice, seed
 from typing import Callable, List
-from collections import defaultdict, Counter
-from internal.utils.constants import F_HEURISTIC, F_STATS
+from internal.utils.constants import F_HEURISTIC, F_STATS, F_STATS_FORMAT, F_SEED, F_PREPROCESS, F_PROBE, \
+    F_ENUMERATE, F_MAX_MODELS, F_PROJECT, F_PROOF, F_BINARY_PROOF, F_CHECK_PROOF
 from internal.sat.model import Model
 from internal.sat.solver import Solver
-from internal.sat.stats import Stats
+from internal.sat.stats import Stats, STATS_FORMATS
+from internal.sat.sharing import ClauseExchange
+from internal.sat.preprocessor import Preprocessor
+from internal.sat.enumeration import ModelEnumerator, ENUMERATION_MODES
+from internal.sat.proof import DratWriter
+from internal.sat.checker import DratChecker
 from internal.utils.exceptions import ArgumentFormatError
 from internal.utils.logger import Logger
 from internal.utils.parser import Parser
 from internal.sat.state_manager import StateManager
-from internal.sat.symbol import Symbol
 from internal.sat.formula import Formula
+from internal.sat.clause import Clause
 
 logger = Logger.get_logger()
 
-def solve_cnf(filepath: str, config: dict):
+def solve_cnf(filepath: str, config: dict, exchange: ClauseExchange=None, cube: List[int]=None) -> bool:
+    check_stats_format(config)
+    if config[F_PROOF] is not None and (config[F_PREPROCESS] or config[F_PROBE] or exchange or cube):
+        # only the clauses learnt by a single solver from the input formula are logged
+        raise ArgumentFormatError("A proof cannot be written with preprocessing, portfolio or cubes")
     # parse
     prs = Parser()
-    # Symbols (all pos), List[Symbol], Formula
-    symbols, symbols_lst, formula = prs.parse(filepath)
+    # Symbols (variables), Formula
+    symbols, formula = prs.parse(filepath)
+    if cube is not None:
+        # solve the formula restricted to the cube, see cube-and-conquer
+        for lit in cube:
+            formula.add_clause(Clause([lit]))
+    preprocessor = None
+    if config[F_PREPROCESS] or config[F_PROBE]:
+        preprocessor = Preprocessor(formula, config[F_PROBE])
+        formula = preprocessor.simplify()
+        print(preprocessor.string())
 
     # generate solver
-    heuristic_fn = get_branch_heuristic(config[F_HEURISTIC], symbols_lst)
+    if config[F_SEED] is not None:
+        seed(config[F_SEED]) # randomized heuristics become reproducible
+    heuristic_fn = get_branch_heuristic(config[F_HEURISTIC])
     model = Model.from_symbols(symbols)
     stats = Stats()
+    stats.set_parse(prs.size, prs.elapsed)
     if config[F_STATS]:
         solver = Solver(symbols, formula, model, heuristic_fn, stats, config)
     else:
         solver = Solver(symbols, formula, model, heuristic_fn, None, config)
+    if exchange is not None:
+        solver.set_exchange(exchange)
+    if preprocessor is not None:
+        solver.set_preprocessor(preprocessor)
+    proof = None
+    if config[F_PROOF] is not None:
+        proof = DratWriter(config[F_PROOF], formula.get_variables(), config[F_BINARY_PROOF])
+        solver.set_proof(proof)
 
     # evaluate
-    is_sat, sat_model = solver.cdcl()
+    try:
+        is_sat, sat_model = solver.cdcl()
+    finally:
+        if proof is not None:
+            proof.close()
 
     # display results
     print(f"SATISIFABLE: {is_sat}")
+    if proof is not None:
+        print(f"PROOF: {proof.added} clauses added, {proof.deleted} deleted, written to {config[F_PROOF]}")
     # if sat_model:
     #     print(f"MODEL: {sat_model}")
     if config[F_STATS]:
-        print(stats.string())
+        print(stats.json() if config[F_STATS_FORMAT] == "JSON" else stats.string())
+    return is_sat
 
-# Returns a function that takes in a state and formula, and returns a symbol and its assignment.
-def get_branch_heuristic(heuristic: str, sbl_lst: List[Symbol]) -> Callable:
-    def dlis(state: StateManager, formula: Formula) -> (Symbol, bool):
+def enumerate_cnf(filepath: str, config: dict) -> int:
+    """
+    Prints the models of the formula one by one, projected onto config[F_PROJECT] (comma separated variables,
+    all of them if None), with the time taken to find each. Stops after config[F_MAX_MODELS] models if > 0.
+    Preprocessing is not applied, eliminated variables could not be blocked.
+    Returns the number of models found.
+    """
+    if config[F_ENUMERATE] not in ENUMERATION_MODES:
+        raise ArgumentFormatError(f"{config[F_ENUMERATE]} is not a valid enumeration mode")
+    check_stats_format(config)
+    symbols, formula = Parser().parse(filepath)
+    variables = formula.get_variables()
+    projection = None
+    if config[F_PROJECT] is not None:
+        ids = variables.get_ids()
+        names = [name.strip() for name in config[F_PROJECT].split(",") if name.strip()]
+        unknown = [name for name in names if name not in ids]
+        if unknown:
+            raise ArgumentFormatError(f"Projection variables {unknown} are not in the formula")
+        projection = [ids[name] for name in names]
+
+    if config[F_SEED] is not None:
+        seed(config[F_SEED])
+    model = Model.from_symbols(symbols)
+    stats = Stats() if config[F_STATS] else None
+    solver = Solver(symbols, formula, model, get_branch_heuristic(config[F_HEURISTIC]), stats, config)
+    enumerator = ModelEnumerator(solver, projection)
+    if config[F_ENUMERATE] == "BLOCKING":
+        models = enumerator.blocking(config[F_MAX_MODELS])
+    else:
+        models = enumerator.backtrack(config[F_MAX_MODELS])
+
+    start = last = time.perf_counter()
+    count = 0
+    for lits in models:
+        now = time.perf_counter()
+        count += 1
+        print(f"MODEL {count} ({now - last:0.4f} seconds): {' '.join(map(str, variables.to_symbols(lits)))}")
+        last = now
+    complete = config[F_MAX_MODELS] <= 0 or count < config[F_MAX_MODELS]
+    print(f"MODELS: {count}{'' if complete else ' or more'} in {time.perf_counter() - start:0.4f} seconds, "
+          f"{enumerator.solve_calls} calls to the solver")
+    if stats is not None:
+        print(stats.json() if config[F_STATS_FORMAT] == "JSON" else stats.string())
+    return count
+
+def check_stats_format(config: dict):
+    if config[F_STATS] and config[F_STATS_FORMAT] not in STATS_FORMATS:
+        raise ArgumentFormatError(f"{config[F_STATS_FORMAT]} is not a valid statistics format")
+
+def check_proof(filepath: str, config: dict) -> bool:
+    """
+    Checks the DRAT proof config[F_CHECK_PROOF] of the unsatisfiability of the formula, see DratChecker.
+    Prints the time taken and the size of the core. Returns True if the proof is verified.
+    """
+    _, formula = Parser().parse(filepath)
+    checker = DratChecker(formula)
+    start = time.perf_counter()
+    checker.read_proof(config[F_CHECK_PROOF])
+    print(f"PROOF: {len(checker.ops)} lines read in {time.perf_counter() - start:0.4f} seconds")
+    verified = checker.check()
+    print(checker.string())
+    return verified
+
+# Returns a function that takes in a state and formula, and returns a literal and its assignment.
+def get_branch_heuristic(heuristic: str) -> Callable:
+    def dlis(state: StateManager, formula: Formula) -> (int, bool):
         """
         Dynamic Largest Individual Sum (DLIS).
-        Counts the number of unresolved clauses in which a given symbol x appears as a positive literal, Cp
+        Counts the number of unresolved clauses in which a given variable x appears as a positive literal, Cp
         and as a negative literal Cn.
         Consider these values separately.
         Select the variable with the largest individual value, assign it true if Cp >= Cn, false otherwise.
         """
-        sbls_pos = state.unassigned_symbols # unassigned symbols only
-        unass_cls = Solver.get_unresolved_clauses(formula, state.model)
-        scores = defaultdict(int)
-        for unsat_clause in unass_cls:
-            for sbl in unsat_clause:
-                scores[sbl] += 1
-        sbl = max(sbls_pos, key=lambda s: scores[s])
-        return (sbl, True) if scores[sbl] >= scores[sbl.negate()] else (sbl, False)
+        count = state.get_scores().count # maintained incrementally over unresolved clauses
+        lit = max(state.unassigned_symbols, key=lambda v: count[v << 1]) << 1
+        return (lit, True) if count[lit] >= count[lit ^ 1] else (lit, False)
 
-    def rdlis(state: StateManager, formula: Formula) -> (Symbol, bool):
+    def rdlis(state: StateManager, formula: Formula) -> (int, bool):
         """
         Random DLIS, a variation of DLIS, randomly selects the value to be assigned to a given selected variable,
         instead of comparing Cp with Cn, avoiding making too many bad decisions for a few specific instances.
         """
-        sbls_pos = state.unassigned_symbols  # unassigned symbols only
-        unass_cls = Solver.get_unresolved_clauses(formula, state.model)
-        scores = defaultdict(int)
-        for unsat_clause in unass_cls:
-            for sbl in unsat_clause:
-                scores[sbl] += 1
-        sbl = max(sbls_pos, key=lambda s: scores[s])
-        return sbl, not getrandbits(1)
+        count = state.get_scores().count
+        lit = max(state.unassigned_symbols, key=lambda v: count[v << 1]) << 1
+        return lit, not getrandbits(1)
 
-    def jwos(state: StateManager, formula: Formula) -> (Symbol, bool):
+    def jwos(state: StateManager, formula: Formula) -> (int, bool):
         """
         Jeroslow-Wang-one-sided (JW-OS) branching heuristic.
         For each literal in unassigned clauses, let
@@ -80,69 +171,60 @@ def get_branch_heuristic(heuristic: str, sbl_lst: List[Symbol]) -> Callable:
         where |w| is the number of unassigned clauses the literal appears in.
         Select the assignment that satisfies the literal with largest value J(l).
         """
-        sbls_pos = state.unassigned_symbols # unassigned symbols only
-        unass_cls = Solver.get_unresolved_clauses(formula, state.model)
-        scores = defaultdict(float)
-        for unsat_clause in unass_cls:
-            for s in unsat_clause:
-                scores[s.literal] += pow(2, -len(unsat_clause))
-        sbl = max(sbls_pos, key=lambda sb: scores[sb.literal])
-        return sbl, True
+        var = max(state.unassigned_symbols, key=state.get_scores().jw_var)
+        return var << 1, True
 
-    def jwts(state: StateManager, formula: Formula) -> (Symbol, bool):
+    def jwts(state: StateManager, formula: Formula) -> (int, bool):
         """
         Jeroslow-Wang-two-sided (JS-TS) branching heuristic.
         Identifies the variable x with the largest sum J(x) + J(-x)
         Assign x value true if J(x) >= J(-x), false otherwise.
         """
-        sbls_pos = state.unassigned_symbols # unassigned symbols only
-        scores = defaultdict(float)
-        unass_cls = Solver.get_unresolved_clauses(formula, state.model)
-        for c in unass_cls:
-            for s in c:
-                scores[s] += pow(2, -len(c))
-        unass_sbls = [s for s in sbls_pos] + [s.negate() for s in sbls_pos]
-        sbl = max(unass_sbls, key=lambda sb: scores[sb] + scores[sb.negate()])
-        return (sbl, True) if scores[sbl] >= scores[sbl.negate()] else (sbl, False)
+        scores = state.get_scores()
+        jw = scores.jw
+        lit = max(state.unassigned_symbols, key=scores.jw_var) << 1
+        return (lit, True) if jw[lit] >= jw[lit ^ 1] else (lit, False)
 
-    def moms(state: StateManager, formula: Formula) -> (Symbol, bool):
+    def moms(state: StateManager, formula: Formula) -> (int, bool):
         """
         Maximum Occurrences on clauses of Minimum Size (MOM's) heuristic.
         Returns the literal with the largest number of occurrences in the smallest unresolved clauses.
         """
-        sbls = state.unassigned_symbols # unassigned postiive symbols only
-        scores = defaultdict(int)
-        clauses = Solver.get_min_unresolved_clauses(formula, state.model)
-        for c in clauses:
-            for s in c:
-                scores[s.literal] += 1
-        sbl = max(sbls, key=lambda x: scores[x.literal])
-        return sbl, True
+        var = max(state.unassigned_symbols, key=state.get_scores().moms_var)
+        return var << 1, True
 
-    def rand(state: StateManager, formula: Formula) -> (Symbol, bool):
+    def rand(state: StateManager, formula: Formula) -> (int, bool):
         """
-        Randomly selects the next symbol to assign.
+        Randomly selects the next variable to assign.
         """
-        return choice([x for x in state.unassigned_symbols]), not getrandbits(1)
+        return choice([v for v in state.unassigned_symbols]) << 1, not getrandbits(1)
 
-    def threeClause(state: StateManager, formula: Formula) -> (Symbol, bool):
+    def threeClause(state: StateManager, formula: Formula) -> (int, bool):
         """
-        Choose the symbol with the maximum occurences in 3-clauses, break ties randomly
+        Choose the variable with the maximum occurences in 3-clauses, break ties randomly
         """
-        scores = Counter()
-        unass_cls = Solver.get_unresolved_clauses(formula, state.model)
-        for clause in unass_cls:
-            for sbl in clause:
-                scores[sbl.literal] += 1
-        max_score = -1 if len(scores) < 1 else max(scores.values())
-        choices = [x for x in state.unassigned_symbols if scores[x.literal] == max_score]
+        scores = state.get_scores()
+        max_score = max(map(scores.count_var, range(formula.num_vars)), default=-1)
+        choices = [v for v in state.unassigned_symbols if scores.count_var(v) == max_score]
         if len(choices) == 0:
-            choices = [x for x in state.unassigned_symbols]
-        return choice(choices), not getrandbits(1)
+            choices = [v for v in state.unassigned_symbols]
+        return choice(choices) << 1, not getrandbits(1)
+
+    def vsids(state: StateManager, formula: Formula) -> (int, bool):
+        """
+        Variable State Independent Decaying Sum (VSIDS).
+        Picks the unassigned variable of highest activity from the heap, activities are bumped during conflict
+        analysis. Assigned variables still in the heap are discarded on the way. Assigns it false, as in MiniSat.
+        """
+        heap = state.get_vsids()
+        var = heap.pop_max()
+        while var >= 0 and var not in state.unassigned_symbols:
+            var = heap.pop_max()
+        return var << 1, False
 
-    def default(state: StateManager, formula: Formula) -> (Symbol, bool):
-        sbl, val = state.sbls_get_unassigned_sbl_fifo()
-        return sbl, val
+    def default(state: StateManager, formula: Formula) -> (int, bool):
+        lit, val = state.sbls_get_unassigned_sbl_fifo()
+        return lit, val
 
     if heuristic == "DLIS":
         print("BRANCHING HEURISTIC: DLIS")
@@ -165,6 +247,9 @@ def get_branch_heuristic(heuristic: str, sbl_lst: List[Symbol]) -> Callable:
     elif heuristic == "3CH":
         print("BRANCHING HEURISTIC: 3CH")
         return threeClause
+    elif heuristic == "VSIDS":
+        print("BRANCHING HEURISTIC: VSIDS")
+        return vsids
     elif heuristic == "DEFAULT":
         print("BRANCHING HEURISTIC: DEFAULT")
         return default
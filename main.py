@@ -1,86 +1,187 @@
-import argparse, os
+import argparse, os, sys
 import cProfile, pstats
 import time
 from internal.utils.constants import *
 from internal.utils.logger import Logger
-from internal.utils.utils import solve_cnf
+from internal.utils.utils import solve_cnf, enumerate_cnf, check_proof
+from internal.utils.parallel import solve_dir_parallel, solve_portfolio, solve_cubes
 
-# setup
-parser = argparse.ArgumentParser(description="CDCL SAT Solver.\n"
-                                             "To start, specify either a file or directory under '/input'.\n"
-                                             "Examples:\n"
-                                             "From file: python3 main.py -f sample.cnf -l DEBUG -p False\n"
-                                             "From directory: python3 main.py -f uf20-91 -l INFO -p False\n")
-parser.add_argument("-f", "--file", dest="input_file", type=str,
-                    help="Input file in DIMACS format in directory 'input'.")
-parser.add_argument("-d", "--dir", dest="input_dir", type=str,
-                    help="Input directory under directory 'input' to get .cnf files from.")
-parser.add_argument("-l", "--log-level", dest="log_level", type=str, default="NONE",
-                    help="Log level. INFO/DEBUG/ERROR. Default: NONE.")
-parser.add_argument("-p", "--profile", dest="profile", action='store_true',
-                    help="Activate profiling. Slows program significantly. Off by default.")
-parser.add_argument("-s", "--stats", dest="stats", action='store_true',
-                    help="Activate statistics. Slows program minimally. Off by default.")
-parser.add_argument("-pb", "--progress-bar", dest="progress", action='store_true',
-                    help="Activate progress tracker. Slows program minimally. Off by default.")
-parser.add_argument("-b", "--branch-heuristic", dest="heuristic", type=str, default="DEFAULT",
-                    help="Branching variable heuristic. Default: DEFAULT")
+def main():
+    # setup
+    parser = argparse.ArgumentParser(description="CDCL SAT Solver.\n"
+                                                 "To start, specify either a file or directory under '/input'.\n"
+                                                 "Examples:\n"
+                                                 "From file: python3 main.py -f sample.cnf -l DEBUG -p False\n"
+                                                 "From directory: python3 main.py -f uf20-91 -l INFO -p False\n")
+    parser.add_argument("-f", "--file", dest="input_file", type=str,
+                        help="Input file in DIMACS format in directory 'input'.")
+    parser.add_argument("-d", "--dir", dest="input_dir", type=str,
+                        help="Input directory under directory 'input' to get .cnf files from.")
+    parser.add_argument("-l", "--log-level", dest="log_level", type=str, default="NONE",
+                        help="Log level. INFO/DEBUG/ERROR. Default: NONE.")
+    parser.add_argument("-p", "--profile", dest="profile", action='store_true',
+                        help="Activate profiling. Slows program significantly. Off by default.")
+    parser.add_argument("-s", "--stats", dest="stats", action='store_true',
+                        help="Activate statistics. Slows program minimally. Off by default.")
+    parser.add_argument("-sf", "--stats-format", dest="stats_format", type=str, default="TEXT",
+                        help="Format of the statistics. TEXT/JSON. Default: TEXT")
+    parser.add_argument("-pb", "--progress-bar", dest="progress", action='store_true',
+                        help="Activate progress tracker. Slows program minimally. Off by default.")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=1,
+                        help="Number of instances (or cubes) solved in parallel processes in --dir mode (or with --cube-depth). "
+                             "Default: 1")
+    parser.add_argument("-t", "--timeout", dest="timeout", type=float, default=None,
+                        help="Time limit in seconds per instance in --dir mode, runs in worker processes. Default: none")
+    parser.add_argument("-pf", "--portfolio", dest="portfolio", type=int, default=0,
+                        help="Number of differently configured solvers racing on --file in parallel processes. "
+                             "Default: 0 (off)")
+    parser.add_argument("-sl", "--share-lbd", dest="share_lbd", type=int, default=0,
+                        help="Portfolio workers share their learnt clauses up to this LBD. Default: 0 (no sharing)")
+    parser.add_argument("-ss", "--share-size", dest="share_size", type=int, default=8,
+                        help="Portfolio workers share their learnt clauses up to this size. Default: 8")
+    parser.add_argument("-cd", "--cube-depth", dest="cube_depth", type=int, default=0,
+                        help="Cube-and-conquer on --file: split into cubes of this many literals by lookahead, "
+                             "solved by --jobs parallel processes. Default: 0 (off)")
+    parser.add_argument("-e", "--enumerate", dest="enumerate", type=str, default="NONE",
+                        help="Enumerate the models of --file. BLOCKING/BACKTRACK. Default: NONE (one model)")
+    parser.add_argument("-mm", "--max-models", dest="max_models", type=int, default=0,
+                        help="Stop enumerating after this many models. Default: 0 (all)")
+    parser.add_argument("-pj", "--project", dest="project", type=str, default=None,
+                        help="Comma separated variables the enumerated models are projected onto. Default: all")
+    parser.add_argument("-o", "--proof", dest="proof", type=str, default=None,
+                        help="Write a DRAT proof of unsatisfiability of --file to this file, compressed if it ends with "
+                             ".gz/.xz/.bz2. Not available with --dir, --portfolio, --cube-depth, --enumerate, "
+                             "--preprocess or --probe. Default: none")
+    parser.add_argument("-bp", "--binary-proof", dest="binary_proof", action='store_true',
+                        help="Write the DRAT proof in binary format. Off by default.")
+    parser.add_argument("-cp", "--check-proof", dest="check_proof", type=str, default=None,
+                        help="Check this text or binary DRAT proof of unsatisfiability of --file instead of solving it, "
+                             "exits with 1 if it is not verified. Default: none")
+    parser.add_argument("-sd", "--seed", dest="seed", type=int, default=None,
+                        help="Random seed of the randomized heuristics. Default: none")
+    parser.add_argument("-b", "--branch-heuristic", dest="heuristic", type=str, default="DEFAULT",
+                        help="Branching variable heuristic. Default: DEFAULT")
+    parser.add_argument("-r", "--restart", dest="restart", type=str, default="NONE",
+                        help="Restart policy. NONE/LUBY/GEOMETRIC/GLUCOSE. Default: NONE")
+    parser.add_argument("-m", "--minimize", dest="minimize", type=str, default="NONE",
+                        help="Learnt clause minimization. NONE/LOCAL/RECURSIVE. Default: NONE")
+    parser.add_argument("-ph", "--phase", dest="phase", type=str, default="NONE",
+                        help="Phase selection. NONE/SAVE/TARGET/BEST. Default: NONE")
+    parser.add_argument("-pp", "--preprocess", dest="preprocess", action='store_true',
+                        help="Simplify the formula before solving: subsumption, self-subsuming resolution and "
+                             "bounded variable elimination. Off by default.")
+    parser.add_argument("-pr", "--probe", dest="probe", action='store_true',
+                        help="Preprocess with failed literal probing and equivalent literal substitution too. "
+                             "Off by default.")
+    parser.add_argument("-sp", "--simplify", dest="simplify", action='store_true',
+                        help="Remove clauses satisfied at decision level 0, FALSE literals and pure literals whenever "
+                             "level 0 grows. Off by default.")
+    parser.add_argument("-rb", "--reduce-base", dest="reduce_base", type=int, default=2000,
+                        help="Conflicts before the first learnt clause database reduction, 0 to never reduce. Default: 2000")
+    parser.add_argument("-ri", "--reduce-inc", dest="reduce_inc", type=int, default=300,
+                        help="Increase of the interval between learnt clause database reductions. Default: 300")
 
-args = parser.parse_args()
+    args = parser.parse_args()
 
-config = {
-    F_INPUT_FILE: args.input_file,
-    F_INPUT_DIR: args.input_dir,
-    F_LOG_LEVEL: args.log_level,
-    F_PROFILE: args.profile,
-    F_STATS: args.stats,
-    F_PROGRESS: args.progress,
-    F_HEURISTIC: args.heuristic
-}
+    config = {
+        F_INPUT_FILE: args.input_file,
+        F_INPUT_DIR: args.input_dir,
+        F_LOG_LEVEL: args.log_level,
+        F_PROFILE: args.profile,
+        F_STATS: args.stats,
+        F_STATS_FORMAT: args.stats_format,
+        F_PROGRESS: args.progress,
+        F_HEURISTIC: args.heuristic,
+        F_RESTART: args.restart,
+        F_REDUCE_BASE: args.reduce_base,
+        F_REDUCE_INC: args.reduce_inc,
+        F_MINIMIZE: args.minimize,
+        F_PHASE: args.phase,
+        F_JOBS: args.jobs,
+        F_TIMEOUT: args.timeout,
+        F_PORTFOLIO: args.portfolio,
+        F_SEED: args.seed,
+        F_SHARE_LBD: args.share_lbd,
+        F_SHARE_SIZE: args.share_size,
+        F_CUBE_DEPTH: args.cube_depth,
+        F_PREPROCESS: args.preprocess,
+        F_PROBE: args.probe,
+        F_SIMPLIFY: args.simplify,
+        F_ENUMERATE: args.enumerate,
+        F_MAX_MODELS: args.max_models,
+        F_PROJECT: args.project,
+        F_PROOF: args.proof,
+        F_BINARY_PROOF: args.binary_proof,
+        F_CHECK_PROOF: args.check_proof
+    }
 
-if config[F_INPUT_FILE] and config[F_INPUT_DIR]:
-    parser.print_help()
-    exit(-1)
-if not (config[F_INPUT_FILE] or config[F_INPUT_DIR]):
-    parser.print_help()
-    exit(-1)
+    if config[F_INPUT_FILE] and config[F_INPUT_DIR]:
+        parser.print_help()
+        exit(-1)
+    if not (config[F_INPUT_FILE] or config[F_INPUT_DIR]):
+        parser.print_help()
+        exit(-1)
 
-Logger.set_level(config[F_LOG_LEVEL])
-logger = Logger.get_logger()
+    if config[F_PROOF] is not None and (config[F_INPUT_DIR] or config[F_PORTFOLIO] > 0 or config[F_CUBE_DEPTH] > 0
+                                        or config[F_ENUMERATE] != "NONE"):
+        # several solvers would write to the same proof file
+        parser.error("--proof is only written for a single --file solved by one solver, not with --dir, "
+                     "--portfolio, --cube-depth or --enumerate")
 
-# parse
-root_dir_path = os.path.dirname(__file__)
-input_dir_path = os.path.join(root_dir_path, "input")
+    Logger.set_level(config[F_LOG_LEVEL])
+    logger = Logger.get_logger()
 
-# profiling
-pr = cProfile.Profile(timer=time.process_time)
+    # parse
+    root_dir_path = os.path.dirname(__file__)
+    input_dir_path = os.path.join(root_dir_path, "input")
 
-if config[F_INPUT_FILE]:
-    filepath = os.path.join(input_dir_path, config[F_INPUT_FILE])
-    if config[F_PROFILE]:
-        print("Profiling activated")
-        pr.enable()
+    # profiling
+    pr = cProfile.Profile(timer=time.process_time)
 
-    solve_cnf(filepath, config)
+    if config[F_INPUT_FILE]:
+        filepath = os.path.join(input_dir_path, config[F_INPUT_FILE])
+        if config[F_PROFILE]:
+            print("Profiling activated")
+            pr.enable()
 
-    if config[F_PROFILE]:
-        pr.disable()
-        ps = pstats.Stats(pr).sort_stats(pstats.SortKey.CUMULATIVE)
-        ps.print_stats(10)
-elif config[F_INPUT_DIR]:
-    dirpath = os.path.join(input_dir_path, config[F_INPUT_DIR])
-    if config[F_PROFILE]:
-        print("Profiling activated")
-        pr.enable()
+        if config[F_CHECK_PROOF] is not None:
+            if not check_proof(filepath, config):
+                # scripts can tell a rejected proof apart
+                sys.exit(1)
+        elif config[F_ENUMERATE] != "NONE":
+            enumerate_cnf(filepath, config)
+        elif config[F_PORTFOLIO] > 0:
+            solve_portfolio(filepath, config, config[F_PORTFOLIO])
+        elif config[F_CUBE_DEPTH] > 0:
+            solve_cubes(filepath, config, config[F_CUBE_DEPTH], config[F_JOBS])
+        else:
+            solve_cnf(filepath, config)
 
-    for entry in os.scandir(dirpath):
-        print(entry.path)
-        solve_cnf(entry.path, config)
+        if config[F_PROFILE]:
+            pr.disable()
+            ps = pstats.Stats(pr).sort_stats(pstats.SortKey.CUMULATIVE)
+            ps.print_stats(10)
+    elif config[F_INPUT_DIR]:
+        dirpath = os.path.join(input_dir_path, config[F_INPUT_DIR])
+        if config[F_PROFILE]:
+            print("Profiling activated")
+            pr.enable()
 
-    if config[F_PROFILE]:
-        pr.disable()
-        ps = pstats.Stats(pr).sort_stats(pstats.SortKey.CUMULATIVE)
-        ps.print_stats(10)
-else:
-    parser.print_help()
-    exit(-1)
+        filepaths = sorted(entry.path for entry in os.scandir(dirpath) if entry.is_file())
+        if config[F_JOBS] > 1 or config[F_TIMEOUT] is not None:
+            solve_dir_parallel(filepaths, config, config[F_JOBS], config[F_TIMEOUT])
+        else:
+            for filepath in filepaths:
+                print(filepath)
+                solve_cnf(filepath, config)
+
+        if config[F_PROFILE]:
+            pr.disable()
+            ps = pstats.Stats(pr).sort_stats(pstats.SortKey.CUMULATIVE)
+            ps.print_stats(10)
+    else:
+        parser.print_help()
+        exit(-1)
+
+if __name__ == "__main__":
+    main()